@@ -0,0 +1,371 @@
+"""
+============================================================================
+BENCHMARK - MEDICIONES DE RENDIMIENTO
+============================================================================
+Script para medir el rendimiento de las operaciones de base de datos.
+
+Usa una base de datos TEMPORAL (no toca ~/.sistema_pagos/pagos.db).
+
+Ejecutar desde la raiz del proyecto:
+    python benchmark.py
+============================================================================
+"""
+
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Agregar el directorio actual al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def usar_db_temporal():
+    """
+    Apunta DatabaseConfig a una base de datos nueva en una carpeta temporal.
+
+    Returns:
+        Path: Carpeta temporal usada
+    """
+    from config.database import DatabaseConfig
+
+    DatabaseConfig.cerrar_conexiones()
+
+    carpeta = Path(tempfile.mkdtemp(prefix='bench_pagos_'))
+    DatabaseConfig.DB_DIR = carpeta
+    DatabaseConfig.DB_PATH = carpeta / 'pagos.db'
+    DatabaseConfig.inicializar_db()
+
+    return carpeta
+
+
+def medir(nombre, funcion, repeticiones):
+    """
+    Ejecuta una función varias veces e informa cuántas por segundo.
+
+    Returns:
+        float: Operaciones por segundo
+    """
+    inicio = time.perf_counter()
+    for i in range(repeticiones):
+        funcion(i)
+    duracion = time.perf_counter() - inicio
+
+    por_segundo = repeticiones / duracion if duracion > 0 else float('inf')
+    print(f"   {nombre:<40} {repeticiones:>6} ops en {duracion:7.3f}s "
+          f"→ {por_segundo:>10,.0f} ops/s")
+    return por_segundo
+
+
+def bench_pool_conexiones(repeticiones=2000):
+    """Compara abrir/cerrar una conexión por query contra el pool"""
+    print("=" * 70)
+    print("BENCHMARK 1: POOL DE CONEXIONES")
+    print("=" * 70)
+
+    from config.database import DatabaseConfig
+
+    usar_db_temporal()
+
+    def sin_pool_select(i):
+        # Lo que hacía ejecutar_query antes: conectar, ejecutar, cerrar
+        conn = DatabaseConfig.get_connection()
+        try:
+            conn.execute("SELECT valor FROM configuracion WHERE clave = ?",
+                         ('version_db',)).fetchone()
+        finally:
+            conn.close()
+
+    def con_pool_select(i):
+        DatabaseConfig.ejecutar_query(
+            "SELECT valor FROM configuracion WHERE clave = ?",
+            params=('version_db',),
+            fetch_one=True
+        )
+
+    def sin_pool_insert(i):
+        conn = DatabaseConfig.get_connection()
+        try:
+            conn.execute("INSERT INTO referencias (codigo) VALUES (?)",
+                         (f"SINPO{i:07d}",))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def con_pool_insert(i):
+        DatabaseConfig.ejecutar_query(
+            "INSERT INTO referencias (codigo) VALUES (?)",
+            params=(f"CONPO{i:07d}",)
+        )
+
+    print("\nSELECT:")
+    antes = medir("Antes (abrir/cerrar por query)", sin_pool_select, repeticiones)
+    despues = medir("Después (pool de conexiones)", con_pool_select, repeticiones)
+    print(f"   Mejora: x{despues / antes:.1f}")
+
+    # Los INSERT hacen commit (fsync): usamos menos repeticiones
+    print("\nINSERT + COMMIT:")
+    antes = medir("Antes (abrir/cerrar por query)", sin_pool_insert, repeticiones // 4)
+    despues = medir("Después (pool de conexiones)", con_pool_insert, repeticiones // 4)
+    print(f"   Mejora: x{despues / antes:.1f}")
+
+    DatabaseConfig.cerrar_conexiones()
+    print()
+
+
+def bench_carga_items(cantidad=2000):
+    """Compara agregar_item() en un for contra agregar_items_lote()"""
+    print("=" * 70)
+    print("BENCHMARK 2: CARGA MASIVA DE ITEMS")
+    print("=" * 70)
+
+    from config.database import DatabaseConfig
+    from models.referencia import Referencia
+    from models.planilla import Planilla
+
+    usar_db_temporal()
+
+    referencia = Referencia.crear("BENCH0000001", "Benchmark")
+    items = [{
+        'tipo_documento': 'CUIT',
+        'numero_documento': '20123456786',
+        'identificacion_pago': f"OP{i:05d}",
+        'beneficiario': f"Beneficiario {i}",
+        'importe': 1000.0 + i,
+        'modalidad_pago': 2,
+        'cuenta_pago': '0170099520000003912345'
+    } for i in range(cantidad)]
+
+    print()
+    planilla = Planilla.crear(referencia.id, "001", "123")
+    antes = medir("Antes (agregar_item por fila)",
+                  lambda i: planilla.agregar_item(**items[i]), cantidad)
+
+    planilla = Planilla.crear(referencia.id, "001", "123")
+    resultado = planilla.agregar_items_lote(items)
+    print(f"   {'Después (agregar_items_lote)':<40} {resultado}")
+    print(f"   Mejora: x{resultado.filas_por_segundo / antes:.1f}")
+
+    DatabaseConfig.cerrar_conexiones()
+    print()
+
+
+def bench_listado_planillas(cantidad=500, items_por_planilla=20):
+    """Compara el listado con consultas por planilla (N+1) contra una sola"""
+    print("=" * 70)
+    print("BENCHMARK 3: LISTADO DE PLANILLAS CON TOTALES")
+    print("=" * 70)
+
+    from config.database import DatabaseConfig
+    from models.referencia import Referencia
+    from models.planilla import Planilla
+
+    usar_db_temporal()
+
+    referencia = Referencia.crear("BENCH0000001", "Benchmark")
+    item = {
+        'tipo_documento': 'CUIT',
+        'numero_documento': '20123456786',
+        'identificacion_pago': 'OP',
+        'beneficiario': 'Beneficiario',
+        'importe': 1000.0,
+        'modalidad_pago': 2,
+        'cuenta_pago': '0170099520000003912345'
+    }
+    for i in range(cantidad):
+        planilla = Planilla.crear(referencia.id, "001", "123")
+        planilla.agregar_items_lote([item] * items_por_planilla)
+
+    def antes(i):
+        # Lo que hacía to_dict(): SELECT de planillas + COUNT + SUM por planilla
+        filas = DatabaseConfig.ejecutar_query("SELECT * FROM planillas", fetch_all=True)
+        for fila in filas:
+            DatabaseConfig.ejecutar_query(
+                "SELECT COUNT(*) FROM items_planilla WHERE planilla_id = ?",
+                params=(fila['id'],), fetch_one=True)
+            DatabaseConfig.ejecutar_query(
+                "SELECT SUM(importe) FROM items_planilla WHERE planilla_id = ?",
+                params=(fila['id'],), fetch_one=True)
+
+    def despues(i):
+        [p.to_dict() for p in Planilla.obtener_todas()]
+
+    print()
+    lento = medir(f"Antes ({cantidad} x 2 consultas extra)", antes, 5)
+    rapido = medir("Después (una consulta con totales)", despues, 5)
+    print(f"   Mejora: x{rapido / lento:.1f}")
+
+    DatabaseConfig.cerrar_conexiones()
+    print()
+
+
+def bench_pragmas(repeticiones=500):
+    """Compara la latencia de commit con el journal por defecto contra el perfil WAL"""
+    print("=" * 70)
+    print("BENCHMARK 4: WAL + PRAGMAS")
+    print("=" * 70)
+
+    from config.database import DatabaseConfig
+
+    perfil = dict(DatabaseConfig.PRAGMAS)
+
+    def insertar(i):
+        DatabaseConfig.ejecutar_query(
+            "INSERT INTO referencias (codigo) VALUES (?)",
+            params=(f"PRAGM{i:07d}",)
+        )
+
+    print()
+    # Lo que había antes: journal DELETE con fsync completo en cada commit
+    DatabaseConfig.configurar_pragmas(journal_mode='DELETE', synchronous='FULL')
+    usar_db_temporal()
+    antes = medir("Antes (journal DELETE, synchronous FULL)", insertar, repeticiones)
+
+    DatabaseConfig.configurar_pragmas(**perfil)
+    usar_db_temporal()
+    despues = medir("Después (WAL, synchronous NORMAL)", insertar, repeticiones)
+    print(f"   Mejora: x{despues / antes:.1f}")
+
+    DatabaseConfig.cerrar_conexiones()
+    print()
+
+
+def bench_hidratacion(cantidad=20000):
+    """Compara armar objetos campo por campo contra la fábrica de filas"""
+    print("=" * 70)
+    print("BENCHMARK 5: FILAS → OBJETOS")
+    print("=" * 70)
+
+    from config.database import DatabaseConfig
+    from models.cheque import Cheque
+
+    usar_db_temporal()
+
+    DatabaseConfig.ejecutar_muchos(
+        "INSERT INTO cheques_emitidos (numero_cheque, tipo, beneficiario, importe) "
+        "VALUES (?, 'comun', ?, ?)",
+        [(i, f"Beneficiario {i}", 1000.0 + i) for i in range(cantidad)]
+    )
+    query = "SELECT * FROM cheques_emitidos"
+
+    def antes(i):
+        # Lo que hacía cada modelo: una búsqueda por nombre por campo
+        filas = DatabaseConfig.ejecutar_query(query, fetch_all=True)
+        [Cheque(
+            id=fila['id'],
+            numero_cheque=fila['numero_cheque'],
+            tipo=fila['tipo'],
+            estado=fila['estado'],
+            referencia_id=fila['referencia_id'],
+            planilla_id=fila['planilla_id'],
+            beneficiario=fila['beneficiario'],
+            importe=fila['importe'],
+            fecha_emision=fila['fecha_emision'],
+            fecha_pago=fila['fecha_pago'],
+            fecha_creacion=fila['fecha_creacion']
+        ) for fila in filas]
+
+    def despues(i):
+        DatabaseConfig.ejecutar_query(query, fetch_all=True, clase=Cheque)
+
+    print()
+    lento = medir("Antes (sqlite3.Row + fila['campo'])", antes, 5)
+    rapido = medir("Después (fábrica de filas generada)", despues, 5)
+    print(f"   Mejora: x{rapido / lento:.1f}")
+
+    DatabaseConfig.cerrar_conexiones()
+    print()
+
+
+def medir_memoria(nombre, funcion, cantidad):
+    """
+    Ejecuta una función que arma `cantidad` objetos e informa los bytes
+    por objeto que siguen ocupados (incluye sus valores).
+
+    Returns:
+        float: Bytes por objeto
+    """
+    tracemalloc.start()
+    resultado = funcion()
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+
+    por_objeto = memoria / cantidad
+    print(f"   {nombre:<40} {memoria / 1024 / 1024:7.1f} MB → {por_objeto:7.0f} bytes/objeto")
+    return por_objeto
+
+
+def bench_memoria_modelos(cantidad=50000):
+    """Compara la memoria de dicts y objetos con __dict__ contra __slots__"""
+    print("=" * 70)
+    print("BENCHMARK 6: MEMORIA POR OBJETO")
+    print("=" * 70)
+
+    from config.database import DatabaseConfig, fabrica_filas
+    from models.cheque import Cheque
+    from models.referencia import Referencia
+    from models.planilla import Planilla
+
+    usar_db_temporal()
+
+    referencia = Referencia.crear("BENCH0000001", "Benchmark")
+    planilla = Planilla.crear(referencia.id, "001", "123")
+    planilla.agregar_items_lote([{
+        'tipo_documento': 'CUIT',
+        'numero_documento': '20123456786',
+        'identificacion_pago': f"OP{i:05d}",
+        'beneficiario': f"Beneficiario {i}",
+        'importe': 1000.0 + i,
+        'modalidad_pago': 2,
+        'cuenta_pago': '0170099520000003912345'
+    } for i in range(cantidad)])
+
+    DatabaseConfig.ejecutar_muchos(
+        "INSERT INTO cheques_emitidos (numero_cheque, tipo, beneficiario, importe) "
+        "VALUES (?, 'comun', ?, ?)",
+        [(i, f"Beneficiario {i}", 1000.0 + i) for i in range(cantidad)]
+    )
+
+    # La misma clase Cheque pero sin __slots__ (como era antes)
+    ChequeConDict = type('ChequeConDict', (), {'__init__': Cheque.__init__})
+    query = "SELECT * FROM cheques_emitidos"
+
+    def cheques_con_dict():
+        filas = DatabaseConfig.ejecutar_query(query, fetch_all=True)
+        desde_fila = fabrica_filas(ChequeConDict, filas[0].keys())
+        return [desde_fila(fila) for fila in filas]
+
+    print("\nItems de planilla:")
+    antes = medir_memoria("Antes (obtener_items → dicts)",
+                          planilla.obtener_items, cantidad)
+    despues = medir_memoria("Después (ItemPlanilla con __slots__)",
+                            lambda: planilla.obtener_items(como_objetos=True), cantidad)
+    print(f"   Reducción: {1 - despues / antes:.0%}")
+
+    print("\nCheques:")
+    antes = medir_memoria("Antes (objeto con __dict__)", cheques_con_dict, cantidad)
+    despues = medir_memoria("Después (Cheque con __slots__)",
+                            lambda: DatabaseConfig.ejecutar_query(query, fetch_all=True,
+                                                                  clase=Cheque),
+                            cantidad)
+    print(f"   Reducción: {1 - despues / antes:.0%}")
+
+    DatabaseConfig.cerrar_conexiones()
+    print()
+
+
+def main():
+    """Ejecuta todos los benchmarks"""
+    bench_pool_conexiones()
+    bench_carga_items()
+    bench_listado_planillas()
+    bench_pragmas()
+    bench_hidratacion()
+    bench_memoria_modelos()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,14 +8,339 @@ CONCEPTOS CLAVE:
 - SQLite: Base de datos que se guarda en un archivo (no necesita servidor)
 - Context Manager: El 'with' asegura que la conexión se cierre correctamente
 - Singleton: Solo una instancia de la DB para toda la aplicación
+- Pool de conexiones: Reutilizamos conexiones abiertas en lugar de abrir y
+  cerrar el archivo en cada query
+- PRAGMAs: Opciones de SQLite que se fijan en cada conexión (WAL, cache...)
+- Fábricas de filas: Funciones generadas una vez por clase que arman el
+  objeto del modelo directamente desde la tupla de la fila
 ============================================================================
 """
 
 import sqlite3
 import os
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
 
+def aplicar_pragmas(conn, pragmas):
+    """
+    Ejecuta los PRAGMA de configuración en una conexión recién abierta.
+    
+    Args:
+        conn (sqlite3.Connection): Conexión a configurar
+        pragmas (dict): {nombre: valor}, ej: {'journal_mode': 'WAL'}
+    """
+    for nombre, valor in pragmas.items():
+        conn.execute(f"PRAGMA {nombre} = {valor}")
+
+
+@lru_cache(maxsize=512)
+def es_escritura(query):
+    """
+    True si la sentencia modifica datos (INSERT, UPDATE, DELETE, REPLACE).
+    
+    ejecutar_query() lo consulta en CADA llamada para decidir si hace
+    commit. Como las queries son siempre los mismos textos, el resultado
+    se guarda (lru_cache) y el strip().upper() se hace una sola vez
+    por sentencia distinta.
+    
+    Args:
+        query (str): Texto SQL
+        
+    Returns:
+        bool: True si es una escritura
+    """
+    return query.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE', 'REPLACE'))
+
+
+# ============================================================================
+# FÁBRICAS DE FILAS
+# ============================================================================
+# Antes cada modelo armaba sus objetos así:
+#     cls(id=fila['id'], codigo=fila['codigo'], ...)
+# Una búsqueda por nombre en sqlite3.Row por cada campo de cada fila.
+#
+# fabrica_filas() GENERA (una vez por clase y por lista de columnas) una
+# función con las posiciones ya resueltas:
+#     def desde_fila(fila):
+#         return Referencia(fila[0], fila[1], fila[2], fila[3], conv_activa(fila[4]))
+# y la guarda para las próximas consultas.
+
+_fabricas_filas = {}
+
+
+def fabrica_filas(clase, columnas):
+    """
+    Devuelve la función fila → objeto para una clase y un orden de columnas.
+    
+    Las columnas se emparejan por NOMBRE con los parámetros del __init__
+    de la clase; las que no son parámetros (ej: columnas de un JOIN) se
+    ignoran y los parámetros sin columna toman su valor por defecto.
+    Si la clase define _CONVERSIONES_FILA = {'activa': bool}, esas
+    funciones se aplican al valor de la columna.
+    
+    Args:
+        clase (type): Clase del modelo (ej: Referencia)
+        columnas (iterable): Nombres de columna en el orden de la fila
+            (fila.keys() o los nombres de cursor.description)
+            
+    Returns:
+        callable: desde_fila(fila) → objeto. La fila puede ser una tupla
+            o un sqlite3.Row.
+            
+    Ejemplo:
+        desde_fila = fabrica_filas(Referencia, fila.keys())
+        ref = desde_fila(fila)
+    """
+    clave = (clase, tuple(columnas))
+    fabrica = _fabricas_filas.get(clave)
+    
+    if fabrica is None:
+        fabrica = _generar_fabrica(clase, clave[1])
+        # Si dos hilos la generan a la vez, gana cualquiera: son iguales
+        _fabricas_filas[clave] = fabrica
+    
+    return fabrica
+
+
+def _generar_fabrica(clase, columnas):
+    """Escribe y compila el código de desde_fila() para fabrica_filas()"""
+    posiciones = {nombre: i for i, nombre in enumerate(columnas)}
+    conversiones = getattr(clase, '_CONVERSIONES_FILA', {})
+    entorno = {'clase': clase}
+    argumentos = []
+    por_nombre = False
+    
+    parametros = list(inspect.signature(clase.__init__).parameters.values())[1:]
+    for parametro in parametros:
+        if parametro.kind in (parametro.VAR_POSITIONAL, parametro.VAR_KEYWORD):
+            continue
+        
+        if parametro.name not in posiciones:
+            # Falta una columna: desde acá los argumentos van por nombre
+            por_nombre = True
+            continue
+        
+        valor = f"fila[{posiciones[parametro.name]}]"
+        if parametro.name in conversiones:
+            entorno[f"conv_{parametro.name}"] = conversiones[parametro.name]
+            valor = f"conv_{parametro.name}({valor})"
+        
+        argumentos.append(f"{parametro.name}={valor}" if por_nombre else valor)
+    
+    codigo = f"def desde_fila(fila):\n    return clase({', '.join(argumentos)})\n"
+    exec(compile(codigo, f"<fabrica {clase.__name__}>", "exec"), entorno)
+    return entorno['desde_fila']
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones SQLite reutilizables, una por hilo.
+    
+    ¿Por qué un pool? Abrir una conexión SQLite implica abrir el archivo,
+    leer el encabezado y el esquema. Hacerlo en cada query (como antes)
+    multiplica ese costo por cada INSERT de cada cheque.
+    
+    Cada hilo recibe SU conexión (sqlite3 no permite compartir una conexión
+    entre hilos de forma segura) y la reutiliza en todas sus queries.
+    El tamaño del pool limita cuántas conexiones puede haber abiertas a la vez.
+    
+    Ejemplo:
+        pool = PoolConexiones(DatabaseConfig.DB_PATH, tamano=5)
+        conn = pool.obtener()
+        conn.execute("SELECT 1")
+        pool.cerrar_todas()
+    """
+    
+    def __init__(self, db_path, tamano=5, timeout=30.0, intervalo_verificacion=30.0,
+                 pragmas=None, cached_statements=128):
+        """
+        Constructor del pool.
+        
+        Args:
+            db_path (Path): Ruta al archivo de la base de datos
+            tamano (int): Máximo de conexiones abiertas al mismo tiempo
+            timeout (float): Segundos a esperar por una conexión libre
+            intervalo_verificacion (float): Segundos de inactividad tras los
+                cuales se verifica que la conexión siga sana antes de usarla
+            pragmas (dict, optional): PRAGMAs para cada conexión nueva
+            cached_statements (int, optional): Sentencias preparadas que
+                guarda cada conexión (ver DatabaseConfig.CACHED_STATEMENTS)
+        """
+        if tamano < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        
+        self.db_path = db_path
+        self.tamano = tamano
+        self.timeout = timeout
+        self.intervalo_verificacion = intervalo_verificacion
+        self.pragmas = dict(pragmas or {})
+        self.cached_statements = cached_statements
+        
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._semaforo = threading.BoundedSemaphore(tamano)
+        
+        # conexión -> hilo dueño (para liberar las de hilos que ya terminaron)
+        self._conexiones = {}
+        self._cerrado = False
+    
+    def _crear_conexion(self):
+        """Abre una conexión nueva configurada como las de get_connection()"""
+        # check_same_thread=False solo para poder CERRARLA desde otro hilo
+        # (por ejemplo al apagar la app). Cada hilo usa únicamente la suya.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        aplicar_pragmas(conn, self.pragmas)
+        return conn
+    
+    def _liberar_huerfanas(self):
+        """
+        Cierra las conexiones de hilos que ya terminaron.
+        
+        Debe llamarse con self._lock tomado.
+        """
+        for conn, hilo in list(self._conexiones.items()):
+            if not hilo.is_alive():
+                del self._conexiones[conn]
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+                self._semaforo.release()
+    
+    def _descartar(self, conn):
+        """Cierra una conexión y libera su lugar en el pool"""
+        with self._lock:
+            if self._conexiones.pop(conn, None) is not None:
+                self._semaforo.release()
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._local.conn = None
+    
+    @staticmethod
+    def _esta_sana(conn):
+        """Health check: una query trivial para ver si la conexión responde"""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def obtener(self):
+        """
+        Obtiene la conexión del hilo actual (la crea si no existe).
+        
+        Returns:
+            sqlite3.Connection: Conexión lista para usar
+            
+        Raises:
+            RuntimeError: Si el pool está cerrado o no hay lugar disponible
+        """
+        if self._cerrado:
+            raise RuntimeError("El pool de conexiones está cerrado")
+        
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            # Solo verificamos la salud si estuvo un rato sin usarse
+            inactiva = time.monotonic() - self._local.ultimo_uso
+            if inactiva < self.intervalo_verificacion or self._esta_sana(conn):
+                self._local.ultimo_uso = time.monotonic()
+                return conn
+            self._descartar(conn)
+        
+        # Conseguir un lugar en el pool
+        if not self._semaforo.acquire(blocking=False):
+            with self._lock:
+                self._liberar_huerfanas()
+            if not self._semaforo.acquire(timeout=self.timeout):
+                raise RuntimeError(
+                    f"No hay conexiones disponibles (tamaño del pool: {self.tamano})"
+                )
+        
+        try:
+            conn = self._crear_conexion()
+        except Exception:
+            self._semaforo.release()
+            raise
+        
+        with self._lock:
+            self._conexiones[conn] = threading.current_thread()
+        
+        self._local.conn = conn
+        self._local.ultimo_uso = time.monotonic()
+        return conn
+    
+    def descartar_actual(self):
+        """
+        Descarta la conexión del hilo actual.
+        
+        Útil si quedó en un estado inválido: la próxima llamada
+        a obtener() abrirá una nueva.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._descartar(conn)
+    
+    def verificar_salud(self):
+        """
+        Verifica todas las conexiones abiertas y descarta las rotas.
+        
+        Returns:
+            dict: {'abiertas': int, 'sanas': int, 'descartadas': int}
+        """
+        with self._lock:
+            self._liberar_huerfanas()
+            conexiones = list(self._conexiones)
+        
+        sanas = 0
+        descartadas = 0
+        for conn in conexiones:
+            if self._esta_sana(conn):
+                sanas += 1
+            else:
+                self._descartar(conn)
+                descartadas += 1
+        
+        return {
+            'abiertas': len(conexiones),
+            'sanas': sanas,
+            'descartadas': descartadas
+        }
+    
+    def cerrar_todas(self):
+        """
+        Cierra todas las conexiones del pool (apagado limpio).
+        
+        Después de esto el pool no se puede volver a usar.
+        """
+        with self._lock:
+            self._cerrado = True
+            conexiones = list(self._conexiones)
+            self._conexiones.clear()
+        
+        for conn in conexiones:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            self._semaforo.release()
+        
+        self._local = threading.local()
+    
+    def __len__(self):
+        """Cantidad de conexiones abiertas en este momento"""
+        with self._lock:
+            return len(self._conexiones)
+
+
 class DatabaseConfig:
     """
     Clase para configurar y gestionar la conexión a la base de datos.
@@ -32,6 +357,61 @@ class DatabaseConfig:
     # Ruta al archivo con el esquema SQL
     SCHEMA_PATH = Path(__file__).parent.parent / 'database' / 'schema.sql'
     
+    # Máximo de conexiones abiertas a la vez (una por hilo)
+    POOL_TAMANO = 5
+    
+    # Pool compartido por toda la aplicación (se crea la primera vez que se usa)
+    _pool = None
+    _pool_lock = threading.Lock()
+    
+    # Estado de la transacción en curso (uno por hilo, como las conexiones)
+    _tx_local = threading.local()
+    
+    # Ruta de la base a la que ya se le aplicó el esquema en este proceso
+    _db_inicializada = None
+    
+    # Perfil de PRAGMAs que se aplica a TODAS las conexiones.
+    # Se puede cambiar con configurar_pragmas() (ej: en tests o benchmarks).
+    PRAGMAS = {
+        # WAL (Write-Ahead Logging): los cambios se escriben a un archivo
+        # aparte (pagos.db-wal). Los lectores NO se bloquean mientras otro
+        # hilo/proceso escribe (la UI sigue leyendo durante una generación
+        # masiva) y cada commit es un append, no reescribir páginas
+        'journal_mode': 'WAL',
+        # Con WAL, NORMAL es seguro ante cortes de la app (no del SO):
+        # solo hace fsync en los checkpoints, no en cada commit
+        'synchronous': 'NORMAL',
+        # Cache de páginas: negativo = KiB (unos 20 MB)
+        'cache_size': -20000,
+        # Leer el archivo mapeado en memoria (hasta 256 MB)
+        'mmap_size': 268435456,
+        # Tablas temporales (ORDER BY, GROUP BY grandes) en memoria
+        'temp_store': 'MEMORY',
+        # Milisegundos a esperar si la base está bloqueada por otro escritor
+        'busy_timeout': 5000,
+        # Hacer cumplir las FOREIGN KEY del esquema (SQLite las ignora por defecto)
+        'foreign_keys': 'ON',
+    }
+    
+    # Sentencias preparadas (ya compiladas por SQLite) que guarda cada
+    # conexión. Si el mismo texto SQL se vuelve a ejecutar, se reutiliza
+    # sin volver a parsearlo. El default de sqlite3 es 128; la app tiene
+    # unas 110 queries, y los listados arman varias variantes de cada una
+    # según los filtros, así que con 128 se desalojaban y re-parseaban.
+    CACHED_STATEMENTS = 256
+    
+    # Columnas agregadas al esquema después de su primera versión.
+    # CREATE TABLE IF NOT EXISTS no toca una tabla que ya existe:
+    # inicializar_db() las agrega con ALTER TABLE a las bases viejas.
+    COLUMNAS_NUEVAS = {
+        'planillas': [
+            ('cantidad_items', 'INTEGER NOT NULL DEFAULT 0'),
+            ('total_importe', 'DECIMAL(12,2) NOT NULL DEFAULT 0'),
+            ('total_cheques', 'DECIMAL(12,2) NOT NULL DEFAULT 0'),
+            ('total_transferencias', 'DECIMAL(12,2) NOT NULL DEFAULT 0'),
+        ],
+    }
+    
     @classmethod
     def inicializar_db(cls):
         """
@@ -40,9 +420,13 @@ class DatabaseConfig:
         ¿Qué hace este método?
         1. Crea la carpeta para la DB si no existe
         2. Lee el archivo schema.sql
-        3. Ejecuta todas las sentencias SQL para crear las tablas
+        3. Agrega las columnas nuevas a las tablas de bases viejas
+        4. Ejecuta todas las sentencias SQL para crear las tablas
         
-        Se llama automáticamente la primera vez que se usa la app.
+        Se llama sola la primera vez que el proceso usa la base (ver
+        obtener_pool); main.py la llama al arrancar. Importar este módulo
+        ya NO la ejecuta: así un proceso hijo (ver preparar_proceso_hijo)
+        no toca la base por defecto antes de saber cuál es la suya.
         """
         # Crear directorio si no existe
         cls.DB_DIR.mkdir(parents=True, exist_ok=True)
@@ -52,6 +436,7 @@ class DatabaseConfig:
         
         # Conectar a la base de datos (se crea si no existe)
         conn = sqlite3.connect(cls.DB_PATH)
+        aplicar_pragmas(conn, cls.PRAGMAS)
         cursor = conn.cursor()
         
         try:
@@ -59,9 +444,34 @@ class DatabaseConfig:
             with open(cls.SCHEMA_PATH, 'r', encoding='utf-8') as f:
                 schema_sql = f.read()
             
+            # Bases creadas con una versión anterior del esquema
+            agregadas = cls._agregar_columnas_nuevas(cursor)
+            
             # Ejecutar todo el SQL del schema
             cursor.executescript(schema_sql)
+            
+            # Los totales de planillas recién agregados arrancan en 0:
+            # calcularlos una vez (de ahí en más los mantienen los triggers)
+            if 'planillas' in agregadas:
+                cursor.execute("""
+                    UPDATE planillas SET
+                        cantidad_items = (SELECT COUNT(*) FROM items_planilla i
+                                          WHERE i.planilla_id = planillas.id),
+                        total_importe = (SELECT ROUND(COALESCE(SUM(i.importe), 0), 2)
+                                         FROM items_planilla i
+                                         WHERE i.planilla_id = planillas.id),
+                        total_cheques = (SELECT ROUND(COALESCE(SUM(i.importe), 0), 2)
+                                         FROM items_planilla i
+                                         WHERE i.planilla_id = planillas.id
+                                         AND i.modalidad_pago IN (6, 8)),
+                        total_transferencias = (SELECT ROUND(COALESCE(SUM(i.importe), 0), 2)
+                                                FROM items_planilla i
+                                                WHERE i.planilla_id = planillas.id
+                                                AND i.modalidad_pago IN (2, 4))
+                """)
+            
             conn.commit()
+            cls._db_inicializada = cls.DB_PATH
             
             if primera_vez:
                 print("✅ Base de datos creada exitosamente")
@@ -75,6 +485,34 @@ class DatabaseConfig:
         finally:
             conn.close()
     
+    @classmethod
+    def _agregar_columnas_nuevas(cls, cursor):
+        """
+        Agrega a las tablas existentes las columnas de COLUMNAS_NUEVAS que falten.
+        
+        En una base nueva las tablas todavía no existen y no hace nada
+        (las crea schema.sql con todas sus columnas).
+        
+        Args:
+            cursor (sqlite3.Cursor): Cursor de la conexión de inicialización
+            
+        Returns:
+            set: Nombres de las tablas a las que se les agregó alguna columna
+        """
+        agregadas = set()
+        
+        for tabla, columnas in cls.COLUMNAS_NUEVAS.items():
+            existentes = {fila[1] for fila in cursor.execute(f"PRAGMA table_info({tabla})")}
+            if not existentes:
+                continue
+            
+            for nombre, definicion in columnas:
+                if nombre not in existentes:
+                    cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN {nombre} {definicion}")
+                    agregadas.add(tabla)
+        
+        return agregadas
+    
     @classmethod
     def get_connection(cls):
         """
@@ -89,36 +527,308 @@ class DatabaseConfig:
             cursor.execute("SELECT * FROM referencias")
             conn.close()
         """
-        # Asegurarse de que la DB existe
-        if not cls.DB_PATH.exists():
+        # Asegurarse de que la DB existe y tiene el esquema al día
+        if cls._db_inicializada != cls.DB_PATH or not cls.DB_PATH.exists():
             cls.inicializar_db()
         
         # Crear conexión
-        conn = sqlite3.connect(cls.DB_PATH)
+        conn = sqlite3.connect(cls.DB_PATH, cached_statements=cls.CACHED_STATEMENTS)
         
         # Configurar para que devuelva filas como diccionarios
         # Esto es MUY útil porque podemos hacer row['nombre'] en vez de row[0]
         conn.row_factory = sqlite3.Row
         
+        # WAL, cache, foreign keys... (ver PRAGMAS)
+        aplicar_pragmas(conn, cls.PRAGMAS)
+        
         return conn
     
     @classmethod
-    def ejecutar_query(cls, query, params=None, fetch_one=False, fetch_all=False):
+    def obtener_pool(cls):
+        """
+        Obtiene el pool de conexiones de la aplicación, creándolo si hace falta.
+        
+        Returns:
+            PoolConexiones: El pool compartido
+        """
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    # Asegurarse de que la DB existe y tiene el esquema al día
+                    # (solo una vez, no en cada query)
+                    if cls._db_inicializada != cls.DB_PATH or not cls.DB_PATH.exists():
+                        cls.inicializar_db()
+                    cls._pool = PoolConexiones(cls.DB_PATH, tamano=cls.POOL_TAMANO,
+                                               pragmas=cls.PRAGMAS,
+                                               cached_statements=cls.CACHED_STATEMENTS)
+        return cls._pool
+    
+    @classmethod
+    def configurar_pool(cls, tamano):
+        """
+        Cambia el tamaño del pool. Cierra el pool actual si existía.
+        
+        Args:
+            tamano (int): Máximo de conexiones abiertas a la vez
+        """
+        if tamano < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        cls.cerrar_conexiones()
+        cls.POOL_TAMANO = tamano
+    
+    @classmethod
+    def configurar_pragmas(cls, **cambios):
+        """
+        Cambia el perfil de PRAGMAs. Cierra el pool actual si existía,
+        para que las conexiones nuevas usen el perfil nuevo.
+        
+        Un valor None saca ese PRAGMA del perfil (queda el de SQLite).
+        
+        Ejemplo:
+            DatabaseConfig.configurar_pragmas(cache_size=-64000, mmap_size=None)
+        """
+        cls.cerrar_conexiones()
+        
+        pragmas = dict(cls.PRAGMAS)
+        for nombre, valor in cambios.items():
+            if valor is None:
+                pragmas.pop(nombre, None)
+            else:
+                pragmas[nombre] = valor
+        cls.PRAGMAS = pragmas
+    
+    @classmethod
+    def verificar_pragmas(cls):
+        """
+        Autodiagnóstico: lee los PRAGMAs ACTIVOS y los compara con el perfil.
+        
+        SQLite puede ignorar un valor sin dar error (ej: WAL en una carpeta
+        de red, o un mmap_size mayor al máximo con el que fue compilado).
+        Esto muestra qué quedó realmente configurado.
+        
+        Returns:
+            dict: {nombre: {'esperado': str, 'activo': str, 'ok': bool}}
+            
+        Ejemplo:
+            for nombre, info in DatabaseConfig.verificar_pragmas().items():
+                print(nombre, info['activo'], "✅" if info['ok'] else "⚠️")
+        """
+        conn = cls.obtener_pool().obtener()
+        resultado = {}
+        
+        for nombre, esperado in cls.PRAGMAS.items():
+            activo = conn.execute(f"PRAGMA {nombre}").fetchone()[0]
+            esperado_txt = cls._normalizar_pragma(nombre, esperado)
+            activo_txt = cls._normalizar_pragma(nombre, activo)
+            resultado[nombre] = {
+                'esperado': esperado_txt,
+                'activo': activo_txt,
+                'ok': esperado_txt == activo_txt
+            }
+        
+        return resultado
+    
+    @staticmethod
+    def _normalizar_pragma(nombre, valor):
+        """
+        Lleva un valor de PRAGMA a texto comparable.
+        
+        SQLite devuelve algunos como número: synchronous=NORMAL se lee
+        como 1, temp_store=MEMORY como 2, foreign_keys=ON como 1.
+        """
+        nombres = {
+            'synchronous': {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'},
+            'temp_store': {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'},
+            'foreign_keys': {0: 'OFF', 1: 'ON'},
+        }
+        if nombre in nombres and isinstance(valor, int):
+            return nombres[nombre].get(valor, str(valor))
+        return str(valor).upper()
+    
+    @classmethod
+    def cerrar_conexiones(cls):
+        """
+        Cierra todas las conexiones del pool.
+        
+        Se llama al cerrar la aplicación (ver main.py) o antes de borrar
+        el archivo de la base de datos. La próxima query crea un pool nuevo.
+        """
+        with cls._pool_lock:
+            if cls._pool is not None:
+                cls._pool.cerrar_todas()
+                cls._pool = None
+    
+    @classmethod
+    def preparar_proceso_hijo(cls, db_path=None):
+        """
+        Prepara DatabaseConfig dentro de un proceso hijo (multiprocessing).
+        
+        Un proceso creado con fork hereda las conexiones del padre, pero
+        NO se pueden usar (ni cerrar) desde el hijo: SQLite podría liberar
+        los locks del padre. Acá simplemente las "olvidamos" y el hijo
+        abre las suyas la primera vez que las necesite.
+        
+        Args:
+            db_path (str, optional): Ruta de la DB que usa el proceso padre
+        """
+        cls._pool = None
+        cls._pool_lock = threading.Lock()
+        cls._tx_local = threading.local()
+        
+        if db_path:
+            cls.DB_PATH = Path(db_path)
+            cls.DB_DIR = cls.DB_PATH.parent
+        
+        # El padre ya le aplicó el esquema
+        cls._db_inicializada = cls.DB_PATH
+    
+    @classmethod
+    def version_datos(cls):
+        """
+        "Huella" de los datos: cambia cada vez que alguien escribe en la base.
+        
+        Sirve para caches: si la huella es la misma que cuando se calculó
+        algo, los datos no cambiaron y se puede reusar el resultado.
+        
+        Combina dos contadores de SQLite (cuesta una consulta trivial):
+        - PRAGMA data_version: cambia cuando OTRA conexión (otro hilo u
+          otro proceso) confirma cambios
+        - total_changes: filas modificadas por ESTA conexión
+        
+        Los dos contadores son de la conexión del hilo actual: la huella
+        solo se compara con otra tomada en el mismo hilo (por eso incluye
+        también qué conexión es).
+        
+        Returns:
+            tuple: (id de la conexión, data_version, total_changes)
+            
+        Ejemplo:
+            version = DatabaseConfig.version_datos()
+            ...
+            if DatabaseConfig.version_datos() != version:
+                print("Alguien escribió: recalcular")
+        """
+        conn = cls.obtener_pool().obtener()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        return (id(conn), data_version, conn.total_changes)
+    
+    @classmethod
+    def en_transaccion(cls):
+        """
+        Indica si el hilo actual está dentro de un bloque transaccion().
+        
+        Returns:
+            bool: True si hay una transacción abierta
+        """
+        return getattr(cls._tx_local, 'nivel', 0) > 0
+    
+    @classmethod
+    def al_terminar_transaccion(cls, funcion):
+        """
+        Llama a funcion() cuando termine la transacción del hilo actual.
+        
+        Se llama al terminar la transacción PRINCIPAL (la de más afuera),
+        haya confirmado o deshecho los cambios. Sin transacción abierta,
+        se llama en el acto. Sirve para caches: descartar un dato recién
+        cuando los demás hilos ya pueden ver el valor nuevo.
+        
+        Args:
+            funcion (callable): Función sin argumentos
+            
+        Ejemplo:
+            with DatabaseConfig.transaccion():
+                ...
+                DatabaseConfig.al_terminar_transaccion(Referencia.cache.invalidar)
+            # Acá se llama (después del commit)
+        """
+        if not cls.en_transaccion():
+            funcion()
+            return
+        cls._tx_local.al_terminar.append(funcion)
+    
+    @classmethod
+    @contextmanager
+    def transaccion(cls):
+        """
+        Agrupa varias queries en UNA sola transacción (un solo commit).
+        
+        ¿Por qué? Cada commit obliga a SQLite a escribir en disco (fsync).
+        Si generamos una planilla con 300 cheques, antes eran cientos de
+        commits; dentro de este bloque es uno solo. Además es todo o nada:
+        si algo falla a la mitad (ej: se agota un rango), se deshace TODO.
+        
+        Se puede anidar: si un modelo abre una transacción y ya hay una
+        abierta, se "une" a la existente usando un SAVEPOINT. Si el bloque
+        interno falla, solo se deshace lo suyo y el error sigue subiendo.
+        
+        Yields:
+            sqlite3.Connection: La conexión del hilo (para executemany, etc.)
+            
+        Ejemplo:
+            with DatabaseConfig.transaccion():
+                planilla = Planilla.crear(ref_id, "001", "123")
+                planilla.agregar_item(...)
+                planilla.agregar_item(...)
+            # Acá se hace el commit (o el rollback si hubo error)
+        """
+        conn = cls.obtener_pool().obtener()
+        nivel = getattr(cls._tx_local, 'nivel', 0)
+        
+        if nivel == 0:
+            # Transacción principal. IMMEDIATE toma el lock de escritura
+            # desde el inicio: así dos procesos no leen el mismo contador
+            # y después se pisan al escribirlo.
+            conn.execute("BEGIN IMMEDIATE")
+            cls._tx_local.nivel = 1
+            cls._tx_local.al_terminar = []
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                cls._tx_local.nivel = 0
+                pendientes, cls._tx_local.al_terminar = cls._tx_local.al_terminar, []
+                for funcion in pendientes:
+                    funcion()
+        else:
+            # Transacción anidada: se une a la principal con un SAVEPOINT
+            savepoint = f"sp_nivel_{nivel}"
+            conn.execute(f"SAVEPOINT {savepoint}")
+            cls._tx_local.nivel = nivel + 1
+            try:
+                yield conn
+                conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+            except BaseException:
+                conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+                raise
+            finally:
+                cls._tx_local.nivel = nivel
+    
+    @classmethod
+    def ejecutar_query(cls, query, params=None, fetch_one=False, fetch_all=False, clase=None):
         """
         Ejecuta una query SQL y maneja automáticamente la conexión.
         
-        Este es un método de conveniencia que abre la conexión,
-        ejecuta la query y la cierra automáticamente.
+        Este es un método de conveniencia que toma la conexión del hilo
+        desde el pool, ejecuta la query y la deja abierta para la próxima.
+        
+        Si se llama dentro de DatabaseConfig.transaccion(), NO hace commit:
+        se suma a la transacción en curso.
         
         Args:
             query (str): La consulta SQL a ejecutar
             params (tuple): Parámetros para la query (evita SQL injection)
             fetch_one (bool): Si True, retorna solo un resultado
             fetch_all (bool): Si True, retorna todos los resultados
+            clase (type, optional): Si se indica, las filas se devuelven ya
+                convertidas en objetos de esa clase (ver fabrica_filas)
             
         Returns:
-            Si fetch_one=True: Una fila o None
-            Si fetch_all=True: Lista de filas
+            Si fetch_one=True: Una fila (u objeto) o None
+            Si fetch_all=True: Lista de filas (u objetos)
             Si ninguno: cursor.lastrowid (útil para INSERT)
             
         Ejemplo:
@@ -140,8 +850,16 @@ class DatabaseConfig:
                 "SELECT * FROM referencias",
                 fetch_all=True
             )
+            
+            # SELECT ALL como objetos
+            todas = DatabaseConfig.ejecutar_query(
+                "SELECT * FROM referencias",
+                fetch_all=True,
+                clase=Referencia
+            )
         """
-        conn = cls.get_connection()
+        pool = cls.obtener_pool()
+        conn = pool.obtener()
         cursor = conn.cursor()
         
         try:
@@ -152,9 +870,13 @@ class DatabaseConfig:
                 cursor.execute(query)
             
             # Commit si es INSERT, UPDATE o DELETE
-            if query.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
+            # (dentro de transaccion() el commit lo hace el bloque al final)
+            if es_escritura(query) and not cls.en_transaccion():
                 conn.commit()
             
+            if clase is not None and cursor.description is not None:
+                cls._usar_fabrica(cursor, clase)
+            
             # Retornar según lo solicitado
             if fetch_one:
                 return cursor.fetchone()
@@ -165,13 +887,280 @@ class DatabaseConfig:
                 return cursor.lastrowid
                 
         except Exception as e:
-            conn.rollback()
+            # Dentro de transaccion() el rollback lo decide el bloque
+            if not cls.en_transaccion():
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    # La conexión quedó inutilizable: abrir otra la próxima vez
+                    pool.descartar_actual()
             print(f"❌ Error en query: {e}")
             print(f"Query: {query}")
             print(f"Params: {params}")
             raise
         finally:
-            conn.close()
+            # Cerramos el cursor (libera locks de lectura), NO la conexión
+            cursor.close()
+    
+    @classmethod
+    def iterar_query(cls, query, params=None, tamano_lote=500, clase=None):
+        """
+        Recorre el resultado de un SELECT sin cargarlo entero en memoria.
+        
+        A diferencia de ejecutar_query(fetch_all=True), que arma una lista
+        con TODAS las filas, esto es un generador: trae las filas de a
+        `tamano_lote` y las entrega una por una. La memoria usada es
+        constante aunque la consulta devuelva cientos de miles de filas.
+        
+        Args:
+            query (str): La consulta SQL (SELECT)
+            params (tuple): Parámetros para la query
+            tamano_lote (int): Cuántas filas pedir a SQLite por vez
+            clase (type, optional): Entregar objetos de esa clase en vez
+                de filas (ver fabrica_filas)
+            
+        Yields:
+            sqlite3.Row (u objeto de `clase`): Una fila por vez
+            
+        Ejemplo:
+            for fila in DatabaseConfig.iterar_query(
+                    "SELECT * FROM items_planilla WHERE planilla_id = ?", (5,)):
+                print(fila['beneficiario'])
+        """
+        conn = cls.obtener_pool().obtener()
+        cursor = conn.cursor()
+        
+        try:
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            if clase is not None:
+                cls._usar_fabrica(cursor, clase)
+            
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    break
+                yield from filas
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def _usar_fabrica(cursor, clase):
+        """
+        Hace que el cursor entregue objetos de `clase` en vez de sqlite3.Row.
+        
+        El row_factory del cursor se aplica al leer cada fila (fetch), así
+        que se puede cambiar después de execute(), cuando ya se conocen las
+        columnas. La fila llega como tupla: no se arma ningún sqlite3.Row.
+        """
+        desde_fila = fabrica_filas(clase, [columna[0] for columna in cursor.description])
+        cursor.row_factory = lambda _cursor, fila: desde_fila(fila)
+    
+    @staticmethod
+    def cursor_keyset(despues_de):
+        """
+        Normaliza el parámetro despues_de de los métodos obtener_pagina().
+        
+        Paginación por "keyset": en vez de LIMIT/OFFSET (que obliga a SQLite
+        a recorrer y descartar todas las filas anteriores), cada página
+        empieza justo después de la última fila de la página anterior:
+        
+            WHERE (fecha_creacion, id) < (?, ?)
+            ORDER BY fecha_creacion DESC, id DESC
+            LIMIT ?
+        
+        Con un índice sobre fecha_creacion cada página cuesta lo mismo,
+        sea la primera o la número mil. El id desempata las filas creadas
+        en el mismo segundo.
+        
+        Args:
+            despues_de: None (primera página), el último objeto de la página
+                anterior (con .fecha_creacion y .id) o una tupla
+                (fecha_creacion, id)
+                
+        Returns:
+            tuple or None: (fecha_creacion, id) o None
+        """
+        if despues_de is None:
+            return None
+        if isinstance(despues_de, (tuple, list)):
+            return tuple(despues_de)
+        return (despues_de.fecha_creacion, despues_de.id)
+    
+    @staticmethod
+    def iterar_paginas(obtener_pagina, tamano_pagina=500):
+        """
+        Recorre una tabla entera de a páginas, como un generador.
+        
+        Pide una página, entrega sus objetos uno por uno y recién entonces
+        pide la siguiente (a partir del último objeto entregado). En memoria
+        hay una sola página por vez.
+        
+        A diferencia de iterar_query(), no deja un cursor abierto entre
+        página y página: se puede escribir en la base mientras se recorre.
+        
+        Args:
+            obtener_pagina (callable): obtener_pagina(despues_de, limite) → list
+            tamano_pagina (int): Filas por consulta
+            
+        Yields:
+            object: Un objeto por vez
+            
+        Ejemplo:
+            for ref in DatabaseConfig.iterar_paginas(
+                    lambda despues_de, limite: Referencia.obtener_pagina(
+                        despues_de=despues_de, limite=limite)):
+                print(ref.codigo)
+        """
+        despues_de = None
+        
+        while True:
+            pagina = obtener_pagina(despues_de, tamano_pagina)
+            yield from pagina
+            
+            if len(pagina) < tamano_pagina:
+                return
+            despues_de = pagina[-1]
+    
+    @classmethod
+    def ejecutar_muchos(cls, query, lista_params):
+        """
+        Ejecuta la misma query con muchos juegos de parámetros (executemany).
+        
+        Es mucho más rápido que llamar a ejecutar_query() en un for:
+        SQLite prepara la sentencia una sola vez y hay un solo commit.
+        
+        Args:
+            query (str): La sentencia SQL (INSERT, UPDATE o DELETE)
+            lista_params (list): Lista de tuplas de parámetros
+            
+        Returns:
+            int: Cantidad de filas afectadas
+            
+        Ejemplo:
+            DatabaseConfig.ejecutar_muchos(
+                "INSERT INTO referencias (codigo) VALUES (?)",
+                [("LABSEM0000001",), ("LABSEM0000002",)]
+            )
+        """
+        pool = cls.obtener_pool()
+        conn = pool.obtener()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany(query, lista_params)
+            
+            # Igual que ejecutar_query: dentro de transaccion() no hay commit
+            if not cls.en_transaccion():
+                conn.commit()
+            
+            return cursor.rowcount
+            
+        except Exception as e:
+            if not cls.en_transaccion():
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pool.descartar_actual()
+            print(f"❌ Error en query: {e}")
+            print(f"Query: {query}")
+            raise
+        finally:
+            cursor.close()
+    
+    @classmethod
+    def siguiente_valor(cls, nombre):
+        """
+        Incrementa un contador y devuelve el nuevo valor (de forma atómica).
+        
+        Los contadores viven en la tabla secuencias (nombre, ultimo).
+        Ver reservar_valores().
+        
+        Args:
+            nombre (str): Nombre del contador (Ej: 'planilla')
+            
+        Returns:
+            int: El número asignado (1 la primera vez)
+            
+        Ejemplo:
+            numero = DatabaseConfig.siguiente_valor('planilla')
+        """
+        return cls.reservar_valores(nombre, 1)[0]
+    
+    @classmethod
+    def reservar_valores(cls, nombre, cantidad, tabla='secuencias', columna='nombre',
+                         maximo=None):
+        """
+        Reserva N números consecutivos de un contador en UNA sentencia.
+        
+        Leer el contador, usarlo y después guardarlo +1 son tres pasos:
+        entre el primero y el último otro hilo/proceso puede leer el mismo
+        valor (números repetidos). Acá se incrementa y se lee a la vez:
+        
+            INSERT INTO secuencias (nombre, ultimo) VALUES ('planilla', N)
+            ON CONFLICT(nombre) DO UPDATE SET ultimo = ultimo + N
+            RETURNING ultimo
+        
+        Si el contador no existe se crea (empieza en 1). Los números
+        reservados que no se usen quedan salteados. Dentro de una
+        transaccion() la reserva se deshace junto con ella.
+        
+        Args:
+            nombre (str): Nombre del contador
+            cantidad (int): Cuántos números reservar
+            tabla (str, optional): Tabla de contadores. Defaults to 'secuencias'.
+                Cualquier tabla (clave PRIMARY KEY, ultimo INTEGER), ej:
+                secuencias_referencia (un contador por prefijo).
+            columna (str, optional): Columna clave de la tabla. Defaults to 'nombre'.
+            maximo (int, optional): Último número permitido. Si la reserva
+                lo supera, no se reserva nada.
+            
+        Returns:
+            range: Los números reservados (Ej: range(41, 51) para 10)
+            
+        Raises:
+            ValueError: Si cantidad < 1 o se supera el máximo
+            
+        Ejemplo:
+            # 50 planillas de una vez: un solo UPDATE en vez de 50
+            for numero in DatabaseConfig.reservar_valores('planilla', 50):
+                ...
+        """
+        if cantidad < 1:
+            raise ValueError("La cantidad a reservar debe ser al menos 1")
+        
+        query = f"""
+            INSERT INTO {tabla} ({columna}, ultimo) VALUES (?, ?)
+            ON CONFLICT({columna}) DO UPDATE SET ultimo = ultimo + excluded.ultimo
+            RETURNING ultimo
+        """
+        
+        # En una transacción: el commit recién después de leer el RETURNING
+        with cls.transaccion():
+            ultimo = cls.ejecutar_query(query, params=(nombre, cantidad), fetch_one=True)[0]
+            
+            if maximo is not None and ultimo > maximo:
+                raise ValueError(f"El contador '{nombre}' no tiene más números disponibles")
+        
+        return range(ultimo - cantidad + 1, ultimo + 1)
+    
+    @classmethod
+    def valor_secuencia(cls, nombre, tabla='secuencias', columna='nombre'):
+        """
+        Último número entregado por un contador (sin reservar nada).
+        
+        Returns:
+            int: El último valor (0 si el contador nunca se usó)
+        """
+        fila = cls.ejecutar_query(
+            f"SELECT ultimo FROM {tabla} WHERE {columna} = ?",
+            params=(nombre,),
+            fetch_one=True
+        )
+        return fila[0] if fila else 0
 
 
 # ============================================================================
@@ -185,10 +1174,23 @@ def resetear_base_datos():
     
     Útil para desarrollo y testing.
     """
+    # Cerrar las conexiones abiertas antes de borrar el archivo
+    DatabaseConfig.cerrar_conexiones()
+    
+    # Los objetos en cache son de la base vieja (y los ids se reusan)
+    from config.mapa_identidad import invalidar_todos
+    invalidar_todos()
+    
     if DatabaseConfig.DB_PATH.exists():
         DatabaseConfig.DB_PATH.unlink()  # Eliminar archivo
         print("🗑️  Base de datos eliminada")
     
+    # Archivos auxiliares del modo WAL
+    for sufijo in ('-wal', '-shm'):
+        auxiliar = DatabaseConfig.DB_PATH.with_name(DatabaseConfig.DB_PATH.name + sufijo)
+        if auxiliar.exists():
+            auxiliar.unlink()
+    
     DatabaseConfig.inicializar_db()
     print("✅ Base de datos recreada")
 
@@ -220,10 +1222,3 @@ def verificar_integridad_db():
     except Exception as e:
         print(f"❌ Error al verificar integridad: {e}")
         return False
-
-
-# ============================================================================
-# CÓDIGO QUE SE EJECUTA AL IMPORTAR ESTE MÓDULO
-# ============================================================================
-# Cuando importemos este archivo, automáticamente inicializará la DB
-DatabaseConfig.inicializar_db()
\ No newline at end of file
@@ -0,0 +1,228 @@
+"""
+============================================================================
+CONFIG - MAPA DE IDENTIDAD (CACHE DE OBJETOS POR ID)
+============================================================================
+Algunas entidades se leen mucho y cambian poco: una planilla pide su
+Referencia cada vez que se genera o se muestra, Planilla.crear() la lee
+solo para ver que exista, los contactos se abren una y otra vez...
+
+Un MapaIdentidad guarda los objetos ya leídos, por id:
+
+- Mientras el objeto esté en el mapa, obtener_por_id() lo devuelve sin
+  consultar la base, y siempre es LA MISMA instancia.
+- Por eso el objeto es COMPARTIDO: si alguien le cambia un atributo, lo
+  ven todos los que lo pidieron. Se modifica solo para guardarlo enseguida
+  con actualizar() (que lo saca del mapa, aunque falle); nunca para hacer
+  cuentas "de prueba" sobre él.
+- Tiene un tamaño máximo: al llenarse se descarta el que hace más tiempo
+  que nadie pide (LRU, "least recently used").
+- Los modelos lo invalidan al escribir (actualizar, desactivar, eliminar).
+  Si la escritura está dentro de una transaccion(), se vuelve a invalidar
+  al terminar, para que otro hilo no guarde el valor viejo mientras tanto.
+- Lo que escriben OTRAS conexiones (otro proceso, SQL directo) se detecta
+  con PRAGMA data_version, como en ConfiguracionService: se mira cada
+  INTERVALO_VERIFICACION segundos y si cambió, se vacía el mapa.
+
+Los contadores (aciertos, fallos, desalojos) sirven para ajustar la
+capacidad: ver estadisticas_caches().
+
+CONCEPTOS CLAVE:
+- Identity map: una sola instancia en memoria por fila de la base
+- LRU: se desaloja lo menos usado recientemente (OrderedDict lo hace
+  barato: move_to_end() al usar, popitem(last=False) al desalojar)
+============================================================================
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from config.database import DatabaseConfig
+
+
+# Todos los mapas creados (para estadisticas_caches e invalidar_todos)
+_mapas = []
+
+
+class MapaIdentidad:
+    """Cache LRU de objetos de un modelo, por id"""
+
+    CAPACIDAD = 256
+
+    # Cada cuántos segundos se mira si otra conexión escribió
+    INTERVALO_VERIFICACION = 1.0
+
+    def __init__(self, nombre, capacidad=None):
+        """
+        Args:
+            nombre (str): Para las estadísticas (ej: 'referencias')
+            capacidad (int, optional): Máximo de objetos. Defaults to CAPACIDAD.
+        """
+        self.nombre = nombre
+        self.capacidad = capacidad or self.CAPACIDAD
+
+        self._objetos = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Cambia con cada invalidación: una lectura que empezó antes no
+        # guarda su resultado (podría ser el valor viejo)
+        self._generacion = 0
+
+        # Por hilo: (conexión, data_version) que vio y cuándo lo miró
+        self._hilo = threading.local()
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+        _mapas.append(self)
+
+    # ========================================================================
+    # LECTURA
+    # ========================================================================
+
+    def obtener(self, id, cargar):
+        """
+        Devuelve el objeto con ese id, del mapa o cargándolo de la base.
+
+        Args:
+            id: Clave del objeto (el id de la fila)
+            cargar (callable): cargar() → objeto o None. Se llama solo si
+                el objeto no está en el mapa.
+
+        Returns:
+            El objeto, o None si cargar() devolvió None (no se guarda:
+            la fila puede crearse después). Es el objeto del mapa, no una
+            copia: no modificarlo sin guardarlo (ver arriba).
+
+        Ejemplo:
+            return cls.cache.obtener(id, lambda: cls._leer_por_id(id))
+        """
+        self._verificar_otras_conexiones()
+
+        with self._lock:
+            objeto = self._objetos.get(id)
+            if objeto is not None:
+                self._objetos.move_to_end(id)
+                self.aciertos += 1
+                return objeto
+            self.fallos += 1
+            generacion = self._generacion
+
+        objeto = cargar()
+
+        # Dentro de una transacción lo leído puede no llegar a confirmarse
+        if objeto is None or DatabaseConfig.en_transaccion():
+            return objeto
+
+        with self._lock:
+            if self._generacion != generacion:
+                return objeto
+
+            # Si otro hilo lo cargó mientras tanto, vale el primero
+            existente = self._objetos.get(id)
+            if existente is not None:
+                return existente
+
+            self._objetos[id] = objeto
+            if len(self._objetos) > self.capacidad:
+                self._objetos.popitem(last=False)
+                self.desalojos += 1
+            return objeto
+
+    # ========================================================================
+    # INVALIDACIÓN
+    # ========================================================================
+
+    def invalidar(self, id=None):
+        """
+        Saca un objeto del mapa (o todos). Llamar después de escribirlo.
+
+        Args:
+            id (optional): Objeto a sacar. None = vaciar el mapa.
+        """
+        self._descartar(id)
+        if DatabaseConfig.en_transaccion():
+            DatabaseConfig.al_terminar_transaccion(lambda: self._descartar(id))
+
+    def _descartar(self, id):
+        """Saca el objeto (o todos) y cancela las lecturas en curso"""
+        with self._lock:
+            self._generacion += 1
+            if id is None:
+                self._objetos.clear()
+            else:
+                self._objetos.pop(id, None)
+
+    def _verificar_otras_conexiones(self):
+        """Vacía el mapa si otra conexión escribió desde la última vez"""
+        ahora = time.monotonic()
+        verificado = getattr(self._hilo, 'verificado', None)
+        if verificado is not None and ahora - verificado < self.INTERVALO_VERIFICACION:
+            return
+
+        conn = DatabaseConfig.obtener_pool().obtener()
+        version = (id(conn), conn.execute("PRAGMA data_version").fetchone()[0])
+        if getattr(self._hilo, 'version', None) != version:
+            self._descartar(None)
+        self._hilo.version = version
+        self._hilo.verificado = ahora
+
+    # ========================================================================
+    # ESTADÍSTICAS
+    # ========================================================================
+
+    def estadisticas(self):
+        """
+        Contadores para ajustar la capacidad.
+
+        Muchos desalojos con pocos aciertos = capacidad chica.
+
+        Returns:
+            dict: nombre, tamano, capacidad, aciertos, fallos, desalojos
+                y tasa_aciertos (0 a 1)
+        """
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'nombre': self.nombre,
+                'tamano': len(self._objetos),
+                'capacidad': self.capacidad,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+            }
+
+    def reiniciar_estadisticas(self):
+        """Pone los contadores en cero (el contenido del mapa no cambia)"""
+        with self._lock:
+            self.aciertos = self.fallos = self.desalojos = 0
+
+    def __len__(self):
+        """Cantidad de objetos en el mapa"""
+        return len(self._objetos)
+
+
+# ============================================================================
+# FUNCIONES DE UTILIDAD
+# ============================================================================
+
+def estadisticas_caches():
+    """
+    Estadísticas de todos los mapas de identidad.
+
+    Returns:
+        list: Un dict por mapa (ver MapaIdentidad.estadisticas)
+
+    Ejemplo:
+        for e in estadisticas_caches():
+            print(f"{e['nombre']}: {e['tasa_aciertos']:.0%} de aciertos")
+    """
+    return [mapa.estadisticas() for mapa in _mapas]
+
+
+def invalidar_todos():
+    """Vacía todos los mapas (ej: al resetear la base)"""
+    for mapa in _mapas:
+        mapa.invalidar()
@@ -19,6 +19,45 @@ CREATE TABLE IF NOT EXISTS referencias (
 
 -- Índice para búsquedas rápidas por código
 CREATE INDEX IF NOT EXISTS idx_referencias_codigo ON referencias(codigo);
+-- Orden de los listados y paginación por (fecha_creacion, id)
+-- (SQLite agrega el id al final de todo índice: no hace falta nombrarlo)
+CREATE INDEX IF NOT EXISTS idx_referencias_fecha ON referencias(fecha_creacion);
+
+
+-- ============================================================================
+-- TABLA: secuencias_referencia
+-- Propósito: Último número usado por cada prefijo de referencia
+-- ============================================================================
+-- Antes el siguiente código salía de buscar el mayor con LIKE 'PREFX%'
+-- (que según el case_sensitive_like puede no usar el índice) y sumarle 1:
+-- dos usuarios a la vez podían obtener el mismo número. Acá hay UNA fila
+-- por prefijo y se reserva con un solo UPDATE ... RETURNING (atómico).
+-- WITHOUT ROWID: la tabla ES el índice por prefijo.
+
+CREATE TABLE IF NOT EXISTS secuencias_referencia (
+    prefijo TEXT PRIMARY KEY,              -- 5 letras (Ej: LABSE)
+    ultimo INTEGER NOT NULL DEFAULT 0      -- Último número reservado/usado
+) WITHOUT ROWID;
+
+-- Un código cargado "a mano" (Referencia.crear con el código completo)
+-- también mueve el contador, para que no se vuelva a entregar
+CREATE TRIGGER IF NOT EXISTS trg_referencias_secuencia
+AFTER INSERT ON referencias
+WHEN length(NEW.codigo) = 12
+BEGIN
+    INSERT INTO secuencias_referencia (prefijo, ultimo)
+    VALUES (substr(NEW.codigo, 1, 5), CAST(substr(NEW.codigo, 6) AS INTEGER))
+    ON CONFLICT(prefijo) DO UPDATE SET ultimo = MAX(ultimo, excluded.ultimo);
+END;
+
+-- Migración: contadores a partir de las referencias que ya existían.
+-- Nunca baja un contador, así que correrlo en cada inicio no cambia nada.
+INSERT INTO secuencias_referencia (prefijo, ultimo)
+SELECT substr(codigo, 1, 5), MAX(CAST(substr(codigo, 6) AS INTEGER))
+FROM referencias
+WHERE length(codigo) = 12
+GROUP BY substr(codigo, 1, 5)
+ON CONFLICT(prefijo) DO UPDATE SET ultimo = MAX(ultimo, excluded.ultimo);
 
 
 -- ============================================================================
@@ -81,6 +120,7 @@ CREATE TABLE IF NOT EXISTS cheques_emitidos (
 CREATE INDEX IF NOT EXISTS idx_cheques_numero ON cheques_emitidos(numero_cheque);
 CREATE INDEX IF NOT EXISTS idx_cheques_estado ON cheques_emitidos(estado);
 CREATE INDEX IF NOT EXISTS idx_cheques_planilla ON cheques_emitidos(planilla_id);
+CREATE INDEX IF NOT EXISTS idx_cheques_fecha ON cheques_emitidos(fecha_creacion);
 
 
 -- ============================================================================
@@ -99,6 +139,7 @@ CREATE TABLE IF NOT EXISTS agenda_cheques (
 -- Índice para búsquedas por nombre o CUIT
 CREATE INDEX IF NOT EXISTS idx_agenda_cheques_cuit ON agenda_cheques(cuit);
 CREATE INDEX IF NOT EXISTS idx_agenda_cheques_nombre ON agenda_cheques(nombre);
+CREATE INDEX IF NOT EXISTS idx_agenda_cheques_fecha ON agenda_cheques(fecha_creacion);
 
 
 -- ============================================================================
@@ -121,6 +162,7 @@ CREATE TABLE IF NOT EXISTS agenda_transferencias (
 -- Índices para búsquedas rápidas
 CREATE INDEX IF NOT EXISTS idx_agenda_trans_cuit ON agenda_transferencias(cuit);
 CREATE INDEX IF NOT EXISTS idx_agenda_trans_nombre ON agenda_transferencias(nombre);
+CREATE INDEX IF NOT EXISTS idx_agenda_trans_fecha ON agenda_transferencias(fecha_creacion);
 
 
 -- ============================================================================
@@ -142,6 +184,13 @@ CREATE TABLE IF NOT EXISTS planillas (
     -- 'descargada': Usuario descargó el archivo
     estado TEXT DEFAULT 'borrador',
     
+    -- Totales de los items, mantenidos por los triggers trg_items_totales_*
+    -- (no se escriben a mano; Planilla.recalcular_agregados() los repara)
+    cantidad_items INTEGER NOT NULL DEFAULT 0,
+    total_importe DECIMAL(12,2) NOT NULL DEFAULT 0,
+    total_cheques DECIMAL(12,2) NOT NULL DEFAULT 0,         -- Modalidad 6 y 8
+    total_transferencias DECIMAL(12,2) NOT NULL DEFAULT 0,  -- Modalidad 2 y 4
+    
     -- Relación con referencias
     FOREIGN KEY (referencia_id) REFERENCES referencias(id)
 );
@@ -202,10 +251,37 @@ CREATE TABLE IF NOT EXISTS configuracion (
 INSERT OR IGNORE INTO configuracion (clave, valor, descripcion) VALUES
     ('sucursal_default', '', 'Sucursal bancaria por defecto'),
     ('cuenta_debito_default', '', 'Cuenta de débito por defecto'),
-    ('proximo_numero_planilla', '1', 'Próximo número de planilla a asignar'),
     ('version_db', '1.0', 'Versión del esquema de base de datos');
 
 
+-- ============================================================================
+-- TABLA: secuencias
+-- Propósito: Contadores de la aplicación (número de planilla, etc.)
+-- ============================================================================
+-- Se usan con DatabaseConfig.siguiente_valor() / reservar_valores(): un
+-- solo INSERT ... ON CONFLICT DO UPDATE ... RETURNING incrementa y
+-- devuelve el valor, sin leer-y-después-escribir (números repetidos).
+
+CREATE TABLE IF NOT EXISTS secuencias (
+    nombre TEXT PRIMARY KEY,               -- Ej: 'planilla'
+    ultimo INTEGER NOT NULL DEFAULT 0      -- Último número entregado
+) WITHOUT ROWID;
+
+-- Migración: el número de planilla estaba en configuracion como TEXT
+-- ('proximo_numero_planilla' = el SIGUIENTE a usar). Se toma ese valor
+-- menos 1, o el mayor número ya usado si es más alto, y se borra la clave.
+INSERT INTO secuencias (nombre, ultimo)
+SELECT 'planilla', MAX(
+    COALESCE((SELECT CAST(valor AS INTEGER) - 1 FROM configuracion
+              WHERE clave = 'proximo_numero_planilla'), 0),
+    COALESCE((SELECT MAX(numero_planilla) FROM planillas), 0)
+)
+WHERE true
+ON CONFLICT(nombre) DO UPDATE SET ultimo = MAX(ultimo, excluded.ultimo);
+
+DELETE FROM configuracion WHERE clave = 'proximo_numero_planilla';
+
+
 -- ============================================================================
 -- VISTAS ÚTILES (Consultas pre-armadas para facilitar el trabajo)
 -- ============================================================================
@@ -231,7 +307,11 @@ ORDER BY r.tipo, r.numero_orden;
 
 
 -- Vista: Planillas con información completa
-CREATE VIEW IF NOT EXISTS v_planillas_completas AS
+-- Los totales ya están en planillas (ver triggers trg_items_totales_*):
+-- no hace falta recorrer items_planilla.
+-- DROP + CREATE para que las bases existentes tomen la versión nueva
+DROP VIEW IF EXISTS v_planillas_completas;
+CREATE VIEW v_planillas_completas AS
 SELECT 
     p.id,
     p.numero_planilla,
@@ -241,14 +321,12 @@ SELECT
     p.cuenta_debito,
     p.estado,
     p.fecha_creacion,
-    -- Contar items en la planilla
-    COUNT(i.id) as cantidad_items,
-    -- Sumar total de importes
-    COALESCE(SUM(i.importe), 0) as total_importe
+    p.cantidad_items,
+    p.total_importe,
+    p.total_cheques,
+    p.total_transferencias
 FROM planillas p
-JOIN referencias r ON p.referencia_id = r.id
-LEFT JOIN items_planilla i ON p.id = i.planilla_id
-GROUP BY p.id;
+JOIN referencias r ON p.referencia_id = r.id;
 
 
 -- ============================================================================
@@ -265,6 +343,152 @@ BEGIN
 END;
 
 
+-- Triggers: Totales de la planilla (cantidad_items, total_importe,
+-- total_cheques, total_transferencias) al insertar, modificar o borrar items.
+-- Cada cambio en items_planilla suma o resta solo esa fila: mantener los
+-- totales cuesta O(1) por item, leerlos también.
+-- ROUND(..., 2) evita que se acumule error de punto flotante.
+CREATE TRIGGER IF NOT EXISTS trg_items_totales_insert
+AFTER INSERT ON items_planilla
+BEGIN
+    UPDATE planillas SET
+        cantidad_items = cantidad_items + 1,
+        total_importe = ROUND(total_importe + COALESCE(NEW.importe, 0), 2),
+        total_cheques = ROUND(total_cheques +
+            CASE WHEN NEW.modalidad_pago IN (6, 8) THEN COALESCE(NEW.importe, 0) ELSE 0 END, 2),
+        total_transferencias = ROUND(total_transferencias +
+            CASE WHEN NEW.modalidad_pago IN (2, 4) THEN COALESCE(NEW.importe, 0) ELSE 0 END, 2)
+    WHERE id = NEW.planilla_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_items_totales_delete
+AFTER DELETE ON items_planilla
+BEGIN
+    UPDATE planillas SET
+        cantidad_items = cantidad_items - 1,
+        total_importe = ROUND(total_importe - COALESCE(OLD.importe, 0), 2),
+        total_cheques = ROUND(total_cheques -
+            CASE WHEN OLD.modalidad_pago IN (6, 8) THEN COALESCE(OLD.importe, 0) ELSE 0 END, 2),
+        total_transferencias = ROUND(total_transferencias -
+            CASE WHEN OLD.modalidad_pago IN (2, 4) THEN COALESCE(OLD.importe, 0) ELSE 0 END, 2)
+    WHERE id = OLD.planilla_id;
+END;
+
+-- Al modificar: restar la fila vieja y sumar la nueva (puede cambiar de planilla)
+CREATE TRIGGER IF NOT EXISTS trg_items_totales_update
+AFTER UPDATE OF planilla_id, importe, modalidad_pago ON items_planilla
+BEGIN
+    UPDATE planillas SET
+        cantidad_items = cantidad_items - 1,
+        total_importe = ROUND(total_importe - COALESCE(OLD.importe, 0), 2),
+        total_cheques = ROUND(total_cheques -
+            CASE WHEN OLD.modalidad_pago IN (6, 8) THEN COALESCE(OLD.importe, 0) ELSE 0 END, 2),
+        total_transferencias = ROUND(total_transferencias -
+            CASE WHEN OLD.modalidad_pago IN (2, 4) THEN COALESCE(OLD.importe, 0) ELSE 0 END, 2)
+    WHERE id = OLD.planilla_id;
+    
+    UPDATE planillas SET
+        cantidad_items = cantidad_items + 1,
+        total_importe = ROUND(total_importe + COALESCE(NEW.importe, 0), 2),
+        total_cheques = ROUND(total_cheques +
+            CASE WHEN NEW.modalidad_pago IN (6, 8) THEN COALESCE(NEW.importe, 0) ELSE 0 END, 2),
+        total_transferencias = ROUND(total_transferencias +
+            CASE WHEN NEW.modalidad_pago IN (2, 4) THEN COALESCE(NEW.importe, 0) ELSE 0 END, 2)
+    WHERE id = NEW.planilla_id;
+END;
+
+
+-- ============================================================================
+-- BÚSQUEDA DE TEXTO COMPLETO (FTS5) EN LAS AGENDAS
+-- ============================================================================
+-- Buscar con LIKE '%texto%' obliga a SQLite a leer TODA la tabla (no puede
+-- usar los índices). FTS5 arma un índice de palabras que permite buscar
+-- por prefijo ("gonz" encuentra "González") y ordenar por relevancia (bm25).
+--
+-- - remove_diacritics 2: ignora acentos ("gonzalez" encuentra "González")
+-- - prefix '2 3': índices extra para que las búsquedas por prefijo sean rápidas
+-- - CUIT y CBU se indexan SIN guiones ni espacios, como un solo "token"
+-- - El rowid de cada fila FTS es el id del contacto
+
+CREATE VIRTUAL TABLE IF NOT EXISTS agenda_cheques_fts USING fts5(
+    nombre,
+    cuit,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS agenda_transferencias_fts USING fts5(
+    nombre,
+    cuit,
+    cbu,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+-- Triggers: mantienen el índice sincronizado con las tablas de agenda
+
+CREATE TRIGGER IF NOT EXISTS trg_agenda_cheques_fts_insert
+AFTER INSERT ON agenda_cheques
+BEGIN
+    INSERT INTO agenda_cheques_fts (rowid, nombre, cuit)
+    VALUES (NEW.id, NEW.nombre, REPLACE(REPLACE(NEW.cuit, '-', ''), ' ', ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_agenda_cheques_fts_update
+AFTER UPDATE OF nombre, cuit ON agenda_cheques
+BEGIN
+    UPDATE agenda_cheques_fts
+    SET nombre = NEW.nombre,
+        cuit = REPLACE(REPLACE(NEW.cuit, '-', ''), ' ', '')
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_agenda_cheques_fts_delete
+AFTER DELETE ON agenda_cheques
+BEGIN
+    DELETE FROM agenda_cheques_fts WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_agenda_trans_fts_insert
+AFTER INSERT ON agenda_transferencias
+BEGIN
+    INSERT INTO agenda_transferencias_fts (rowid, nombre, cuit, cbu)
+    VALUES (NEW.id, NEW.nombre,
+            REPLACE(REPLACE(NEW.cuit, '-', ''), ' ', ''),
+            REPLACE(REPLACE(NEW.cbu, '-', ''), ' ', ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_agenda_trans_fts_update
+AFTER UPDATE OF nombre, cuit, cbu ON agenda_transferencias
+BEGIN
+    UPDATE agenda_transferencias_fts
+    SET nombre = NEW.nombre,
+        cuit = REPLACE(REPLACE(NEW.cuit, '-', ''), ' ', ''),
+        cbu = REPLACE(REPLACE(NEW.cbu, '-', ''), ' ', '')
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_agenda_trans_fts_delete
+AFTER DELETE ON agenda_transferencias
+BEGIN
+    DELETE FROM agenda_transferencias_fts WHERE rowid = OLD.id;
+END;
+
+-- Migración: indexar los contactos que existían antes de crear el índice.
+-- Solo inserta los que faltan, así que correrlo en cada inicio no duplica nada.
+INSERT INTO agenda_cheques_fts (rowid, nombre, cuit)
+SELECT id, nombre, REPLACE(REPLACE(cuit, '-', ''), ' ', '')
+FROM agenda_cheques
+WHERE id NOT IN (SELECT rowid FROM agenda_cheques_fts);
+
+INSERT INTO agenda_transferencias_fts (rowid, nombre, cuit, cbu)
+SELECT id, nombre,
+       REPLACE(REPLACE(cuit, '-', ''), ' ', ''),
+       REPLACE(REPLACE(cbu, '-', ''), ' ', '')
+FROM agenda_transferencias
+WHERE id NOT IN (SELECT rowid FROM agenda_transferencias_fts);
+
+
 -- ============================================================================
 -- FIN DEL ESQUEMA
 -- ============================================================================
\ No newline at end of file
@@ -8,6 +8,7 @@ Versión actualizada con la pestaña Referencias funcionando.
 
 import sys
 import os
+import atexit
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -42,6 +43,20 @@ def inicializar_sistema():
     """Inicializa la base de datos"""
     try:
         from config.database import DatabaseConfig
+        
+        # Crear la base o ponerle al día el esquema
+        DatabaseConfig.inicializar_db()
+        
+        # Cerrar el pool de conexiones al salir, pase lo que pase
+        atexit.register(DatabaseConfig.cerrar_conexiones)
+
+        # Autodiagnóstico: mostrar la configuración de SQLite que quedó activa
+        for nombre, info in DatabaseConfig.verificar_pragmas().items():
+            if info['ok']:
+                print(f"   ✅ {nombre} = {info['activo']}")
+            else:
+                print(f"   ⚠️  {nombre} = {info['activo']} (esperado: {info['esperado']})")
+
         print("✅ Base de datos lista")
         return True
     except Exception as e:
@@ -55,6 +70,8 @@ def crear_ventana_principal():
     from ui.tab_referencias import TabReferencias
     from ui.tab_agenda_cheques import TabAgendaCheques
     from ui.tab_agenda_transferencias import TabAgendaTransferencias
+    from ui.tab_carga import TabCarga
+    from ui.tareas import EjecutorTareas
 
     
     class VentanaPrincipal(ctk.CTk):
@@ -69,8 +86,22 @@ def crear_ventana_principal():
             ctk.set_appearance_mode("dark")
             ctk.set_default_color_theme("blue")
             
+            # Tareas en segundo plano compartidas por todas las pestañas
+            self.ejecutor = EjecutorTareas(self)
+            
             # Crear interfaz
             self.crear_interfaz()
+            
+            # Cerrar las conexiones a la DB al cerrar la ventana
+            self.protocol("WM_DELETE_WINDOW", self.al_cerrar)
+        
+        def al_cerrar(self):
+            """Libera los recursos y cierra la ventana"""
+            from config.database import DatabaseConfig
+            # Primero las tareas (usan conexiones del pool), después la base
+            self.ejecutor.cerrar()
+            DatabaseConfig.cerrar_conexiones()
+            self.destroy()
         
         def crear_interfaz(self):
             """Crea la interfaz con pestañas"""
@@ -93,7 +124,7 @@ def crear_ventana_principal():
             
             # Pestaña 1: Referencias (FUNCIONANDO) ✅
             self.tab_referencias = self.tabview.add("📋 Referencias")
-            referencias_ui = TabReferencias(self.tab_referencias)
+            referencias_ui = TabReferencias(self.tab_referencias, ejecutor=self.ejecutor)
             referencias_ui.pack(fill="both", expand=True)
             
             # Pestaña 2: Rangos (Temporal)
@@ -102,17 +133,18 @@ def crear_ventana_principal():
             
             # Pestaña 3: Agenda Cheques (Temporal)
             self.tab_agenda_ch = self.tabview.add("👥 Agenda Cheques")
-            agenda_ch_ui = TabAgendaCheques(self.tab_agenda_ch)
+            agenda_ch_ui = TabAgendaCheques(self.tab_agenda_ch, ejecutor=self.ejecutor)
             agenda_ch_ui.pack(fill="both", expand=True)
             
             # Pestaña 4: Agenda Transferencias (Temporal)
             self.tab_agenda_tr = self.tabview.add("💳 Agenda Transfer.")
-            agenda_tr_ui = TabAgendaTransferencias(self.tab_agenda_tr)
+            agenda_tr_ui = TabAgendaTransferencias(self.tab_agenda_tr, ejecutor=self.ejecutor)
             agenda_tr_ui.pack(fill="both", expand=True)
             
-            # Pestaña 5: Carga (Temporal)
+            # Pestaña 5: Carga
             self.tab_carga = self.tabview.add("📝 Carga")
-            self.crear_tab_temporal(self.tab_carga, "Carga de Planillas")
+            carga_ui = TabCarga(self.tab_carga, ejecutor=self.ejecutor)
+            carga_ui.pack(fill="both", expand=True)
             
             # Pestaña 6: Planillas (Temporal)
             self.tab_planillas = self.tabview.add("📄 Planillas")
@@ -8,8 +8,11 @@ VERSIÓN CORREGIDA con explicaciones de los errores comunes.
 ============================================================================
 """
 
-from config.database import DatabaseConfig
+from config.database import DatabaseConfig, fabrica_filas
+from config.mapa_identidad import MapaIdentidad
 from utils.validators import validar_cuit, validar_cbu
+import re
+import unicodedata
 
 
 class ContactoCheque:
@@ -24,13 +27,29 @@ class ContactoCheque:
         activo (bool): Si está activo
     """
     
-    def __init__(self, id=None, nombre=None, cuit=None, notas=None, activo=True):
+    # Sin __dict__ por instancia (ver el comentario en Cheque.__slots__)
+    __slots__ = ('id', 'nombre', 'cuit', 'notas', 'activo', 'fecha_creacion')
+    
+    def __init__(self, id=None, nombre=None, cuit=None, notas=None, activo=True,
+                 fecha_creacion=None):
         """Constructor de la clase"""
         self.id = id
         self.nombre = nombre
         self.cuit = cuit
         self.notas = notas
         self.activo = activo
+        self.fecha_creacion = fecha_creacion
+    
+    # Conversiones al armar el objeto desde una fila (ver fabrica_filas)
+    _CONVERSIONES_FILA = {'activo': bool}
+    
+    # Contactos ya leídos, por id (ver MapaIdentidad)
+    cache = MapaIdentidad('contactos_cheque', capacidad=1024)
+    
+    @classmethod
+    def _desde_fila(cls, fila):
+        """Arma un objeto ContactoCheque a partir de una fila de la base"""
+        return fabrica_filas(cls, fila.keys())(fila)
     
     @classmethod
     def crear(cls, nombre, cuit, notas=''):
@@ -102,24 +121,16 @@ class ContactoCheque:
         ⚠️ ERROR CORREGIDO:
         - Tabla: 'agenda_cheques'
         - Campo: 'activo' (no 'activa')
+        
+        Los ya leídos salen de ContactoCheque.cache.
         """
         query = "SELECT * FROM agenda_cheques WHERE id = ?"
-        fila = DatabaseConfig.ejecutar_query(
+        return cls.cache.obtener(id, lambda: DatabaseConfig.ejecutar_query(
             query,
             params=(id,),
-            fetch_one=True
-        )
-        
-        if fila:
-            return cls(
-                id=fila['id'],
-                nombre=fila['nombre'],
-                cuit=fila['cuit'],
-                notas=fila['notas'],
-                activo=bool(fila['activo'])  # Campo correcto
-            )
-        
-        return None
+            fetch_one=True,
+            clase=cls
+        ))
     
     @classmethod
     def obtener_por_cuit(cls, cuit):
@@ -136,21 +147,17 @@ class ContactoCheque:
         )
         
         if fila:
-            return cls(
-                id=fila['id'],
-                nombre=fila['nombre'],
-                cuit=fila['cuit'],
-                notas=fila['notas'],
-                activo=bool(fila['activo'])
-            )
+            return cls._desde_fila(fila)
         
         return None
     
     @classmethod
-    def obtener_todos(cls, solo_activos=True):
+    def obtener_todos(cls, solo_activos=True, limite=None, desplazamiento=0):
         """
         Obtiene todos los contactos.
         
+        Con limite se obtiene solo una página (ver Referencia.obtener_todas).
+        
         ⚠️ ERROR CORREGIDO:
         - Tabla: 'agenda_cheques'
         - Campo: 'activo' (no 'activa')
@@ -158,17 +165,84 @@ class ContactoCheque:
         query = "SELECT * FROM agenda_cheques"
         if solo_activos:
             query += " WHERE activo = 1"
-        query += " ORDER BY fecha_creacion DESC"
+        query += " ORDER BY fecha_creacion DESC, id DESC"
         
-        filas = DatabaseConfig.ejecutar_query(query, fetch_all=True)
+        params = None
+        if limite is not None:
+            query += " LIMIT ? OFFSET ?"
+            params = (limite, desplazamiento)
         
-        return [cls(
-            id=fila['id'],
-            nombre=fila['nombre'],
-            cuit=fila['cuit'],
-            notas=fila['notas'],
-            activo=bool(fila['activo'])
-        ) for fila in filas]
+        return DatabaseConfig.ejecutar_query(query, params=params, fetch_all=True,
+                                             clase=cls)
+    
+    @classmethod
+    def obtener_pagina(cls, solo_activos=True, despues_de=None, limite=100):
+        """
+        Obtiene una página de los contactos de cheque, de la más nueva a la más vieja.
+        
+        Usa paginación por keyset (ver DatabaseConfig.cursor_keyset):
+        cada página cuesta lo mismo sin importar qué tan lejos esté.
+        
+        Args:
+            solo_activos (bool, optional): Si True, solo activos. Defaults to True.
+            despues_de (optional): Último objeto de la página anterior
+                (o tupla (fecha_creacion, id)). None = primera página.
+            limite (int, optional): Tamaño de la página. Defaults to 100.
+            
+        Returns:
+            list: Lista de objetos ContactoCheque (vacía al pasar la última página)
+            
+        Ejemplo:
+            pagina = ContactoCheque.obtener_pagina(limite=50)
+            while pagina:
+                for contacto in pagina:
+                    print(contacto.nombre)
+                pagina = ContactoCheque.obtener_pagina(despues_de=pagina[-1], limite=50)
+        """
+        query = "SELECT * FROM agenda_cheques WHERE 1=1"
+        params = []
+        
+        if solo_activos:
+            query += " AND activo = 1"
+        
+        cursor = DatabaseConfig.cursor_keyset(despues_de)
+        if cursor:
+            query += " AND (fecha_creacion, id) < (?, ?)"
+            params.extend(cursor)
+        
+        query += " ORDER BY fecha_creacion DESC, id DESC LIMIT ?"
+        params.append(limite)
+        
+        return DatabaseConfig.ejecutar_query(query, params=tuple(params), fetch_all=True,
+                                             clase=cls)
+    
+    @classmethod
+    def iterar_todos(cls, solo_activos=True, tamano_pagina=500):
+        """
+        Recorre los contactos de cheque de a páginas (generador, memoria constante).
+        
+        Mismos filtros que obtener_pagina(). Útil para exportar o procesar
+        tablas grandes sin armar una lista con todos los objetos.
+        
+        Yields:
+            ContactoCheque: Un objeto por vez
+        """
+        return DatabaseConfig.iterar_paginas(
+            lambda despues_de, limite: cls.obtener_pagina(
+                solo_activos=solo_activos, despues_de=despues_de, limite=limite
+            ),
+            tamano_pagina
+        )
+    
+    @classmethod
+    def contar_todos(cls, solo_activos=True):
+        """Cuenta los contactos (sin traerlos)"""
+        query = "SELECT COUNT(*) as total FROM agenda_cheques"
+        if solo_activos:
+            query += " WHERE activo = 1"
+        
+        resultado = DatabaseConfig.ejecutar_query(query, fetch_one=True)
+        return resultado['total']
     
     def actualizar(self):
         """
@@ -195,6 +269,9 @@ class ContactoCheque:
             )
         except Exception as e:
             raise Exception(f"Error al actualizar contacto: {e}")
+        finally:
+            # También si falló: el objeto puede tener cambios que no se guardaron
+            self.cache.invalidar(self.id)
     
     def desactivar(self):
         """
@@ -221,7 +298,11 @@ class ContactoTransferencia:
     Similar a ContactoCheque pero con CBU adicional.
     """
     
-    def __init__(self, id=None, nombre=None, cuit=None, cbu=None, notas=None, activo=True):
+    # Sin __dict__ por instancia (ver el comentario en Cheque.__slots__)
+    __slots__ = ('id', 'nombre', 'cuit', 'cbu', 'notas', 'activo', 'fecha_creacion')
+    
+    def __init__(self, id=None, nombre=None, cuit=None, cbu=None, notas=None, activo=True,
+                 fecha_creacion=None):
         """Constructor de la clase"""
         self.id = id
         self.nombre = nombre
@@ -229,6 +310,18 @@ class ContactoTransferencia:
         self.cbu = cbu
         self.notas = notas
         self.activo = activo
+        self.fecha_creacion = fecha_creacion
+    
+    # Conversiones al armar el objeto desde una fila (ver fabrica_filas)
+    _CONVERSIONES_FILA = {'activo': bool}
+    
+    # Contactos ya leídos, por id (ver MapaIdentidad)
+    cache = MapaIdentidad('contactos_transferencia', capacidad=1024)
+    
+    @classmethod
+    def _desde_fila(cls, fila):
+        """Arma un objeto ContactoTransferencia a partir de una fila de la base"""
+        return fabrica_filas(cls, fila.keys())(fila)
     
     @classmethod
     def crear(cls, nombre, cuit, cbu, notas=''):
@@ -305,25 +398,14 @@ class ContactoTransferencia:
     
     @classmethod
     def obtener_por_id(cls, id):
-        """Obtiene un contacto por su ID"""
+        """Obtiene un contacto por su ID (los ya leídos, de ContactoTransferencia.cache)"""
         query = "SELECT * FROM agenda_transferencias WHERE id = ?"
-        fila = DatabaseConfig.ejecutar_query(
+        return cls.cache.obtener(id, lambda: DatabaseConfig.ejecutar_query(
             query,
             params=(id,),
-            fetch_one=True
-        )
-        
-        if fila:
-            return cls(
-                id=fila['id'],
-                nombre=fila['nombre'],
-                cuit=fila['cuit'],
-                cbu=fila['cbu'],
-                notas=fila['notas'],
-                activo=bool(fila['activo'])
-            )
-        
-        return None
+            fetch_one=True,
+            clase=cls
+        ))
     
     @classmethod
     def obtener_por_cuit(cls, cuit):
@@ -336,20 +418,12 @@ class ContactoTransferencia:
         - Usa fetch_all=True
         """
         query = "SELECT * FROM agenda_transferencias WHERE cuit = ?"
-        filas = DatabaseConfig.ejecutar_query(
+        return DatabaseConfig.ejecutar_query(
             query,
             params=(cuit.upper(),),
-            fetch_all=True  # ← IMPORTANTE: fetch_all
+            fetch_all=True,  # ← IMPORTANTE: fetch_all
+            clase=cls
         )
-        
-        return [cls(
-            id=fila['id'],
-            nombre=fila['nombre'],
-            cuit=fila['cuit'],
-            cbu=fila['cbu'],
-            notas=fila['notas'],
-            activo=bool(fila['activo'])
-        ) for fila in filas]
     
     @classmethod
     def obtener_por_cbu(cls, cbu):
@@ -362,35 +436,94 @@ class ContactoTransferencia:
         )
         
         if fila:
-            return cls(
-                id=fila['id'],
-                nombre=fila['nombre'],
-                cuit=fila['cuit'],
-                cbu=fila['cbu'],
-                notas=fila['notas'],
-                activo=bool(fila['activo'])
-            )
+            return cls._desde_fila(fila)
         
         return None
     
     @classmethod
-    def obtener_todos(cls, solo_activos=True):
-        """Obtiene todos los contactos"""
+    def obtener_todos(cls, solo_activos=True, limite=None, desplazamiento=0):
+        """Obtiene todos los contactos (o una página, con limite)"""
         query = "SELECT * FROM agenda_transferencias"
         if solo_activos:
             query += " WHERE activo = 1"
-        query += " ORDER BY fecha_creacion DESC"
+        query += " ORDER BY fecha_creacion DESC, id DESC"
         
-        filas = DatabaseConfig.ejecutar_query(query, fetch_all=True)
+        params = None
+        if limite is not None:
+            query += " LIMIT ? OFFSET ?"
+            params = (limite, desplazamiento)
         
-        return [cls(
-            id=fila['id'],
-            nombre=fila['nombre'],
-            cuit=fila['cuit'],
-            cbu=fila['cbu'],
-            notas=fila['notas'],
-            activo=bool(fila['activo'])
-        ) for fila in filas]
+        return DatabaseConfig.ejecutar_query(query, params=params, fetch_all=True,
+                                             clase=cls)
+    
+    @classmethod
+    def obtener_pagina(cls, solo_activos=True, despues_de=None, limite=100):
+        """
+        Obtiene una página de los contactos de transferencia, de la más nueva a la más vieja.
+        
+        Usa paginación por keyset (ver DatabaseConfig.cursor_keyset):
+        cada página cuesta lo mismo sin importar qué tan lejos esté.
+        
+        Args:
+            solo_activos (bool, optional): Si True, solo activos. Defaults to True.
+            despues_de (optional): Último objeto de la página anterior
+                (o tupla (fecha_creacion, id)). None = primera página.
+            limite (int, optional): Tamaño de la página. Defaults to 100.
+            
+        Returns:
+            list: Lista de objetos ContactoTransferencia (vacía al pasar la última página)
+            
+        Ejemplo:
+            pagina = ContactoTransferencia.obtener_pagina(limite=50)
+            while pagina:
+                for contacto in pagina:
+                    print(contacto.nombre)
+                pagina = ContactoTransferencia.obtener_pagina(despues_de=pagina[-1], limite=50)
+        """
+        query = "SELECT * FROM agenda_transferencias WHERE 1=1"
+        params = []
+        
+        if solo_activos:
+            query += " AND activo = 1"
+        
+        cursor = DatabaseConfig.cursor_keyset(despues_de)
+        if cursor:
+            query += " AND (fecha_creacion, id) < (?, ?)"
+            params.extend(cursor)
+        
+        query += " ORDER BY fecha_creacion DESC, id DESC LIMIT ?"
+        params.append(limite)
+        
+        return DatabaseConfig.ejecutar_query(query, params=tuple(params), fetch_all=True,
+                                             clase=cls)
+    
+    @classmethod
+    def iterar_todos(cls, solo_activos=True, tamano_pagina=500):
+        """
+        Recorre los contactos de transferencia de a páginas (generador, memoria constante).
+        
+        Mismos filtros que obtener_pagina(). Útil para exportar o procesar
+        tablas grandes sin armar una lista con todos los objetos.
+        
+        Yields:
+            ContactoTransferencia: Un objeto por vez
+        """
+        return DatabaseConfig.iterar_paginas(
+            lambda despues_de, limite: cls.obtener_pagina(
+                solo_activos=solo_activos, despues_de=despues_de, limite=limite
+            ),
+            tamano_pagina
+        )
+    
+    @classmethod
+    def contar_todos(cls, solo_activos=True):
+        """Cuenta los contactos (sin traerlos)"""
+        query = "SELECT COUNT(*) as total FROM agenda_transferencias"
+        if solo_activos:
+            query += " WHERE activo = 1"
+        
+        resultado = DatabaseConfig.ejecutar_query(query, fetch_one=True)
+        return resultado['total']
     
     def actualizar(self):
         """
@@ -416,6 +549,8 @@ class ContactoTransferencia:
             )
         except Exception as e:
             raise Exception(f"Error al actualizar contacto: {e}")
+        finally:
+            self.cache.invalidar(self.id)
     
     def desactivar(self):
         """Marca el contacto como inactivo"""
@@ -435,65 +570,209 @@ class ContactoTransferencia:
 # FUNCIONES DE UTILIDAD
 # ============================================================================
 
-def buscar_contactos_cheque(termino):
+def _palabras(texto):
+    """
+    Parte un texto en palabras igual que el tokenizer de los índices FTS5
+    (unicode61 remove_diacritics 2): minúsculas y sin acentos.
+    
+        "José GONZÁLEZ-Pérez" → ['jose', 'gonzalez', 'perez']
+    """
+    descompuesto = unicodedata.normalize('NFKD', texto.lower())
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return re.findall(r'\w+', sin_acentos)
+
+
+def tokens_busqueda(termino):
+    """
+    Palabras que busca un término de la agenda (cada una por prefijo).
+    
+        "juan gonz"      → ['juan', 'gonz']
+        "20-12345678-9"  → ['20123456789']   (CUIT/CBU se indexan sin guiones)
+        "0170 0995"      → ['01700995']
+    
+    Args:
+        termino (str): Texto de búsqueda
+        
+    Returns:
+        list: Palabras normalizadas (vacía si no quedó nada para buscar)
+    """
+    # Un número escrito "en partes" (CUIT o CBU con guiones o espacios)
+    # se busca como un solo número
+    compacto = re.sub(r'[\s-]', '', termino)
+    if compacto.isdigit():
+        return [compacto]
+    
+    tokens = []
+    for palabra in termino.split():
+        sin_guiones = palabra.replace('-', '')
+        if sin_guiones.isdigit():
+            palabra = sin_guiones
+        
+        # Sacar los signos que FTS5 trata como separadores
+        tokens.extend(_palabras(palabra))
+    
+    return tokens
+
+
+def _consulta_fts(termino):
+    """
+    Convierte lo que escribió el usuario en una consulta MATCH de FTS5.
+    
+    Cada palabra se busca por prefijo y TODAS deben aparecer:
+        "juan gonz"      → "juan"* "gonz"*
+        "20-12345678-9"  → "20123456789"*
+    
+    Las comillas protegen de la sintaxis especial de FTS5 (AND, OR, NEAR...).
+    
+    Args:
+        termino (str): Texto de búsqueda
+        
+    Returns:
+        str or None: Consulta para MATCH, o None si no quedó nada para buscar
+    """
+    tokens = tokens_busqueda(termino)
+    if not tokens:
+        return None
+    return ' '.join('"' + token.replace('"', '""') + '"*' for token in tokens)
+
+
+def palabras_contacto(contacto):
+    """
+    Palabras con las que el índice FTS5 encuentra a un contacto.
+    
+    Nombre partido en palabras, CUIT (y CBU, si tiene) como un solo
+    número sin guiones ni espacios, igual que en los triggers de
+    database/schema.sql.
+    
+    Se devuelven en un solo texto, cada una precedida por un espacio
+    (" juan perez 20123456789"): "alguna palabra empieza con X" queda
+    como " X" in texto, que es mucho más rápido que recorrer una lista.
+    
+    Args:
+        contacto (ContactoCheque or ContactoTransferencia): Contacto
+        
+    Returns:
+        str: Palabras normalizadas
+    """
+    palabras = _palabras(contacto.nombre or '')
+    for numero in (contacto.cuit, getattr(contacto, 'cbu', None)):
+        if numero:
+            palabras.extend(_palabras(re.sub(r'[\s-]', '', numero)))
+    return ''.join(' ' + palabra for palabra in palabras)
+
+
+def filtro_busqueda(termino):
+    """
+    Versión en memoria del MATCH de buscar_contactos_cheque/transferencia():
+    cada palabra del término tiene que ser el comienzo de alguna palabra
+    del contacto.
+    
+    Args:
+        termino (str): Texto de búsqueda
+        
+    Returns:
+        callable: coincide(palabras) → bool, con palabras = palabras_contacto(c)
+        
+    Ejemplo:
+        coincide = filtro_busqueda("juan gonz")
+        encontrados = [c for c in contactos if coincide(palabras_contacto(c))]
+    """
+    buscados = [' ' + token for token in tokens_busqueda(termino)]
+    
+    def coincide(palabras):
+        return all(buscado in palabras for buscado in buscados)
+    
+    return coincide
+
+
+def refina_busqueda(anterior, nuevo):
+    """
+    Indica si los resultados de 'nuevo' están dentro de los de 'anterior'.
+    
+    Pasa cuando cada palabra del término anterior es el comienzo de alguna
+    palabra del nuevo ("juan g" → "juan go", "gonz" → "gonzalez juan"):
+    todo lo que encuentra el nuevo término también lo encontraba el viejo,
+    así que se puede filtrar el resultado anterior en vez de consultar.
+    
+    Args:
+        anterior (str): Término ya buscado
+        nuevo (str): Término nuevo
+        
+    Returns:
+        bool: True si alcanza con filtrar los resultados de 'anterior'
+    """
+    tokens_nuevo = tokens_busqueda(nuevo)
+    return all(any(token.startswith(viejo) for token in tokens_nuevo)
+               for viejo in tokens_busqueda(anterior))
+
+
+def buscar_contactos_cheque(termino, limite=None, desplazamiento=0):
     """
     Busca contactos de cheque por nombre o CUIT.
     
-    ⚠️ ERROR CORREGIDO:
-    - Tabla: 'agenda_cheques'
-    - Buscar por 'nombre' o 'cuit' (no 'codigo' ni 'descripcion')
+    Usa el índice de texto completo agenda_cheques_fts:
+    - Busca por prefijo de palabra ("gonz" encuentra "González")
+    - No distingue acentos ni mayúsculas ("gonzalez" encuentra "González")
+    - Los resultados vienen ordenados por relevancia (bm25)
+    
+    Con limite/desplazamiento devuelve solo una página de resultados.
     """
+    consulta = _consulta_fts(termino)
+    if consulta is None:
+        return ContactoCheque.obtener_todos(
+            solo_activos=False, limite=limite, desplazamiento=desplazamiento
+        )
+    
     query = """
-        SELECT * FROM agenda_cheques 
-        WHERE nombre LIKE ? OR cuit LIKE ?
-        ORDER BY fecha_creacion DESC
+        SELECT a.* FROM agenda_cheques_fts f
+        JOIN agenda_cheques a ON a.id = f.rowid
+        WHERE agenda_cheques_fts MATCH ?
+        ORDER BY bm25(agenda_cheques_fts), a.fecha_creacion DESC, a.id DESC
     """
     
-    termino_busqueda = f"%{termino.upper()}%"
+    params = (consulta,)
+    if limite is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += (limite, desplazamiento)
     
-    filas = DatabaseConfig.ejecutar_query(
+    return DatabaseConfig.ejecutar_query(
         query,
-        params=(termino_busqueda, termino_busqueda),
-        fetch_all=True
+        params=params,
+        fetch_all=True,
+        clase=ContactoCheque
     )
-    
-    return [ContactoCheque(
-        id=fila['id'],
-        nombre=fila['nombre'],
-        cuit=fila['cuit'],
-        notas=fila['notas'],
-        activo=bool(fila['activo'])
-    ) for fila in filas]
 
 
-def buscar_contactos_transferencia(termino):
+def buscar_contactos_transferencia(termino, limite=None, desplazamiento=0):
     """
     Busca contactos de transferencia por nombre, CUIT o CBU.
     
-    ⚠️ ERROR CORREGIDO: Buscar por los campos correctos
+    Igual que buscar_contactos_cheque(), pero sobre agenda_transferencias_fts.
     """
+    consulta = _consulta_fts(termino)
+    if consulta is None:
+        return ContactoTransferencia.obtener_todos(
+            solo_activos=False, limite=limite, desplazamiento=desplazamiento
+        )
+    
     query = """
-        SELECT * FROM agenda_transferencias 
-        WHERE nombre LIKE ? OR cuit LIKE ? OR cbu LIKE ?
-        ORDER BY fecha_creacion DESC
+        SELECT a.* FROM agenda_transferencias_fts f
+        JOIN agenda_transferencias a ON a.id = f.rowid
+        WHERE agenda_transferencias_fts MATCH ?
+        ORDER BY bm25(agenda_transferencias_fts), a.fecha_creacion DESC, a.id DESC
     """
     
-    termino_busqueda = f"%{termino}%"
+    params = (consulta,)
+    if limite is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += (limite, desplazamiento)
     
-    filas = DatabaseConfig.ejecutar_query(
+    return DatabaseConfig.ejecutar_query(
         query,
-        params=(termino_busqueda, termino_busqueda, termino_busqueda),
-        fetch_all=True
+        params=params,
+        fetch_all=True,
+        clase=ContactoTransferencia
     )
-    
-    return [ContactoTransferencia(
-        id=fila['id'],
-        nombre=fila['nombre'],
-        cuit=fila['cuit'],
-        cbu=fila['cbu'],
-        notas=fila['notas'],
-        activo=bool(fila['activo'])
-    ) for fila in filas]
 
 
 # ============================================================================
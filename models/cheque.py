@@ -6,7 +6,7 @@ Este modelo maneja los cheques individuales emitidos.
 ============================================================================
 """
 
-from config.database import DatabaseConfig
+from config.database import DatabaseConfig, fabrica_filas
 from datetime import datetime
 
 
@@ -21,6 +21,14 @@ class Cheque:
     
     ESTADOS_VALIDOS = [ESTADO_PENDIENTE, ESTADO_CORRECTO, ESTADO_CARGADO, ESTADO_SIN_USAR]
     
+    # __slots__: los atributos van en lugares fijos del objeto, sin un
+    # __dict__ por instancia. Con cientos de miles de objetos en memoria
+    # (exportaciones, conciliaciones) la diferencia se nota.
+    # No se pueden agregar atributos que no estén en esta lista.
+    __slots__ = ('id', 'numero_cheque', 'tipo', 'estado', 'referencia_id',
+                 'planilla_id', 'beneficiario', 'importe', 'fecha_emision',
+                 'fecha_pago', 'fecha_creacion')
+    
     def __init__(self, id=None, numero_cheque=None, tipo=None, estado=None,
                  referencia_id=None, planilla_id=None, beneficiario=None,
                  importe=None, fecha_emision=None, fecha_pago=None, fecha_creacion=None):
@@ -37,6 +45,11 @@ class Cheque:
         self.fecha_pago = fecha_pago
         self.fecha_creacion = fecha_creacion
     
+    @classmethod
+    def _desde_fila(cls, fila):
+        """Arma un objeto Cheque a partir de una fila de la base"""
+        return fabrica_filas(cls, fila.keys())(fila)
+    
     @classmethod
     def crear(cls, numero_cheque, tipo, planilla_id=None, referencia_id=None,
               beneficiario=None, importe=None, fecha_emision=None, fecha_pago=None):
@@ -95,6 +108,100 @@ class Cheque:
         except Exception as e:
             raise Exception(f"Error al crear cheque: {e}")
 
+    @classmethod
+    def crear_lote(cls, registros):
+        """
+        Crea muchos cheques de una sola vez (todos los de una planilla).
+        
+        En lugar de un INSERT + commit por cheque, hace UN executemany
+        dentro de UNA transacción. Si algún cheque falla (por ejemplo un
+        número repetido), no se crea ninguno.
+        
+        Además, si el registro trae 'item_id', completa la columna
+        items_planilla.cheque_id de ese item en el mismo lote.
+        
+        Args:
+            registros (list): Lista de diccionarios con las claves de crear():
+                numero_cheque, tipo, planilla_id, referencia_id, beneficiario,
+                importe, fecha_emision, fecha_pago; y opcionalmente item_id
+                
+        Returns:
+            list: IDs de los cheques creados, en el mismo orden que registros
+            
+        Raises:
+            ValueError: Si algún tipo o importe es inválido
+            
+        Ejemplo:
+            ids = Cheque.crear_lote([
+                {'numero_cheque': 91181444, 'tipo': 'diferido', 'planilla_id': 3,
+                 'beneficiario': 'Juan Pérez', 'importe': 50000.0, 'item_id': 12},
+            ])
+        """
+        registros = list(registros)
+        if not registros:
+            return []
+        
+        # 1. Validar todo ANTES de tocar la base de datos
+        filas = []
+        for posicion, registro in enumerate(registros, start=1):
+            tipo = registro['tipo'].lower().strip()
+            if tipo not in ['diferido', 'comun']:
+                raise ValueError(f"Registro {posicion}: el tipo debe ser 'diferido' o 'comun'")
+            
+            importe = registro.get('importe')
+            if importe is not None and importe <= 0:
+                raise ValueError(f"Registro {posicion}: el importe debe ser mayor a 0")
+            
+            filas.append((
+                registro['numero_cheque'], tipo, cls.ESTADO_PENDIENTE,
+                registro.get('referencia_id'), registro.get('planilla_id'),
+                registro.get('beneficiario'), importe,
+                registro.get('fecha_emision'), registro.get('fecha_pago')
+            ))
+        
+        query = """
+            INSERT INTO cheques_emitidos (numero_cheque, tipo, estado, referencia_id, planilla_id, 
+                                         beneficiario, importe, fecha_emision, fecha_pago)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        
+        try:
+            with DatabaseConfig.transaccion():
+                # 2. Último ID antes de insertar. Como la transacción tiene el
+                # lock de escritura, los nuevos IDs son los siguientes en orden.
+                fila = DatabaseConfig.ejecutar_query(
+                    "SELECT COALESCE(MAX(id), 0) as ultimo FROM cheques_emitidos",
+                    fetch_one=True
+                )
+                ultimo_id = fila['ultimo']
+                
+                # 3. Insertar todos los cheques
+                DatabaseConfig.ejecutar_muchos(query, filas)
+                
+                filas_ids = DatabaseConfig.ejecutar_query(
+                    "SELECT id FROM cheques_emitidos WHERE id > ? ORDER BY id",
+                    params=(ultimo_id,),
+                    fetch_all=True
+                )
+                ids = [f['id'] for f in filas_ids]
+                
+                # 4. Vincular cada item de la planilla con su cheque
+                vinculos = [
+                    (id_cheque, registro['item_id'])
+                    for id_cheque, registro in zip(ids, registros)
+                    if registro.get('item_id') is not None
+                ]
+                if vinculos:
+                    DatabaseConfig.ejecutar_muchos(
+                        "UPDATE items_planilla SET cheque_id = ? WHERE id = ?",
+                        vinculos
+                    )
+            
+            return ids
+            
+        except Exception as e:
+            raise Exception(f"Error al crear cheques: {e}")
+
     @classmethod
     def existe(cls, numero_cheque, tipo):
         """
@@ -125,19 +232,7 @@ class Cheque:
         )
         
         if fila:
-            return cls(
-                id=fila['id'],
-                numero_cheque=fila['numero_cheque'],
-                tipo=fila['tipo'],
-                estado=fila['estado'],
-                referencia_id=fila['referencia_id'],
-                planilla_id=fila['planilla_id'],
-                beneficiario=fila['beneficiario'],
-                importe=fila['importe'],
-                fecha_emision=fila['fecha_emision'],
-                fecha_pago=fila['fecha_pago'],
-                fecha_creacion=fila['fecha_creacion']
-            )
+            return cls._desde_fila(fila)
         
         return None
     
@@ -156,19 +251,7 @@ class Cheque:
         )
         
         if fila:
-            return cls(
-                id=fila['id'],
-                numero_cheque=fila['numero_cheque'],
-                tipo=fila['tipo'],
-                estado=fila['estado'],
-                referencia_id=fila['referencia_id'],
-                planilla_id=fila['planilla_id'],
-                beneficiario=fila['beneficiario'],
-                importe=fila['importe'],
-                fecha_emision=fila['fecha_emision'],
-                fecha_pago=fila['fecha_pago'],
-                fecha_creacion=fila['fecha_creacion']
-            )
+            return cls._desde_fila(fila)
         
         return None
 
@@ -182,25 +265,12 @@ class Cheque:
         query = "SELECT * FROM cheques_emitidos WHERE planilla_id = ?"
         
         # ⚠️ CORRECCIÓN: fetch_all=True (no fetch_one)
-        filas = DatabaseConfig.ejecutar_query(
+        return DatabaseConfig.ejecutar_query(
             query,
             params=(planilla_id,),
-            fetch_all=True
+            fetch_all=True,
+            clase=cls
         )
-        
-        return [cls(
-            id=fila['id'],
-            numero_cheque=fila['numero_cheque'],
-            tipo=fila['tipo'],
-            estado=fila['estado'],
-            referencia_id=fila['referencia_id'],
-            planilla_id=fila['planilla_id'],
-            beneficiario=fila['beneficiario'],
-            importe=fila['importe'],
-            fecha_emision=fila['fecha_emision'],
-            fecha_pago=fila['fecha_pago'],
-            fecha_creacion=fila['fecha_creacion']
-        ) for fila in filas]
     
     @classmethod
     def obtener_por_estado(cls, estado, tipo=None):
@@ -218,25 +288,12 @@ class Cheque:
         
         query += " ORDER BY fecha_creacion DESC"
         
-        filas = DatabaseConfig.ejecutar_query(
+        return DatabaseConfig.ejecutar_query(
             query,
             params=tuple(params),
-            fetch_all=True
+            fetch_all=True,
+            clase=cls
         )
-        
-        return [cls(
-            id=fila['id'],
-            numero_cheque=fila['numero_cheque'],
-            tipo=fila['tipo'],
-            estado=fila['estado'],
-            referencia_id=fila['referencia_id'],
-            planilla_id=fila['planilla_id'],
-            beneficiario=fila['beneficiario'],
-            importe=fila['importe'],
-            fecha_emision=fila['fecha_emision'],
-            fecha_pago=fila['fecha_pago'],
-            fecha_creacion=fila['fecha_creacion']
-        ) for fila in filas]
     
     @classmethod
     def obtener_todos(cls, tipo=None, estado=None):
@@ -256,27 +313,79 @@ class Cheque:
             query += " AND estado = ?"
             params.append(estado)
         
-        query += " ORDER BY fecha_creacion DESC"
+        query += " ORDER BY fecha_creacion DESC, id DESC"
         
-        filas = DatabaseConfig.ejecutar_query(
+        return DatabaseConfig.ejecutar_query(
             query, 
             params=tuple(params) if params else None,
-            fetch_all=True
+            fetch_all=True,
+            clase=cls
         )
+    
+    @classmethod
+    def obtener_pagina(cls, tipo=None, estado=None, despues_de=None, limite=100):
+        """
+        Obtiene una página de los cheques emitidos, de la más nueva a la más vieja.
         
-        return [cls(
-            id=fila['id'],
-            numero_cheque=fila['numero_cheque'],
-            tipo=fila['tipo'],
-            estado=fila['estado'],
-            referencia_id=fila['referencia_id'],
-            planilla_id=fila['planilla_id'],
-            beneficiario=fila['beneficiario'],
-            importe=fila['importe'],
-            fecha_emision=fila['fecha_emision'],
-            fecha_pago=fila['fecha_pago'],
-            fecha_creacion=fila['fecha_creacion']
-        ) for fila in filas]
+        Usa paginación por keyset (ver DatabaseConfig.cursor_keyset):
+        cada página cuesta lo mismo sin importar qué tan lejos esté.
+        
+        Args:
+            tipo (str, optional): 'comun' o 'diferido'
+            estado (str, optional): Estado del cheque
+            despues_de (optional): Último objeto de la página anterior
+                (o tupla (fecha_creacion, id)). None = primera página.
+            limite (int, optional): Tamaño de la página. Defaults to 100.
+            
+        Returns:
+            list: Lista de objetos Cheque (vacía al pasar la última página)
+            
+        Ejemplo:
+            pagina = Cheque.obtener_pagina(limite=50)
+            while pagina:
+                for cheque in pagina:
+                    print(cheque.numero_cheque)
+                pagina = Cheque.obtener_pagina(despues_de=pagina[-1], limite=50)
+        """
+        query = "SELECT * FROM cheques_emitidos WHERE 1=1"
+        params = []
+        
+        if tipo:
+            query += " AND tipo = ?"
+            params.append(tipo.lower())
+        
+        if estado:
+            query += " AND estado = ?"
+            params.append(estado)
+        
+        cursor = DatabaseConfig.cursor_keyset(despues_de)
+        if cursor:
+            query += " AND (fecha_creacion, id) < (?, ?)"
+            params.extend(cursor)
+        
+        query += " ORDER BY fecha_creacion DESC, id DESC LIMIT ?"
+        params.append(limite)
+        
+        return DatabaseConfig.ejecutar_query(query, params=tuple(params), fetch_all=True,
+                                             clase=cls)
+    
+    @classmethod
+    def iterar_todos(cls, tipo=None, estado=None, tamano_pagina=500):
+        """
+        Recorre los cheques emitidos de a páginas (generador, memoria constante).
+        
+        Mismos filtros que obtener_pagina(). Útil para exportar o procesar
+        tablas grandes sin armar una lista con todos los objetos.
+        
+        Yields:
+            Cheque: Un objeto por vez
+        """
+        return DatabaseConfig.iterar_paginas(
+            lambda despues_de, limite: cls.obtener_pagina(
+                tipo=tipo, estado=estado, despues_de=despues_de, limite=limite
+            ),
+            tamano_pagina
+        )
     
     def actualizar(self):
         """
@@ -429,51 +538,25 @@ def buscar_cheques(termino):
     
     termino_busqueda = f"%{termino}%"
     
-    filas = DatabaseConfig.ejecutar_query(
+    return DatabaseConfig.ejecutar_query(
         query,
         params=(termino_busqueda, termino_busqueda, termino_busqueda, termino_busqueda),
-        fetch_all=True
+        fetch_all=True,
+        clase=Cheque
     )
 
-    return [Cheque(
-        id=fila['id'],
-        numero_cheque=fila['numero_cheque'],
-        tipo=fila['tipo'],
-        estado=fila['estado'],
-        referencia_id=fila['referencia_id'],
-        planilla_id=fila['planilla_id'],
-        beneficiario=fila['beneficiario'],
-        importe=fila['importe'],
-        fecha_emision=fila['fecha_emision'],
-        fecha_pago=fila['fecha_pago'],
-        fecha_creacion=fila['fecha_creacion']
-    ) for fila in filas]    
-
 def contar_por_estado(tipo=None):
     """
     Cuenta cuántos cheques hay en cada estado.
     
     ⚠️ CORRECCIÓN COMPLETA: Debe retornar un dict con todos los estados
-    """
-    resultado = {}
     
-    for estado in Cheque.ESTADOS_VALIDOS:
-        query = "SELECT COUNT(*) as count FROM cheques_emitidos WHERE estado = ?"
-        params = [estado]
-        
-        if tipo:
-            query += " AND tipo = ?"
-            params.append(tipo.lower())
-        
-        fila = DatabaseConfig.ejecutar_query(
-            query,
-            params=tuple(params),
-            fetch_one=True
-        )
-        
-        resultado[estado] = fila['count']
+    Los conteos salen de EstadisticasService (una consulta con GROUP BY
+    para todos los estados y tipos, con cache hasta la próxima escritura).
+    """
+    from services.estadisticas_service import EstadisticasService
     
-    return resultado
+    return EstadisticasService.cheques_por_estado(tipo)
 
 
 # ============================================================================
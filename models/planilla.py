@@ -9,8 +9,10 @@ Cada item puede ser un cheque o una transferencia.
 ============================================================================
 """
 
-from config.database import DatabaseConfig
+from config.database import DatabaseConfig, fabrica_filas
 from datetime import datetime
+import math
+import time
 
 
 class Planilla:
@@ -33,10 +35,27 @@ class Planilla:
     ESTADO_GENERADA = 'generada'
     ESTADO_DESCARGADA = 'descargada'
     
+    # Contador de números de planilla (tabla secuencias)
+    SECUENCIA = 'planilla'
+    
+    # Sin __dict__ por instancia (ver el comentario en Cheque.__slots__)
+    __slots__ = ('id', 'referencia_id', 'numero_planilla', 'sucursal', 'cuenta_debito',
+                 'estado', 'archivo_excel', 'fecha_creacion', '_cantidad_items',
+                 '_total_importe', '_total_cheques', '_total_transferencias')
+    
     def __init__(self, id=None, referencia_id=None, numero_planilla=None,
                  sucursal=None, cuenta_debito=None, estado=None,
-                 archivo_excel=None, fecha_creacion=None):
-        """Constructor de la clase"""
+                 archivo_excel=None, fecha_creacion=None,
+                 cantidad_items=None, total_importe=None,
+                 total_cheques=None, total_transferencias=None):
+        """
+        Constructor de la clase.
+        
+        Los totales son columnas de la tabla planillas que mantienen los
+        triggers de items_planilla (ver schema.sql). Vienen en el mismo
+        SELECT que la planilla: contar_items() y calcular_total() no
+        vuelven a consultar la base. None = todavía no se leyeron.
+        """
         self.id = id
         self.referencia_id = referencia_id
         self.numero_planilla = numero_planilla
@@ -45,6 +64,24 @@ class Planilla:
         self.estado = estado or self.ESTADO_BORRADOR
         self.archivo_excel = archivo_excel
         self.fecha_creacion = fecha_creacion
+        
+        # Cache de totales (ver contar_items / calcular_total)
+        self._cantidad_items = cantidad_items
+        self._total_importe = total_importe
+        self._total_cheques = total_cheques
+        self._total_transferencias = total_transferencias
+    
+    # Conversiones al armar el objeto desde una fila (ver fabrica_filas)
+    _CONVERSIONES_FILA = {
+        'total_importe': float,
+        'total_cheques': float,
+        'total_transferencias': float
+    }
+    
+    @classmethod
+    def _desde_fila(cls, fila):
+        """Arma un objeto Planilla a partir de una fila de la base"""
+        return fabrica_filas(cls, fila.keys())(fila)
     
     @classmethod
     def crear(cls, referencia_id, sucursal, cuenta_debito):
@@ -53,9 +90,10 @@ class Planilla:
         
         Este método:
         1. Valida que la referencia existe
-        2. Obtiene el próximo número de planilla de configuracion
+        2. Reserva el próximo número de planilla (contador 'planilla')
         3. Crea la planilla
-        4. Incrementa el contador
+        
+        Los pasos 2 y 3 se hacen en una sola transacción.
         """
         # 1. Validar que la referencia existe
         from models.referencia import Referencia
@@ -63,38 +101,24 @@ class Planilla:
         if not ref:
             raise ValueError(f"No existe la referencia con ID {referencia_id}")
         
-        # 2. Obtener el próximo número de planilla
-        query_get = "SELECT valor FROM configuracion WHERE clave = 'proximo_numero_planilla'"
-        resultado = DatabaseConfig.ejecutar_query(query_get, fetch_one=True)
-        
-        if resultado:
-            numero_planilla = int(resultado['valor'])
-        else:
-            # Si no existe, crear el registro
-            query_insert = "INSERT INTO configuracion (clave, valor, descripcion) VALUES (?, ?, ?)"
-            DatabaseConfig.ejecutar_query(
-                query_insert,
-                params=('proximo_numero_planilla', '1', 'Próximo número de planilla')
-            )
-            numero_planilla = 1
-        
-        # 3. Crear la planilla
-        query = """
-            INSERT INTO planillas (referencia_id, numero_planilla, sucursal, cuenta_debito, estado)
-            VALUES (?, ?, ?, ?, ?)
-        """
-        
+        # 2 y 3 van en UNA transacción: si el INSERT falla, el número
+        # reservado se devuelve (no queda un hueco en la numeración)
         try:
-            id_nuevo = DatabaseConfig.ejecutar_query(
-                query,
-                params=(referencia_id, numero_planilla, sucursal, cuenta_debito, cls.ESTADO_BORRADOR)
-            )
-            
-            # 4. Incrementar el contador
-            query_update = "UPDATE configuracion SET valor = ? WHERE clave = 'proximo_numero_planilla'"
-            DatabaseConfig.ejecutar_query(query_update, params=(str(numero_planilla + 1),))
+            with DatabaseConfig.transaccion():
+                # 2. Reservar el número: incrementa y lee en una sola sentencia
+                numero_planilla = DatabaseConfig.siguiente_valor(cls.SECUENCIA)
+                
+                # 3. Crear la planilla
+                query = """
+                    INSERT INTO planillas (referencia_id, numero_planilla, sucursal, cuenta_debito, estado)
+                    VALUES (?, ?, ?, ?, ?)
+                """
+                id_nuevo = DatabaseConfig.ejecutar_query(
+                    query,
+                    params=(referencia_id, numero_planilla, sucursal, cuenta_debito, cls.ESTADO_BORRADOR)
+                )
             
-            # 5. Retornar objeto creado
+            # 4. Retornar objeto creado
             return cls(
                 id=id_nuevo,
                 referencia_id=referencia_id,
@@ -102,7 +126,11 @@ class Planilla:
                 sucursal=sucursal,
                 cuenta_debito=cuenta_debito,
                 estado=cls.ESTADO_BORRADOR,
-                fecha_creacion=datetime.now()
+                fecha_creacion=datetime.now(),
+                cantidad_items=0,
+                total_importe=0.0,
+                total_cheques=0.0,
+                total_transferencias=0.0
             )
             
         except Exception as e:
@@ -110,28 +138,17 @@ class Planilla:
     
     @classmethod
     def obtener_por_id(cls, id):
-        """Obtiene una planilla por su ID"""
+        """Obtiene una planilla por su ID (con sus totales)"""
         query = "SELECT * FROM planillas WHERE id = ?"
-        fila = DatabaseConfig.ejecutar_query(query, params=(id,), fetch_one=True)
-        
-        if fila:
-            return cls(
-                id=fila['id'],
-                referencia_id=fila['referencia_id'],
-                numero_planilla=fila['numero_planilla'],
-                sucursal=fila['sucursal'],
-                cuenta_debito=fila['cuenta_debito'],
-                estado=fila['estado'],
-                archivo_excel=fila['archivo_excel'],
-                fecha_creacion=fila['fecha_creacion']
-            )
-        
-        return None
+        return DatabaseConfig.ejecutar_query(query, params=(id,), fetch_one=True, clase=cls)
     
     @classmethod
     def obtener_todas(cls, referencia_id=None, estado=None):
         """
         Obtiene todas las planillas con filtros opcionales.
+        
+        Cada planilla viene con sus totales (columnas de la tabla):
+        to_dict() y __str__ no hacen consultas extra.
         """
         query = "SELECT * FROM planillas WHERE 1=1"
         params = []
@@ -144,24 +161,79 @@ class Planilla:
             query += " AND estado = ?"
             params.append(estado)
         
-        query += " ORDER BY fecha_creacion DESC"
+        query += " ORDER BY fecha_creacion DESC, id DESC"
         
-        filas = DatabaseConfig.ejecutar_query(
+        return DatabaseConfig.ejecutar_query(
             query,
             params=tuple(params) if params else None,
-            fetch_all=True
+            fetch_all=True,
+            clase=cls
         )
+    
+    @classmethod
+    def obtener_pagina(cls, referencia_id=None, estado=None, despues_de=None, limite=100):
+        """
+        Obtiene una página de las planillas, de la más nueva a la más vieja.
+        
+        Usa paginación por keyset (ver DatabaseConfig.cursor_keyset):
+        cada página cuesta lo mismo sin importar qué tan lejos esté.
+        
+        Args:
+            referencia_id (int, optional): Solo las de esa referencia
+            estado (str, optional): Estado de la planilla
+            despues_de (optional): Último objeto de la página anterior
+                (o tupla (fecha_creacion, id)). None = primera página.
+            limite (int, optional): Tamaño de la página. Defaults to 100.
+            
+        Returns:
+            list: Lista de objetos Planilla (vacía al pasar la última página)
+            
+        Ejemplo:
+            pagina = Planilla.obtener_pagina(limite=50)
+            while pagina:
+                for planilla in pagina:
+                    print(planilla.numero_planilla)
+                pagina = Planilla.obtener_pagina(despues_de=pagina[-1], limite=50)
+        """
+        query = "SELECT * FROM planillas WHERE 1=1"
+        params = []
+        
+        if referencia_id:
+            query += " AND referencia_id = ?"
+            params.append(referencia_id)
+        
+        if estado:
+            query += " AND estado = ?"
+            params.append(estado)
         
-        return [cls(
-            id=fila['id'],
-            referencia_id=fila['referencia_id'],
-            numero_planilla=fila['numero_planilla'],
-            sucursal=fila['sucursal'],
-            cuenta_debito=fila['cuenta_debito'],
-            estado=fila['estado'],
-            archivo_excel=fila['archivo_excel'],
-            fecha_creacion=fila['fecha_creacion']
-        ) for fila in filas]
+        cursor = DatabaseConfig.cursor_keyset(despues_de)
+        if cursor:
+            query += " AND (fecha_creacion, id) < (?, ?)"
+            params.extend(cursor)
+        
+        query += " ORDER BY fecha_creacion DESC, id DESC LIMIT ?"
+        params.append(limite)
+        
+        return DatabaseConfig.ejecutar_query(query, params=tuple(params), fetch_all=True,
+                                             clase=cls)
+    
+    @classmethod
+    def iterar_todas(cls, referencia_id=None, estado=None, tamano_pagina=500):
+        """
+        Recorre las planillas de a páginas (generador, memoria constante).
+        
+        Mismos filtros que obtener_pagina(). Útil para exportar o procesar
+        tablas grandes sin armar una lista con todos los objetos.
+        
+        Yields:
+            Planilla: Un objeto por vez
+        """
+        return DatabaseConfig.iterar_paginas(
+            lambda despues_de, limite: cls.obtener_pagina(
+                referencia_id=referencia_id, estado=estado, despues_de=despues_de, limite=limite
+            ),
+            tamano_pagina
+        )
     
     def actualizar(self):
         """Actualiza la planilla en la base de datos"""
@@ -220,8 +292,8 @@ class Planilla:
         if modalidad_pago not in [2, 4, 6, 8]:
             raise ValueError("Modalidad de pago debe ser 2, 4, 6 u 8")
         
-        # Validar importe
-        if importe <= 0:
+        # Validar importe (NaN no es <= 0: hay que descartarlo aparte)
+        if not math.isfinite(importe) or importe <= 0:
             raise ValueError("El importe debe ser mayor a 0")
         
         # Insertar en la base de datos
@@ -240,19 +312,139 @@ class Planilla:
                        beneficiario, importe, cuenta_pago, modalidad_pago, marca_registracion,
                        fecha_emision, fecha_pago_diferido)
             )
+            self.invalidar_totales()
             return id_item
             
         except Exception as e:
             raise Exception(f"Error al agregar item: {e}")
     
-    def obtener_items(self):
+    def agregar_items_lote(self, items):
+        """
+        Agrega muchos items de una vez (por ejemplo, una planilla de sueldos).
+        
+        A diferencia de agregar_item(), que hace un INSERT + commit por item:
+        1. Valida TODAS las filas en una pasada y junta los errores
+        2. Inserta las filas válidas con un solo executemany
+        3. Todo en una sola transacción (un solo commit)
+        
+        Las filas inválidas NO frenan la carga: se informan en el resultado.
+        
+        Args:
+            items (iterable): Diccionarios con las mismas claves que los
+                argumentos de agregar_item() (tipo_documento, numero_documento,
+                identificacion_pago, beneficiario, importe, modalidad_pago, y
+                opcionalmente cuenta_pago, marca_registracion, fecha_emision,
+                fecha_pago_diferido)
+                
+        Returns:
+            ResultadoLote: IDs insertados, errores por fila y velocidad (filas/s)
+            
+        Ejemplo:
+            resultado = planilla.agregar_items_lote(filas_del_excel)
+            print(resultado)  # 1998 insertados, 2 con errores (15,320 filas/s)
+            for fila, error in resultado.errores:
+                print(f"Fila {fila}: {error}")
+        """
+        # Validar que la planilla esté en borrador
+        if not self.puede_editar():
+            raise ValueError("Solo se pueden agregar items a planillas en borrador")
+        
+        inicio = time.perf_counter()
+        resultado = ResultadoLote()
+        
+        # 1. Validar todas las filas (una sola pasada)
+        filas = []
+        for posicion, item in enumerate(items, start=1):
+            resultado.total += 1
+            
+            try:
+                # Las celdas de Excel/pandas traen números como float:
+                # 6.0 vale, 6.7 no (int() lo truncaría a 6 sin avisar)
+                modalidad = float(item['modalidad_pago'])
+                if not modalidad.is_integer() or int(modalidad) not in [2, 4, 6, 8]:
+                    raise ValueError("Modalidad de pago debe ser 2, 4, 6 u 8")
+                modalidad_pago = int(modalidad)
+                
+                # NaN e infinito pasan el "<= 0": se rechazan aparte
+                importe = float(item['importe'])
+                if not math.isfinite(importe) or importe <= 0:
+                    raise ValueError("El importe debe ser un número mayor a 0")
+                
+                filas.append((
+                    self.id, item['tipo_documento'], item['numero_documento'],
+                    item['identificacion_pago'], item['beneficiario'], importe,
+                    item.get('cuenta_pago'), modalidad_pago,
+                    item.get('marca_registracion'), item.get('fecha_emision'),
+                    item.get('fecha_pago_diferido')
+                ))
+            except KeyError as e:
+                resultado.errores.append((posicion, f"Falta el campo {e}"))
+            except (TypeError, ValueError) as e:
+                resultado.errores.append((posicion, str(e)))
+        
+        # 2. Insertar las filas válidas en una sola transacción
+        if filas:
+            query = """
+                INSERT INTO items_planilla 
+                (planilla_id, tipo_documento, numero_documento, identificacion_pago,
+                 beneficiario, importe, cuenta_pago, modalidad_pago, marca_registracion,
+                 fecha_emision, fecha_pago_diferido)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """
+            
+            try:
+                with DatabaseConfig.transaccion():
+                    # Con el lock de escritura tomado, los IDs nuevos son
+                    # los siguientes al último existente
+                    fila = DatabaseConfig.ejecutar_query(
+                        "SELECT COALESCE(MAX(id), 0) as ultimo FROM items_planilla",
+                        fetch_one=True
+                    )
+                    
+                    DatabaseConfig.ejecutar_muchos(query, filas)
+                    
+                    filas_ids = DatabaseConfig.ejecutar_query(
+                        "SELECT id FROM items_planilla WHERE id > ? ORDER BY id",
+                        params=(fila['ultimo'],),
+                        fetch_all=True
+                    )
+                    resultado.ids = [f['id'] for f in filas_ids]
+                    
+            except Exception as e:
+                raise Exception(f"Error al agregar items: {e}")
+            finally:
+                self.invalidar_totales()
+        
+        resultado.duracion = time.perf_counter() - inicio
+        return resultado
+    
+    def obtener_items(self, como_objetos=False):
         """
         Obtiene todos los items de esta planilla.
         
+        Args:
+            como_objetos (bool, optional): Si True, devuelve objetos
+                ItemPlanilla (con __slots__: bastante menos memoria que un
+                dict por item en planillas grandes). Defaults to False.
+        
         Returns:
-            list: Lista de diccionarios con los items
+            list: Lista de diccionarios (o de ItemPlanilla) con los items
+            
+        Ejemplo:
+            for item in planilla.obtener_items(como_objetos=True):
+                if item.es_cheque():
+                    print(item.beneficiario, item.importe)
         """
         query = "SELECT * FROM items_planilla WHERE planilla_id = ? ORDER BY id"
+        
+        if como_objetos:
+            return DatabaseConfig.ejecutar_query(
+                query,
+                params=(self.id,),
+                fetch_all=True,
+                clase=ItemPlanilla
+            )
+        
         filas = DatabaseConfig.ejecutar_query(
             query,
             params=(self.id,),
@@ -280,6 +472,27 @@ class Planilla:
         
         return items
     
+    def iterar_items(self):
+        """
+        Recorre los items de la planilla de a uno, sin cargarlos todos.
+        
+        Pensado para exportar planillas enormes: usa un cursor de la base
+        de datos (memoria constante). Cada fila trae además el
+        'numero_cheque' del cheque vinculado (None si es transferencia
+        o si todavía no se asignó).
+        
+        Yields:
+            sqlite3.Row: Una fila de items_planilla + numero_cheque
+        """
+        query = """
+            SELECT i.*, c.numero_cheque
+            FROM items_planilla i
+            LEFT JOIN cheques_emitidos c ON c.id = i.cheque_id
+            WHERE i.planilla_id = ?
+            ORDER BY i.id
+        """
+        return DatabaseConfig.iterar_query(query, params=(self.id,))
+    
     def eliminar_item(self, item_id):
         """
         Elimina un item de la planilla.
@@ -295,38 +508,167 @@ class Planilla:
             DatabaseConfig.ejecutar_query(query, params=(item_id, self.id))
         except Exception as e:
             raise Exception(f"Error al eliminar item: {e}")
+        finally:
+            self.invalidar_totales()
     
     def contar_items(self):
         """
         Cuenta cuántos items tiene la planilla.
         
+        Usa el valor leído junto con la planilla. Si se invalidó (porque se
+        agregaron o borraron items), lo vuelve a leer de la tabla planillas:
+        es una columna que mantienen los triggers, no un COUNT(*).
+        
         Returns:
             int: Cantidad de items
         """
-        query = "SELECT COUNT(*) as count FROM items_planilla WHERE planilla_id = ?"
-        resultado = DatabaseConfig.ejecutar_query(
-            query,
-            params=(self.id,),
-            fetch_one=True
-        )
-        return resultado['count']
+        if self._cantidad_items is None:
+            self._cargar_totales()
+        return self._cantidad_items
     
     def calcular_total(self):
         """
         Calcula el total de importes de la planilla.
         
+        Igual que contar_items(): usa el cache si está.
+        
         Returns:
             float: Suma de todos los importes
         """
-        query = "SELECT SUM(importe) as total FROM items_planilla WHERE planilla_id = ?"
+        if self._total_importe is None:
+            self._cargar_totales()
+        return self._total_importe
+    
+    def calcular_total_cheques(self):
+        """
+        Total de los items que se pagan con cheque (modalidad 6 y 8).
+        
+        Returns:
+            float: Suma de los importes
+        """
+        if self._total_cheques is None:
+            self._cargar_totales()
+        return self._total_cheques
+    
+    def calcular_total_transferencias(self):
+        """
+        Total de los items que se pagan por transferencia (modalidad 2 y 4).
+        
+        Returns:
+            float: Suma de los importes
+        """
+        if self._total_transferencias is None:
+            self._cargar_totales()
+        return self._total_transferencias
+    
+    def _cargar_totales(self):
+        """Lee los totales de la fila de la planilla (O(1), no recorre items)"""
+        query = """
+            SELECT cantidad_items, total_importe, total_cheques, total_transferencias
+            FROM planillas WHERE id = ?
+        """
         resultado = DatabaseConfig.ejecutar_query(
             query,
             params=(self.id,),
             fetch_one=True
         )
         
-        total = resultado['total']
-        return float(total) if total else 0.0
+        self._cantidad_items = resultado['cantidad_items']
+        self._total_importe = float(resultado['total_importe'])
+        self._total_cheques = float(resultado['total_cheques'])
+        self._total_transferencias = float(resultado['total_transferencias'])
+    
+    @classmethod
+    def recalcular_agregados(cls, planilla_id=None):
+        """
+        Recalcula los totales guardados en planillas a partir de sus items.
+        
+        Los triggers los mantienen exactos, así que normalmente no corrige
+        nada. Sirve para reparar una base si se cargaron items con los
+        triggers desactivados, se restauró un backup viejo, etc.
+        
+        Pasos:
+        1. Calcular los totales reales (un GROUP BY sobre items_planilla)
+        2. Compararlos con los guardados
+        3. Corregir solo las planillas que difieren (en una transacción)
+        
+        Args:
+            planilla_id (int, optional): Solo esa planilla. None = todas.
+            
+        Returns:
+            dict: {'revisadas': int, 'corregidas': list de IDs corregidos}
+            
+        Ejemplo:
+            resultado = Planilla.recalcular_agregados()
+            print(f"Corregidas: {resultado['corregidas']}")
+        """
+        # 1. Totales reales
+        query = """
+            SELECT p.id, p.cantidad_items, p.total_importe,
+                   p.total_cheques, p.total_transferencias,
+                   COUNT(i.id) as real_cantidad,
+                   ROUND(COALESCE(SUM(i.importe), 0), 2) as real_importe,
+                   ROUND(COALESCE(SUM(CASE WHEN i.modalidad_pago IN (6, 8)
+                                      THEN i.importe END), 0), 2) as real_cheques,
+                   ROUND(COALESCE(SUM(CASE WHEN i.modalidad_pago IN (2, 4)
+                                      THEN i.importe END), 0), 2) as real_transferencias
+            FROM planillas p
+            LEFT JOIN items_planilla i ON i.planilla_id = p.id
+        """
+        params = None
+        if planilla_id is not None:
+            query += " WHERE p.id = ?"
+            params = (planilla_id,)
+        query += " GROUP BY p.id"
+        
+        filas = DatabaseConfig.ejecutar_query(query, params=params, fetch_all=True)
+        
+        # 2. Comparar (los importes, con tolerancia de medio centavo)
+        correcciones = []
+        for fila in filas:
+            distinta = (
+                fila['cantidad_items'] != fila['real_cantidad']
+                or abs(fila['total_importe'] - fila['real_importe']) >= 0.005
+                or abs(fila['total_cheques'] - fila['real_cheques']) >= 0.005
+                or abs(fila['total_transferencias'] - fila['real_transferencias']) >= 0.005
+            )
+            if distinta:
+                correcciones.append((
+                    fila['real_cantidad'], fila['real_importe'],
+                    fila['real_cheques'], fila['real_transferencias'], fila['id']
+                ))
+        
+        # 3. Corregir
+        if correcciones:
+            try:
+                with DatabaseConfig.transaccion():
+                    DatabaseConfig.ejecutar_muchos(
+                        """
+                        UPDATE planillas SET cantidad_items = ?, total_importe = ?,
+                               total_cheques = ?, total_transferencias = ?
+                        WHERE id = ?
+                        """,
+                        correcciones
+                    )
+            except Exception as e:
+                raise Exception(f"Error al recalcular totales: {e}")
+        
+        return {
+            'revisadas': len(filas),
+            'corregidas': [c[-1] for c in correcciones]
+        }
+    
+    def invalidar_totales(self):
+        """
+        Olvida la cantidad y el total en cache.
+        
+        La próxima llamada a contar_items() / calcular_total() consulta la base.
+        Lo llaman agregar_item(), agregar_items_lote() y eliminar_item().
+        """
+        self._cantidad_items = None
+        self._total_importe = None
+        self._total_cheques = None
+        self._total_transferencias = None
     
     # ========================================================================
     # MÉTODOS DE CAMBIO DE ESTADO
@@ -398,7 +740,59 @@ class Planilla:
             'archivo_excel': self.archivo_excel,
             'fecha_creacion': self.fecha_creacion,
             'cantidad_items': self.contar_items(),
-            'total_importe': self.calcular_total()
+            'total_importe': self.calcular_total(),
+            'total_cheques': self.calcular_total_cheques(),
+            'total_transferencias': self.calcular_total_transferencias()
+        }
+
+
+class ResultadoLote:
+    """
+    Resultado de una carga masiva de items (Planilla.agregar_items_lote).
+    
+    Atributos:
+        ids (list): IDs de los items insertados
+        errores (list): Tuplas (numero_de_fila, mensaje) de las filas rechazadas
+        total (int): Cantidad de filas recibidas
+        duracion (float): Segundos que tardó la carga
+    """
+    
+    def __init__(self):
+        """Constructor de la clase"""
+        self.ids = []
+        self.errores = []
+        self.total = 0
+        self.duracion = 0.0
+    
+    @property
+    def insertados(self):
+        """Cantidad de filas insertadas"""
+        return len(self.ids)
+    
+    @property
+    def filas_por_segundo(self):
+        """Velocidad de la carga (filas procesadas por segundo)"""
+        if self.duracion <= 0:
+            return 0.0
+        return self.total / self.duracion
+    
+    def tiene_errores(self):
+        """Verifica si alguna fila fue rechazada"""
+        return len(self.errores) > 0
+    
+    def __str__(self):
+        """Representación en string"""
+        return (f"{self.insertados} insertados, {len(self.errores)} con errores "
+                f"({self.filas_por_segundo:,.0f} filas/s)")
+    
+    def to_dict(self):
+        """Convierte el resultado a diccionario"""
+        return {
+            'insertados': self.insertados,
+            'errores': self.errores,
+            'total': self.total,
+            'duracion': self.duracion,
+            'filas_por_segundo': self.filas_por_segundo
         }
 
 
@@ -408,8 +802,16 @@ class ItemPlanilla:
     
     Esta clase es OPCIONAL - puedes trabajar con diccionarios directamente
     o usar esta clase si querés más estructura.
+    
+    Planilla.obtener_items(como_objetos=True) devuelve objetos de esta clase.
     """
     
+    # Sin __dict__ por instancia (ver el comentario en Cheque.__slots__)
+    __slots__ = ('id', 'planilla_id', 'tipo_documento', 'numero_documento',
+                 'identificacion_pago', 'beneficiario', 'importe', 'cuenta_pago',
+                 'modalidad_pago', 'marca_registracion', 'fecha_emision',
+                 'fecha_pago_diferido', 'cheque_id')
+    
     def __init__(self, id=None, planilla_id=None, tipo_documento=None,
                  numero_documento=None, identificacion_pago=None,
                  beneficiario=None, importe=None, cuenta_pago=None,
@@ -442,6 +844,10 @@ class ItemPlanilla:
         """Verifica si es diferido (modalidad 8)"""
         return self.modalidad_pago == 8
     
+    def to_dict(self):
+        """Convierte el item a diccionario (mismo formato que obtener_items())"""
+        return {nombre: getattr(self, nombre) for nombre in self.__slots__}
+    
     def __str__(self):
         """Representación en string"""
         tipo = "Cheque" if self.es_cheque() else "Transferencia"
@@ -456,6 +862,9 @@ def obtener_estadisticas():
     """
     Obtiene estadísticas generales de planillas.
     
+    Usa EstadisticasService: una sola consulta (GROUP BY estado) y cache
+    hasta la próxima escritura en la base.
+    
     Returns:
         dict: {
             'total_planillas': 10,
@@ -464,31 +873,17 @@ def obtener_estadisticas():
             'descargadas': 3
         }
     """
-    estadisticas = {
-        'total_planillas': 0,
-        'borradores': 0,
-        'generadas': 0,
-        'descargadas': 0
-    }
+    from services.estadisticas_service import EstadisticasService
     
-    # Total
-    query_total = "SELECT COUNT(*) as count FROM planillas"
-    resultado = DatabaseConfig.ejecutar_query(query_total, fetch_one=True)
-    estadisticas['total_planillas'] = resultado['count']
+    planillas = EstadisticasService.obtener()['planillas']
+    por_estado = planillas['por_estado']
     
-    # Por estado
-    for estado in [Planilla.ESTADO_BORRADOR, Planilla.ESTADO_GENERADA, Planilla.ESTADO_DESCARGADA]:
-        query = "SELECT COUNT(*) as count FROM planillas WHERE estado = ?"
-        resultado = DatabaseConfig.ejecutar_query(query, params=(estado,), fetch_one=True)
-        
-        if estado == Planilla.ESTADO_BORRADOR:
-            estadisticas['borradores'] = resultado['count']
-        elif estado == Planilla.ESTADO_GENERADA:
-            estadisticas['generadas'] = resultado['count']
-        else:
-            estadisticas['descargadas'] = resultado['count']
-    
-    return estadisticas
+    return {
+        'total_planillas': planillas['total'],
+        'borradores': por_estado[Planilla.ESTADO_BORRADOR],
+        'generadas': por_estado[Planilla.ESTADO_GENERADA],
+        'descargadas': por_estado[Planilla.ESTADO_DESCARGADA]
+    }
 
 
 # ============================================================================
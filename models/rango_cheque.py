@@ -6,7 +6,8 @@ Este modelo maneja los rangos de numeración de cheques.
 ============================================================================
 """
 
-from config.database import DatabaseConfig
+from config.database import DatabaseConfig, fabrica_filas
+from config.mapa_identidad import MapaIdentidad
 from datetime import datetime
 
 
@@ -15,6 +16,10 @@ class RangoCheque:
     Representa un rango de numeración de cheques.
     """
     
+    # Sin __dict__ por instancia (ver el comentario en Cheque.__slots__)
+    __slots__ = ('id', 'tipo', 'numero_orden', 'numero_inicial', 'numero_final',
+                 'cantidad_total', 'proximo_numero', 'activo', 'fecha_creacion')
+    
     def __init__(self, id=None, tipo=None, numero_orden=None, 
                  numero_inicial=None, numero_final=None, cantidad_total=None,
                  proximo_numero=None, activo=True, fecha_creacion=None):
@@ -29,6 +34,18 @@ class RangoCheque:
         self.activo = activo
         self.fecha_creacion = fecha_creacion
     
+    # Conversiones al armar el objeto desde una fila (ver fabrica_filas)
+    _CONVERSIONES_FILA = {'activo': bool}
+    
+    # Rangos ya leídos, por id (ver MapaIdentidad). Son pocos: entran todos.
+    # ChequeService también lo invalida al mover proximo_numero con SQL.
+    cache = MapaIdentidad('rangos_cheques', capacidad=32)
+    
+    @classmethod
+    def _desde_fila(cls, fila):
+        """Arma un objeto RangoCheque a partir de una fila de la base"""
+        return fabrica_filas(cls, fila.keys())(fila)
+    
     @classmethod
     def crear(cls, tipo, numero_orden, numero_inicial, numero_final):
         """
@@ -112,28 +129,18 @@ class RangoCheque:
         Obtiene un rango por su ID.
         
         ⚠️ CORRECCIÓN: Tabla y nombres de campos correctos
+        
+        Los ya leídos salen de RangoCheque.cache: el objeto es compartido
+        con los demás que lo pidieron. Para mover proximo_numero usar
+        obtener_siguiente_numero() o actualizar(), no asignarlo a mano.
         """
         query = "SELECT * FROM rangos_cheques WHERE id = ?"
-        fila = DatabaseConfig.ejecutar_query(
+        return cls.cache.obtener(id, lambda: DatabaseConfig.ejecutar_query(
             query,
             params=(id,),
-            fetch_one=True
-        )
-        
-        if fila:
-            return cls(
-                id=fila['id'],
-                tipo=fila['tipo'],
-                numero_orden=fila['numero_orden'], 
-                numero_inicial=fila['numero_inicial'],
-                numero_final=fila['numero_final'],
-                cantidad_total=fila['cantidad_total'],
-                proximo_numero=fila['proximo_numero'],
-                activo=bool(fila['activo']),
-                fecha_creacion=fila['fecha_creacion']
-            )
-        
-        return None
+            fetch_one=True,
+            clase=cls
+        ))
     
     @classmethod
     def obtener_todos(cls, tipo=None, solo_activos=True):
@@ -157,19 +164,8 @@ class RangoCheque:
         # Ordenar por tipo y numero_orden
         query += " ORDER BY tipo, numero_orden"
         
-        filas = DatabaseConfig.ejecutar_query(query, params=tuple(params) if params else None, fetch_all=True)
-        
-        return [cls(
-            id=fila['id'],
-            tipo=fila['tipo'],
-            numero_orden=fila['numero_orden'], 
-            numero_inicial=fila['numero_inicial'],
-            numero_final=fila['numero_final'],
-            cantidad_total=fila['cantidad_total'],
-            proximo_numero=fila['proximo_numero'],
-            activo=bool(fila['activo']),
-            fecha_creacion=fila['fecha_creacion']
-        ) for fila in filas]
+        return DatabaseConfig.ejecutar_query(query, params=tuple(params) if params else None,
+                                             fetch_all=True, clase=cls)
     
     @classmethod
     def obtener_rango_activo(cls, tipo):
@@ -177,45 +173,30 @@ class RangoCheque:
         Obtiene el primer rango activo con números disponibles.
         
         ⚠️ CORRECCIÓN COMPLETA: Lógica correcta de selección
+        
+        La elección la hace la query (un rango sin usar, con proximo_numero
+        NULL, empieza en numero_inicial): no se modifica ningún objeto,
+        ni los que están en RangoCheque.cache.
         """
-        # Buscar rangos activos del tipo especificado, ordenados por prioridad
+        # El primer rango activo del tipo, por prioridad, que tenga números
         query = """
-            SELECT * FROM rangos_cheques 
+            SELECT id, tipo, numero_orden, numero_inicial, numero_final,
+                   cantidad_total, activo, fecha_creacion,
+                   COALESCE(proximo_numero, numero_inicial) AS proximo_numero
+            FROM rangos_cheques 
             WHERE tipo = ? AND activo = 1
+            AND COALESCE(proximo_numero, numero_inicial) <= numero_final
             ORDER BY numero_orden ASC
+            LIMIT 1
         """
         
-        filas = DatabaseConfig.ejecutar_query(
+        # None si no hay rangos disponibles
+        return DatabaseConfig.ejecutar_query(
             query,
             params=(tipo.lower(),),
-            fetch_all=True
+            fetch_one=True,
+            clase=cls
         )
-        
-        # Buscar el primer rango con números disponibles
-        for fila in filas:
-            proximo = fila['proximo_numero']
-            final = fila['numero_final']
-            
-            # Si proximo_numero es None, usar numero_inicial
-            if proximo is None:
-                proximo = fila['numero_inicial']
-            
-            # Verificar si tiene disponibles
-            if proximo <= final:
-                return cls(
-                    id=fila['id'],
-                    tipo=fila['tipo'],
-                    numero_orden=fila['numero_orden'], 
-                    numero_inicial=fila['numero_inicial'],
-                    numero_final=fila['numero_final'],
-                    cantidad_total=fila['cantidad_total'],
-                    proximo_numero=proximo,
-                    activo=bool(fila['activo']),
-                    fecha_creacion=fila['fecha_creacion']
-                )
-        
-        # No hay rangos disponibles
-        return None
     
     def actualizar(self):
         """
@@ -241,6 +222,8 @@ class RangoCheque:
             )
         except Exception as e:
             raise Exception(f"Error al actualizar rango: {e}")
+        finally:
+            self.cache.invalidar(self.id)
     
     def desactivar(self):
         """Marca el rango como inactivo - ✅ ESTE ESTABA BIEN"""
@@ -311,44 +294,45 @@ class RangoCheque:
         2. Obtiene el número actual
         3. Incrementa proximo_numero en la BD
         4. Retorna el número
+        
+        El número sale de la BASE, no de self.proximo_numero: el objeto
+        puede ser el de RangoCheque.cache (compartido) o estar viejo, y
+        dos objetos del mismo rango no deben entregar el mismo número.
         """
         # 1. Verificar que esté activo
         if not self.activo:
             raise ValueError(f"El rango {self.tipo} #{self.numero_orden} está inactivo")
         
-        # 2. Obtener proximo_numero
-        if self.proximo_numero is None:
-            self.proximo_numero = self.numero_inicial
-        
-        numero_actual = self.proximo_numero
-        
-        # 3. Verificar que tenga disponibles
-        if numero_actual > self.numero_final:
-            raise ValueError(f"El rango {self.tipo} #{self.numero_orden} está agotado")
-        
-        # 4. Incrementar proximo_numero en la BD
-        nuevo_proximo = numero_actual + 1
-        
+        # 2 y 3. Incrementar proximo_numero en la BD y leerlo en UNA
+        # sentencia (si está agotado, no cambia nada y no devuelve fila)
         query = """
             UPDATE rangos_cheques 
-            SET proximo_numero = ?
-            WHERE id = ?
+            SET proximo_numero = COALESCE(proximo_numero, numero_inicial) + 1
+            WHERE id = ? AND COALESCE(proximo_numero, numero_inicial) <= numero_final
+            RETURNING proximo_numero
         """
         
         try:
-            DatabaseConfig.ejecutar_query(
-                query,
-                params=(nuevo_proximo, self.id)
-            )
-            
-            # Actualizar el objeto en memoria
-            self.proximo_numero = nuevo_proximo
-            
-            # 5. Retornar el número asignado
-            return numero_actual
-            
+            # En una transacción: el commit recién después de leer el RETURNING
+            with DatabaseConfig.transaccion():
+                fila = DatabaseConfig.ejecutar_query(
+                    query,
+                    params=(self.id,),
+                    fetch_one=True
+                )
         except Exception as e:
             raise Exception(f"Error al obtener siguiente número: {e}")
+        finally:
+            self.cache.invalidar(self.id)
+        
+        if fila is None:
+            raise ValueError(f"El rango {self.tipo} #{self.numero_orden} está agotado")
+        
+        # 4. Actualizar el objeto en memoria con lo que quedó en la base
+        self.proximo_numero = fila[0]
+        
+        # 5. Retornar el número asignado
+        return self.proximo_numero - 1
     
     def __str__(self):
         """Representación en string"""
@@ -14,7 +14,8 @@ CONCEPTOS CLAVE:
 ============================================================================
 """
 
-from config.database import DatabaseConfig
+from config.database import DatabaseConfig, fabrica_filas
+from config.mapa_identidad import MapaIdentidad
 from utils.validators import validar_referencia
 from datetime import datetime
 
@@ -31,6 +32,9 @@ class Referencia:
         activa (bool): Si está activa o no
     """
     
+    # Sin __dict__ por instancia (ver el comentario en Cheque.__slots__)
+    __slots__ = ('id', 'codigo', 'descripcion', 'fecha_creacion', 'activa')
+    
     def __init__(self, id=None, codigo=None, descripcion=None, 
                  fecha_creacion=None, activa=True):
         """
@@ -53,6 +57,18 @@ class Referencia:
     # MÉTODOS DE CLASE (CREATE, READ)
     # ========================================================================
     
+    # Conversiones al armar el objeto desde una fila (ver fabrica_filas)
+    _CONVERSIONES_FILA = {'activa': bool}
+    
+    # Referencias ya leídas, por id (ver MapaIdentidad). Cada planilla
+    # pide la suya al crearse, al mostrarse y al generar el Excel.
+    cache = MapaIdentidad('referencias', capacidad=512)
+    
+    @classmethod
+    def _desde_fila(cls, fila):
+        """Arma un objeto Referencia a partir de una fila de la base"""
+        return fabrica_filas(cls, fila.keys())(fila)
+    
     @classmethod
     def crear(cls, codigo, descripcion=''):
         """
@@ -138,6 +154,9 @@ class Referencia:
         
         Este es un método de LECTURA (la R en CRUD).
         
+        Las referencias ya leídas salen de Referencia.cache sin consultar
+        la base (y es siempre el mismo objeto para el mismo ID).
+        
         Args:
             id (int): ID de la referencia
             
@@ -150,22 +169,12 @@ class Referencia:
                 print(ref.codigo)
         """
         query = "SELECT * FROM referencias WHERE id = ?"
-        fila = DatabaseConfig.ejecutar_query(
+        return cls.cache.obtener(id, lambda: DatabaseConfig.ejecutar_query(
             query,
             params=(id,),
-            fetch_one=True
-        )
-        
-        if fila:
-            return cls(
-                id=fila['id'],
-                codigo=fila['codigo'],
-                descripcion=fila['descripcion'],
-                fecha_creacion=fila['fecha_creacion'],
-                activa=bool(fila['activa'])
-            )
-        
-        return None
+            fetch_one=True,
+            clase=cls
+        ))
     
     @classmethod
     def obtener_por_codigo(cls, codigo):
@@ -186,23 +195,21 @@ class Referencia:
         )
         
         if fila:
-            return cls(
-                id=fila['id'],
-                codigo=fila['codigo'],
-                descripcion=fila['descripcion'],
-                fecha_creacion=fila['fecha_creacion'],
-                activa=bool(fila['activa'])
-            )
+            return cls._desde_fila(fila)
         
         return None
     
     @classmethod
-    def obtener_todas(cls, solo_activas=True):
+    def obtener_todas(cls, solo_activas=True, limite=None, desplazamiento=0):
         """
         Obtiene todas las referencias de la base de datos.
         
+        Con limite se obtiene solo una página (para listas grandes en la UI).
+        
         Args:
             solo_activas (bool, optional): Si True, solo activas. Defaults to True.
+            limite (int, optional): Cantidad máxima de filas. None = todas.
+            desplazamiento (int, optional): Filas a saltear. Defaults to 0.
             
         Returns:
             list: Lista de objetos Referencia
@@ -211,79 +218,211 @@ class Referencia:
             todas = Referencia.obtener_todas()
             for ref in todas:
                 print(f"{ref.codigo} - {ref.descripcion}")
+            
+            # Filas 100 a 199
+            pagina = Referencia.obtener_todas(limite=100, desplazamiento=100)
         """
         query = "SELECT * FROM referencias"
         if solo_activas:
             query += " WHERE activa = 1"
-        query += " ORDER BY fecha_creacion DESC"
+        # id desempata las fechas iguales: el orden es estable entre páginas
+        query += " ORDER BY fecha_creacion DESC, id DESC"
         
-        filas = DatabaseConfig.ejecutar_query(query, fetch_all=True)
+        params = None
+        if limite is not None:
+            query += " LIMIT ? OFFSET ?"
+            params = (limite, desplazamiento)
         
-        # Convertir filas en objetos Referencia
-        return [cls(
-            id=fila['id'],
-            codigo=fila['codigo'],
-            descripcion=fila['descripcion'],
-            fecha_creacion=fila['fecha_creacion'],
-            activa=bool(fila['activa'])
-        ) for fila in filas]
+        return DatabaseConfig.ejecutar_query(query, params=params, fetch_all=True,
+                                             clase=cls)
+    
+    @classmethod
+    def obtener_pagina(cls, solo_activas=True, despues_de=None, limite=100):
+        """
+        Obtiene una página de referencias, de la más nueva a la más vieja.
+        
+        Usa paginación por keyset (ver DatabaseConfig.cursor_keyset):
+        cada página cuesta lo mismo sin importar qué tan lejos esté.
+        
+        Args:
+            solo_activas (bool, optional): Si True, solo activas. Defaults to True.
+            despues_de (optional): Último objeto de la página anterior
+                (o tupla (fecha_creacion, id)). None = primera página.
+            limite (int, optional): Tamaño de la página. Defaults to 100.
+            
+        Returns:
+            list: Lista de objetos Referencia (vacía al pasar la última página)
+            
+        Ejemplo:
+            pagina = Referencia.obtener_pagina(limite=50)
+            while pagina:
+                for ref in pagina:
+                    print(ref.codigo)
+                pagina = Referencia.obtener_pagina(despues_de=pagina[-1], limite=50)
+        """
+        query = "SELECT * FROM referencias WHERE 1=1"
+        params = []
+        
+        if solo_activas:
+            query += " AND activa = 1"
+        
+        cursor = DatabaseConfig.cursor_keyset(despues_de)
+        if cursor:
+            query += " AND (fecha_creacion, id) < (?, ?)"
+            params.extend(cursor)
+        
+        query += " ORDER BY fecha_creacion DESC, id DESC LIMIT ?"
+        params.append(limite)
+        
+        return DatabaseConfig.ejecutar_query(query, params=tuple(params), fetch_all=True,
+                                             clase=cls)
+    
+    @classmethod
+    def iterar_todas(cls, solo_activas=True, tamano_pagina=500):
+        """
+        Recorre referencias de a páginas (generador, memoria constante).
+        
+        Mismos filtros que obtener_pagina(). Útil para exportar o procesar
+        tablas grandes sin armar una lista con todos los objetos.
+        
+        Yields:
+            Referencia: Un objeto por vez
+        """
+        return DatabaseConfig.iterar_paginas(
+            lambda despues_de, limite: cls.obtener_pagina(
+                solo_activas=solo_activas, despues_de=despues_de, limite=limite
+            ),
+            tamano_pagina
+        )
+    
+    @classmethod
+    def contar_todas(cls, solo_activas=True):
+        """
+        Cuenta las referencias (sin traerlas).
+        
+        Args:
+            solo_activas (bool, optional): Si True, solo activas. Defaults to True.
+            
+        Returns:
+            int: Cantidad de referencias
+        """
+        query = "SELECT COUNT(*) as total FROM referencias"
+        if solo_activas:
+            query += " WHERE activa = 1"
+        
+        resultado = DatabaseConfig.ejecutar_query(query, fetch_one=True)
+        return resultado['total']
     
     @classmethod
     def generar_siguiente_codigo(cls, prefijo):
         """
-        Genera el siguiente código de referencia basado en un prefijo.
+        Muestra cuál sería el siguiente código para un prefijo (SIN reservarlo).
         
-        IMPORTANTE: Esta función es clave para evitar códigos duplicados.
+        Sirve para la vista previa de la UI. Para crear una referencia usar
+        crear_con_prefijo() (o reservar_codigos()): entre esta consulta y
+        el alta otro usuario puede llevarse el mismo número.
         
         Lógica:
-        1. Busca el último código con ese prefijo
-        2. Si existe, toma la parte numérica y le suma 1
-        3. Si no existe, empieza en 1
-        4. Formatea con 7 dígitos (con ceros a la izquierda)
+        1. Lee el último número del prefijo en secuencias_referencia
+           (una búsqueda por clave primaria, sin LIKE ni ORDER BY)
+        2. Le suma 1 (si el prefijo nunca se usó, empieza en 1)
+        3. Formatea con 7 dígitos (con ceros a la izquierda)
         
         Args:
-            prefijo (str): Las 5 letras del código (Ej: "LABSEM")
+            prefijo (str): Las 5 letras del código (Ej: "LABSE")
             
         Returns:
-            str: Código completo generado (Ej: "LABSEM0000119")
+            str: Código completo (Ej: "LABSE0000119")
             
         Raises:
             ValueError: Si el prefijo no tiene 5 letras
             
         Ejemplo:
-            # Si existe LABSEM0000118
-            nuevo = Referencia.generar_siguiente_codigo("LABSEM")
-            print(nuevo)  # Output: LABSEM0000119
+            # Si existe LABSE0000118
+            nuevo = Referencia.generar_siguiente_codigo("LABSE")
+            print(nuevo)  # Output: LABSE0000119
         """
-        # Validar prefijo
-        prefijo = prefijo.upper().strip()
-        if len(prefijo) != 5 or not prefijo.isalpha():
-            raise ValueError("El prefijo debe tener exactamente 5 letras")
+        prefijo = cls._validar_prefijo(prefijo)
         
-        # Buscar el último código con ese prefijo
-        query = """
-            SELECT codigo FROM referencias 
-            WHERE codigo LIKE ? 
-            ORDER BY codigo DESC 
-            LIMIT 1
+        ultimo = DatabaseConfig.valor_secuencia(
+            prefijo, tabla='secuencias_referencia', columna='prefijo'
+        )
+        
+        # Formatear con 7 dígitos. Ejemplo: 118 → 0000118
+        return cls._formatear_codigo(prefijo, ultimo + 1)
+    
+    @classmethod
+    def reservar_codigos(cls, prefijo, cantidad=1):
         """
-        resultado = DatabaseConfig.ejecutar_query(
-            query,
-            params=(f"{prefijo}%",),
-            fetch_one=True
+        Reserva N códigos consecutivos de un prefijo, de forma atómica.
+        
+        Usa el contador del prefijo en secuencias_referencia con
+        DatabaseConfig.reservar_valores(): UNA sola sentencia que lo crea si
+        el prefijo es nuevo, le suma la cantidad y devuelve el nuevo último
+        número. Dos usuarios (o procesos) nunca reciben el mismo número.
+        
+        Los números reservados que no se usen quedan "salteados"; no se
+        vuelven a entregar.
+        
+        Args:
+            prefijo (str): Las 5 letras del código
+            cantidad (int, optional): Cuántos códigos reservar. Defaults to 1.
+            
+        Returns:
+            list: Códigos reservados, en orden (Ej: ['LABSE0000119', 'LABSE0000120'])
+            
+        Raises:
+            ValueError: Si el prefijo es inválido, la cantidad es menor a 1
+                o el prefijo se queda sin números (más de 9999999)
+            
+        Ejemplo:
+            codigos = Referencia.reservar_codigos("LABSE", 50)
+        """
+        prefijo = cls._validar_prefijo(prefijo)
+        
+        # maximo: 7 dígitos. Si el prefijo se pasa, no se reserva nada.
+        numeros = DatabaseConfig.reservar_valores(
+            prefijo, cantidad,
+            tabla='secuencias_referencia', columna='prefijo',
+            maximo=9999999
         )
+        return [cls._formatear_codigo(prefijo, numero) for numero in numeros]
+    
+    @classmethod
+    def crear_con_prefijo(cls, prefijo, descripcion=''):
+        """
+        Crea una referencia con el siguiente código libre del prefijo.
         
-        if resultado:
-            # Extraer la parte numérica (últimos 7 caracteres)
-            parte_numerica = int(resultado['codigo'][5:])
-            nueva_parte_numerica = parte_numerica + 1
-        else:
-            # Es la primera con este prefijo
-            nueva_parte_numerica = 1
+        Reserva el número y da el alta en la misma transacción: si el
+        alta falla, el número no se consume.
         
-        # Formatear con 7 dígitos (completar con ceros a la izquierda)
-        # Ejemplo: 118 → 0000118
-        return f"{prefijo}{nueva_parte_numerica:07d}"
+        Args:
+            prefijo (str): Las 5 letras del código
+            descripcion (str, optional): Descripción. Defaults to ''.
+            
+        Returns:
+            Referencia: Objeto con la referencia creada
+            
+        Ejemplo:
+            ref = Referencia.crear_con_prefijo("LABSE", "Laboratorio Seminario")
+            print(ref.codigo)  # LABSE0000119
+        """
+        with DatabaseConfig.transaccion():
+            codigo = cls.reservar_codigos(prefijo)[0]
+            return cls.crear(codigo, descripcion)
+    
+    @staticmethod
+    def _validar_prefijo(prefijo):
+        """Normaliza el prefijo (mayúsculas) y verifica que sean 5 letras"""
+        prefijo = prefijo.upper().strip()
+        if len(prefijo) != 5 or not prefijo.isalpha():
+            raise ValueError("El prefijo debe tener exactamente 5 letras")
+        return prefijo
+    
+    @staticmethod
+    def _formatear_codigo(prefijo, numero):
+        """Prefijo + número con 7 dígitos: ('LABSE', 118) → 'LABSE0000118'"""
+        return f"{prefijo}{numero:07d}"
     
     # ========================================================================
     # MÉTODOS DE INSTANCIA (UPDATE, DELETE)
@@ -321,6 +460,9 @@ class Referencia:
             )
         except Exception as e:
             raise Exception(f"Error al actualizar referencia: {e}")
+        finally:
+            # También si falló: el objeto ya puede tener los cambios sin guardar
+            self.cache.invalidar(self.id)
     
     def desactivar(self):
         """
@@ -379,6 +521,7 @@ class Referencia:
         
         try:
             DatabaseConfig.ejecutar_query(query, params=(self.id,))
+            self.cache.invalidar(self.id)
             self.id = None  # Marcar como eliminada
         except Exception as e:
             raise Exception(f"Error al eliminar referencia: {e}")
@@ -469,12 +612,14 @@ class Referencia:
 # FUNCIONES DE UTILIDAD
 # ============================================================================
 
-def buscar_referencias(termino):
+def buscar_referencias(termino, limite=None, desplazamiento=0):
     """
     Busca referencias por código o descripción.
     
     Args:
         termino (str): Término de búsqueda
+        limite (int, optional): Cantidad máxima de filas. None = todas.
+        desplazamiento (int, optional): Filas a saltear. Defaults to 0.
         
     Returns:
         list: Lista de referencias que coinciden
@@ -487,25 +632,72 @@ def buscar_referencias(termino):
     query = """
         SELECT * FROM referencias 
         WHERE codigo LIKE ? OR descripcion LIKE ?
-        ORDER BY fecha_creacion DESC
+        ORDER BY fecha_creacion DESC, id DESC
     """
     
     # Agregar % para búsqueda parcial
     termino_busqueda = f"%{termino.upper()}%"
+    params = (termino_busqueda, termino_busqueda)
     
-    filas = DatabaseConfig.ejecutar_query(
+    if limite is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += (limite, desplazamiento)
+    
+    return DatabaseConfig.ejecutar_query(
         query,
-        params=(termino_busqueda, termino_busqueda),
-        fetch_all=True
+        params=params,
+        fetch_all=True,
+        clase=Referencia
     )
+
+
+# LIKE de SQLite ignora mayúsculas solo en letras ASCII ('a' = 'A', pero
+# 'é' != 'É'): para comparar igual en memoria se pasan a mayúscula solo esas
+_MAYUSCULAS_ASCII = str.maketrans('abcdefghijklmnopqrstuvwxyz', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+
+def _patron_busqueda(termino):
+    """Lo que buscar_referencias() pone entre los % del LIKE"""
+    return termino.upper()
+
+
+def filtro_busqueda(termino):
+    """
+    Versión en memoria del WHERE de buscar_referencias().
     
-    return [Referencia(
-        id=fila['id'],
-        codigo=fila['codigo'],
-        descripcion=fila['descripcion'],
-        fecha_creacion=fila['fecha_creacion'],
-        activa=bool(fila['activa'])
-    ) for fila in filas]
+    Args:
+        termino (str): Término de búsqueda (sin comodines, ver refina_busqueda)
+        
+    Returns:
+        callable: coincide(referencia) → bool
+    """
+    patron = _patron_busqueda(termino)
+    
+    def coincide(referencia):
+        return (patron in referencia.codigo.translate(_MAYUSCULAS_ASCII)
+                or patron in (referencia.descripcion or '').translate(_MAYUSCULAS_ASCII))
+    
+    return coincide
+
+
+def refina_busqueda(anterior, nuevo):
+    """
+    Indica si los resultados de 'nuevo' están dentro de los de 'anterior'.
+    
+    Con LIKE '%...%' pasa cuando el término nuevo contiene al anterior
+    ("LAB" → "LABSE"). Si alguno tiene comodines de LIKE (% o _) no se
+    puede filtrar en memoria con filtro_busqueda(): hay que consultar.
+    
+    Args:
+        anterior (str): Término ya buscado
+        nuevo (str): Término nuevo
+        
+    Returns:
+        bool: True si alcanza con filtrar los resultados de 'anterior'
+    """
+    if any(comodin in anterior + nuevo for comodin in '%_'):
+        return False
+    return _patron_busqueda(anterior) in _patron_busqueda(nuevo)
 
 
 # ============================================================================
@@ -24,47 +24,96 @@ class ChequeService:
         Raises:
             ValueError: Si no hay rangos disponibles
         """
-        # Obtener rangos activos ordenados por prioridad
+        return ChequeService.reservar_bloque(tipo, 1)[0]
+    
+    @staticmethod
+    def reservar_bloque(tipo, cantidad):
+        """
+        Reserva N números de cheque consecutivos de una sola vez.
+        
+        Recorre los rangos activos UNA vez, en orden de prioridad
+        (numero_orden). Si un rango no alcanza, toma lo que queda y sigue
+        con el siguiente. Hace un solo UPDATE por rango usado, en vez de
+        uno por cheque.
+        
+        Todo ocurre en una transacción: si no alcanzan los números,
+        no se consume ninguno.
+        
+        Args:
+            tipo (str): 'diferido' o 'comun'
+            cantidad (int): Cuántos números reservar
+            
+        Returns:
+            list: Los números reservados, en orden de uso
+            
+        Raises:
+            ValueError: Si no hay rangos o no alcanzan los números disponibles
+            
+        Ejemplo:
+            # Rango 1: quedan 91181842 y 91181843 / Rango 2: empieza en 95000000
+            ChequeService.reservar_bloque('diferido', 3)
+            # → [91181842, 91181843, 95000000]
+        """
+        if cantidad < 1:
+            raise ValueError("La cantidad a reservar debe ser al menos 1")
+        
         query = """
             SELECT * FROM rangos_cheques 
             WHERE tipo = ? AND activo = 1 
             ORDER BY numero_orden ASC
         """
-        rangos = DatabaseConfig.ejecutar_query(
-            query,
-            params=(tipo,),
-            fetch_all=True
-        )
-        
-        if not rangos:
-            raise ValueError(f"No hay rangos disponibles para cheques {tipo}")
+        query_update = """
+            UPDATE rangos_cheques 
+            SET proximo_numero = ? 
+            WHERE id = ?
+        """
         
-        # Buscar el primer rango con números disponibles
-        for rango in rangos:
-            proximo = rango['proximo_numero']
-            final = rango['numero_final']
+        with DatabaseConfig.transaccion():
+            rangos = DatabaseConfig.ejecutar_query(
+                query,
+                params=(tipo,),
+                fetch_all=True
+            )
             
-            if proximo is None:
-                # Primera vez que se usa este rango
-                proximo = rango['numero_inicial']
+            if not rangos:
+                raise ValueError(f"No hay rangos disponibles para cheques {tipo}")
             
-            if proximo <= final:
-                # Hay números disponibles en este rango
-                # Actualizar el próximo número
-                query_update = """
-                    UPDATE rangos_cheques 
-                    SET proximo_numero = ? 
-                    WHERE id = ?
-                """
+            numeros = []
+            faltan = cantidad
+            
+            for rango in rangos:
+                proximo = rango['proximo_numero']
+                final = rango['numero_final']
+                
+                if proximo is None:
+                    # Primera vez que se usa este rango
+                    proximo = rango['numero_inicial']
+                
+                disponibles = final - proximo + 1
+                if disponibles <= 0:
+                    continue
+                
+                # Tomar lo que necesitamos (o todo lo que queda en el rango)
+                tomados = min(disponibles, faltan)
+                numeros.extend(range(proximo, proximo + tomados))
+                
                 DatabaseConfig.ejecutar_query(
                     query_update,
-                    params=(proximo + 1, rango['id'])
+                    params=(proximo + tomados, rango['id'])
                 )
+                RangoCheque.cache.invalidar(rango['id'])
                 
-                return proximo
-        
-        # Si llegamos aquí, todos los rangos están agotados
-        raise ValueError(f"Todos los rangos de cheques {tipo} están agotados")
+                faltan -= tomados
+                if faltan == 0:
+                    return numeros
+            
+            # Si llegamos aquí, los rangos no alcanzan (la transacción se deshace)
+            if not numeros:
+                raise ValueError(f"Todos los rangos de cheques {tipo} están agotados")
+            raise ValueError(
+                f"No alcanzan los rangos de cheques {tipo}: "
+                f"se necesitan {cantidad} y quedan {len(numeros)}"
+            )
     
     @staticmethod
     def asignar_numeros_a_planilla(planilla_id, items_cheques):
@@ -73,6 +122,9 @@ class ChequeService:
         
         Solo se llama cuando se genera el Excel, no antes.
         
+        Todo ocurre en UNA transacción: si un rango se agota a la mitad,
+        no queda ningún número consumido ni ningún cheque creado.
+        
         Args:
             planilla_id (int): ID de la planilla
             items_cheques (list): Lista de items que son cheques
@@ -82,25 +134,36 @@ class ChequeService:
         """
         asignaciones = {}
         
+        # Agrupar los items por tipo de cheque (manteniendo el orden)
+        items_por_tipo = {}
         for item in items_cheques:
-            # Determinar tipo de cheque
             modalidad = item['modalidad_pago']
             tipo = 'diferido' if modalidad == 8 else 'comun'
+            items_por_tipo.setdefault(tipo, []).append(item)
+        
+        with DatabaseConfig.transaccion():
+            registros = []
             
-            # Obtener próximo número
-            numero = ChequeService.obtener_proximo_numero(tipo)
-            
-            # Crear registro de cheque
-            Cheque.crear(
-                numero_cheque=numero,
-                tipo=tipo,
-                planilla_id=planilla_id,
-                beneficiario=item['beneficiario'],
-                importe=item['importe'],
-                fecha_emision=item['fecha_emision'],
-                fecha_pago=item.get('fecha_pago_diferido')
-            )
+            for tipo, items in items_por_tipo.items():
+                # Un bloque de números para todos los items de este tipo
+                numeros = ChequeService.reservar_bloque(tipo, len(items))
+                
+                for item, numero in zip(items, numeros):
+                    registros.append({
+                        'numero_cheque': numero,
+                        'tipo': tipo,
+                        'planilla_id': planilla_id,
+                        'beneficiario': item['beneficiario'],
+                        'importe': item['importe'],
+                        'fecha_emision': item['fecha_emision'],
+                        'fecha_pago': item.get('fecha_pago_diferido'),
+                        'item_id': item['id']
+                    })
+                    
+                    asignaciones[item['id']] = numero
             
-            asignaciones[item['id']] = numero
+            # Crear todos los cheques de la planilla en un solo lote
+            # (y vincular items_planilla.cheque_id)
+            Cheque.crear_lote(registros)
         
         return asignaciones
\ No newline at end of file
@@ -0,0 +1,218 @@
+"""
+Servicio de configuración: lee la tabla configuracion UNA vez y la sirve
+desde memoria.
+
+La UI necesita los valores por defecto (sucursal, cuenta de débito...)
+cada vez que dibuja un formulario. Antes era una consulta por valor;
+acá la tabla entera (unas pocas filas) queda en un dict con los valores
+ya convertidos a su tipo, y solo se vuelve a leer cuando cambió:
+
+- Si se escribe con este servicio (guardar), el cache se actualiza solo.
+- Si escribe OTRA conexión (otro hilo u otro proceso, ej: una segunda
+  instancia de la app), SQLite cambia el PRAGMA data_version de la
+  conexión de este hilo. Se consulta como mucho cada
+  INTERVALO_VERIFICACION segundos (consultarlo en cada lectura costaría
+  tanto como leer el valor de la base) y si cambió se recarga.
+
+Uso:
+    sucursal = ConfiguracionService.obtener('sucursal_default')
+    ConfiguracionService.guardar('sucursal_default', '001')
+"""
+import threading
+import time
+
+from config.database import DatabaseConfig
+
+
+class ConfiguracionService:
+
+    # Tipo de cada clave (la columna valor es TEXT). Las que no están
+    # acá se devuelven como str.
+    TIPOS = {
+        'sucursal_default': str,
+        'cuenta_debito_default': str,
+        'version_db': str,
+    }
+
+    # Cada cuántos segundos se mira si otra conexión escribió. Lo que se
+    # guarda con este servicio se ve al instante.
+    INTERVALO_VERIFICACION = 1.0
+
+    # Textos que cuentan como True para las claves de tipo bool
+    _VERDADEROS = {'1', 'true', 'si', 'sí', 'yes'}
+
+    # Cache compartido: {clave: valor ya convertido}
+    _valores = None
+    _lock = threading.Lock()
+
+    # Por hilo: data_version que vio su conexión y cuándo lo miró
+    _hilo = threading.local()
+
+    # ========================================================================
+    # LECTURA (desde memoria)
+    # ========================================================================
+
+    @classmethod
+    def obtener(cls, clave, defecto=None):
+        """
+        Devuelve el valor de una clave, convertido a su tipo (ver TIPOS).
+
+        Args:
+            clave (str): Nombre de la configuración
+            defecto (optional): Qué devolver si la clave no existe
+
+        Returns:
+            El valor (str, int, float o bool según TIPOS), o defecto
+
+        Ejemplo:
+            cuenta = ConfiguracionService.obtener('cuenta_debito_default', '')
+        """
+        return cls._vigentes().get(clave, defecto)
+
+    @classmethod
+    def todas(cls):
+        """
+        Devuelve todas las configuraciones.
+
+        Returns:
+            dict: {clave: valor} (una copia: se puede modificar)
+        """
+        return dict(cls._vigentes())
+
+    # ========================================================================
+    # ESCRITURA (actualiza la base y el cache)
+    # ========================================================================
+
+    @classmethod
+    def guardar(cls, clave, valor, descripcion=None):
+        """
+        Guarda una configuración (la crea si no existe).
+
+        Args:
+            clave (str): Nombre de la configuración
+            valor: Valor a guardar (se convierte a texto)
+            descripcion (str, optional): Para qué sirve. Si no se indica,
+                se mantiene la que tenía.
+
+        Ejemplo:
+            ConfiguracionService.guardar('sucursal_default', '001')
+        """
+        cls.guardar_varias({clave: valor}, descripciones={clave: descripcion})
+
+    @classmethod
+    def guardar_varias(cls, valores, descripciones=None):
+        """
+        Guarda varias configuraciones en una sola transacción.
+
+        Si se llama dentro de una transaccion() ya abierta, el cache se
+        descarta en vez de actualizarse (ahora y al terminar la transacción).
+
+        Args:
+            valores (dict): {clave: valor}
+            descripciones (dict, optional): {clave: descripcion}
+        """
+        descripciones = descripciones or {}
+        query = """
+            INSERT INTO configuracion (clave, valor, descripcion) VALUES (?, ?, ?)
+            ON CONFLICT(clave) DO UPDATE SET
+                valor = excluded.valor,
+                descripcion = COALESCE(excluded.descripcion, descripcion)
+        """
+        params = [(clave, cls._a_texto(valor), descripciones.get(clave))
+                  for clave, valor in valores.items()]
+
+        anidada = DatabaseConfig.en_transaccion()
+        try:
+            with DatabaseConfig.transaccion():
+                DatabaseConfig.ejecutar_muchos(query, params)
+        except Exception as e:
+            cls.invalidar()
+            raise Exception(f"Error al guardar configuración: {e}")
+
+        if anidada:
+            # Otro hilo podría recargar los valores de antes del commit:
+            # descartar ahora y otra vez cuando termine la transacción
+            cls.invalidar()
+            DatabaseConfig.al_terminar_transaccion(cls.invalidar)
+            return
+
+        with cls._lock:
+            if cls._valores is None:
+                return
+
+            # Confirmado: actualizar en memoria (una escritura de esta
+            # conexión no cambia su data_version, no hace falta recargar)
+            nuevos = dict(cls._valores)
+            for clave, texto, _ in params:
+                nuevos[clave] = cls._convertir(clave, texto)
+            cls._valores = nuevos
+
+    @classmethod
+    def invalidar(cls):
+        """Descarta el cache (la próxima lectura vuelve a leer la tabla)"""
+        with cls._lock:
+            cls._valores = None
+
+    # ========================================================================
+    # AUXILIARES
+    # ========================================================================
+
+    @classmethod
+    def _vigentes(cls):
+        """
+        Devuelve el dict del cache, recargándolo si otra conexión escribió.
+
+        Entre verificaciones no toca la base: es solo leer un dict.
+
+        Dentro de una transaccion() lee la tabla sin guardarla en el
+        cache: puede tener cambios que todavía no se confirmaron.
+        """
+        if DatabaseConfig.en_transaccion():
+            return cls._cargar()
+
+        valores = cls._valores
+        ahora = time.monotonic()
+        verificado = getattr(cls._hilo, 'verificado', None)
+        if (valores is not None and verificado is not None
+                and ahora - verificado < cls.INTERVALO_VERIFICACION):
+            return valores
+
+        conn = DatabaseConfig.obtener_pool().obtener()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+
+        with cls._lock:
+            if cls._valores is None or getattr(cls._hilo, 'data_version', None) != data_version:
+                cls._valores = cls._cargar()
+            cls._hilo.data_version = data_version
+            cls._hilo.verificado = ahora
+            return cls._valores
+
+    @classmethod
+    def _cargar(cls):
+        """Lee la tabla configuracion completa"""
+        filas = DatabaseConfig.ejecutar_query(
+            "SELECT clave, valor FROM configuracion",
+            fetch_all=True
+        )
+        return {clave: cls._convertir(clave, valor) for clave, valor in filas}
+
+    @classmethod
+    def _convertir(cls, clave, texto):
+        """Texto de la base → valor del tipo de la clave"""
+        tipo = cls.TIPOS.get(clave, str)
+        if texto is None or tipo is str:
+            return texto
+        if tipo is bool:
+            return texto.strip().lower() in cls._VERDADEROS
+        try:
+            return tipo(texto)
+        except ValueError:
+            # Un valor mal cargado no tiene que romper toda la configuración
+            return None
+
+    @staticmethod
+    def _a_texto(valor):
+        """Valor → texto para la columna valor"""
+        if isinstance(valor, bool):
+            return '1' if valor else '0'
+        return '' if valor is None else str(valor)
@@ -0,0 +1,221 @@
+"""
+Servicio de estadísticas: contadores y totales de planillas y cheques.
+
+Antes cada contador era una consulta (un COUNT por estado, por tipo...).
+Acá se hace UNA consulta con GROUP BY por tabla, al nivel más fino
+(estado × tipo × referencia × mes), y el resto de los totales se arman
+sumando esas pocas filas en Python.
+
+El resultado queda en cache hasta que alguien escribe en la base
+(ver DatabaseConfig.version_datos): la UI puede pedirlo cada segundo
+y solo se recalcula cuando los datos cambiaron.
+
+La huella es de la conexión de cada hilo, así que cada hilo guarda la
+última que vio y solo compara contra esa: que la UI y los hilos del
+EjecutorTareas pidan las estadísticas alternadamente no las recalcula.
+"""
+import threading
+
+from config.database import DatabaseConfig
+
+
+class EstadisticasService:
+
+    # Cache compartido por todos los hilos
+    _cache = None
+    _lock = threading.Lock()
+
+    # Por hilo: última huella de los datos que vio su conexión
+    _hilo = threading.local()
+
+    @classmethod
+    def obtener(cls, forzar=False):
+        """
+        Devuelve todas las estadísticas (desde el cache si los datos no cambiaron).
+
+        Args:
+            forzar (bool, optional): Recalcular aunque no haya cambios.
+
+        Returns:
+            dict: {
+                'planillas': {
+                    'total': 10,
+                    'importe_total': 150000.0,
+                    'por_estado': {'borrador': 2, 'generada': 5, 'descargada': 3},
+                    'por_referencia': {'LABSEM0000118': {'cantidad': 4, 'importe': 60000.0}, ...},
+                    'por_mes': {'2024-05': {'cantidad': 6, 'importe': 90000.0}, ...}
+                },
+                'cheques': {
+                    'total': 120,
+                    'importe_total': 980000.0,
+                    'por_estado': {'emitido_pendiente': 80, ...},
+                    'por_tipo': {'comun': 70, 'diferido': 50},
+                    'por_tipo_estado': {'comun': {'emitido_pendiente': 40, ...}, ...},
+                    'por_referencia': {...},
+                    'por_mes': {...}
+                }
+            }
+
+            Los meses son 'AAAA-MM' de la fecha de creación.
+            El dict es compartido: no modificarlo.
+
+            Dentro de una transaccion() se calcula sin guardarlo en el
+            cache: esas filas pueden no confirmarse.
+
+        Ejemplo:
+            stats = EstadisticasService.obtener()
+            print(stats['cheques']['por_estado']['emitido_pendiente'])
+        """
+        if DatabaseConfig.en_transaccion():
+            # Un rollback no baja total_changes: si se guardara, la huella
+            # seguiría "vigente" con filas que ya no existen
+            return {
+                'planillas': cls._calcular_planillas(),
+                'cheques': cls._calcular_cheques()
+            }
+
+        version = DatabaseConfig.version_datos()
+
+        with cls._lock:
+            # Si la huella de ESTE hilo cambió desde su última llamada,
+            # alguien escribió (esta conexión u otra) desde entonces
+            if forzar or cls._cache is None or getattr(cls._hilo, 'version', None) != version:
+                cls._cache = {
+                    'planillas': cls._calcular_planillas(),
+                    'cheques': cls._calcular_cheques()
+                }
+            cls._hilo.version = version
+
+            return cls._cache
+
+    @classmethod
+    def invalidar(cls):
+        """Descarta el cache (la próxima llamada a obtener() recalcula)"""
+        with cls._lock:
+            cls._cache = None
+
+    @classmethod
+    def planillas_por_estado(cls):
+        """
+        Cantidad de planillas por estado (incluye los estados sin planillas).
+
+        Returns:
+            dict: {'borrador': 2, 'generada': 5, 'descargada': 3}
+        """
+        return cls.obtener()['planillas']['por_estado']
+
+    @classmethod
+    def cheques_por_estado(cls, tipo=None):
+        """
+        Cantidad de cheques por estado, opcionalmente de un solo tipo.
+
+        Args:
+            tipo (str, optional): 'comun' o 'diferido'. None = todos.
+
+        Returns:
+            dict: {'emitido_pendiente': 5, 'emitido_correcto': 3, ...}
+                  con TODOS los estados válidos (0 si no hay)
+        """
+        from models.cheque import Cheque
+
+        cheques = cls.obtener()['cheques']
+        if tipo is None:
+            return dict(cheques['por_estado'])
+
+        por_estado = cheques['por_tipo_estado'].get(tipo.lower(), {})
+        return {estado: por_estado.get(estado, 0) for estado in Cheque.ESTADOS_VALIDOS}
+
+    # ========================================================================
+    # CÁLCULO (una consulta por tabla)
+    # ========================================================================
+
+    @staticmethod
+    def _calcular_planillas():
+        """Una consulta con GROUP BY sobre planillas, agregada en Python"""
+        from models.planilla import Planilla
+
+        # total_importe es una columna mantenida por triggers:
+        # no hace falta recorrer items_planilla
+        query = """
+            SELECT p.estado,
+                   r.codigo as referencia,
+                   strftime('%Y-%m', p.fecha_creacion) as mes,
+                   COUNT(*) as cantidad,
+                   COALESCE(SUM(p.total_importe), 0) as importe
+            FROM planillas p
+            LEFT JOIN referencias r ON r.id = p.referencia_id
+            GROUP BY p.estado, p.referencia_id, mes
+        """
+        filas = DatabaseConfig.ejecutar_query(query, fetch_all=True)
+
+        estados = [Planilla.ESTADO_BORRADOR, Planilla.ESTADO_GENERADA, Planilla.ESTADO_DESCARGADA]
+        resultado = EstadisticasService._nuevo_resumen(estados)
+
+        for fila in filas:
+            EstadisticasService._acumular(resultado, fila)
+
+        return resultado
+
+    @staticmethod
+    def _calcular_cheques():
+        """Una consulta con GROUP BY sobre cheques_emitidos, agregada en Python"""
+        from models.cheque import Cheque
+
+        # Los cheques que salen de una planilla no guardan referencia_id:
+        # la referencia es la de su planilla
+        query = """
+            SELECT c.estado,
+                   c.tipo,
+                   r.codigo as referencia,
+                   strftime('%Y-%m', c.fecha_creacion) as mes,
+                   COUNT(*) as cantidad,
+                   COALESCE(SUM(c.importe), 0) as importe
+            FROM cheques_emitidos c
+            LEFT JOIN planillas p ON p.id = c.planilla_id
+            LEFT JOIN referencias r ON r.id = COALESCE(c.referencia_id, p.referencia_id)
+            GROUP BY c.estado, c.tipo, COALESCE(c.referencia_id, p.referencia_id), mes
+        """
+        filas = DatabaseConfig.ejecutar_query(query, fetch_all=True)
+
+        resultado = EstadisticasService._nuevo_resumen(Cheque.ESTADOS_VALIDOS)
+        resultado['por_tipo'] = {}
+        resultado['por_tipo_estado'] = {}
+
+        for fila in filas:
+            EstadisticasService._acumular(resultado, fila)
+
+            tipo = fila['tipo']
+            resultado['por_tipo'][tipo] = resultado['por_tipo'].get(tipo, 0) + fila['cantidad']
+
+            por_estado = resultado['por_tipo_estado'].setdefault(tipo, {})
+            por_estado[fila['estado']] = por_estado.get(fila['estado'], 0) + fila['cantidad']
+
+        return resultado
+
+    @staticmethod
+    def _nuevo_resumen(estados):
+        """Resumen vacío, con todos los estados en 0"""
+        return {
+            'total': 0,
+            'importe_total': 0.0,
+            'por_estado': {estado: 0 for estado in estados},
+            'por_referencia': {},
+            'por_mes': {}
+        }
+
+    @staticmethod
+    def _acumular(resultado, fila):
+        """Suma una fila del GROUP BY a los totales generales, por estado, referencia y mes"""
+        cantidad = fila['cantidad']
+        importe = float(fila['importe'])
+
+        resultado['total'] += cantidad
+        resultado['importe_total'] = round(resultado['importe_total'] + importe, 2)
+        resultado['por_estado'][fila['estado']] = (
+            resultado['por_estado'].get(fila['estado'], 0) + cantidad
+        )
+
+        for clave, valor in (('por_referencia', fila['referencia']), ('por_mes', fila['mes'])):
+            grupo = resultado[clave].setdefault(valor, {'cantidad': 0, 'importe': 0.0})
+            grupo['cantidad'] += cantidad
+            grupo['importe'] = round(grupo['importe'] + importe, 2)
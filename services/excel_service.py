@@ -1,104 +1,412 @@
 """
 Servicio para generar archivos Excel
 """
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
 from datetime import datetime
+from config.database import DatabaseConfig
 
 class ExcelService:
     
+    # Carpeta donde se guardan los Excel generados
+    CARPETA_SALIDA = "/home/claude/planillas_generadas"
+    
+    # Cómo arrancan los procesos de generar_planillas_lote. 'spawn' en
+    # todos los sistemas (en Windows y macOS ya es el default): con 'fork'
+    # el hijo sería una copia de un proceso con el loop de Tk y los hilos
+    # del EjecutorTareas a medio andar.
+    METODO_PROCESOS = 'spawn'
+    
+    # Encabezados del layout bancario (fila 3, desde la columna B)
+    ENCABEZADOS = [
+        "Tipo de documento",
+        "Número de documento",
+        "Sucursal",
+        "Identificación del pago",
+        "Denominación del beneficiario",
+        "Importe",
+        "Cuenta de débito",
+        "Cuenta de pago - CBU o Nº Cheque",
+        "Modalidad de Pago",
+        "Marca de registración de cheque",
+        "Fecha de pago - Emisión",
+        "Fecha de pago diferido"
+    ]
+    
     @staticmethod
-    def generar_planilla(planilla_id):
+    def generar_planilla(planilla_id, streaming=False):
         """
         Genera el archivo Excel de una planilla.
         
         Args:
             planilla_id (int): ID de la planilla
+            streaming (bool): Si True, escribe el Excel fila por fila
+                (modo write-only de openpyxl) leyendo los items con un
+                cursor. Usa memoria constante: recomendado para planillas
+                con decenas de miles de items.
             
         Returns:
             str: Ruta del archivo generado
+            
+        Raises:
+            ValueError: Si no existe la planilla
         """
         # 1. Obtener datos de la planilla
         from models.planilla import Planilla
         planilla = Planilla.obtener_por_id(planilla_id)
-        items = planilla.obtener_items()
+        if not planilla:
+            raise ValueError(f"No existe la planilla con ID {planilla_id}")
+        
+        if streaming:
+            return ExcelService._generar_planilla_streaming(planilla)
+        
+        # 2 a 8 van en UNA transacción: si falla el guardado del Excel,
+        # los números de cheque asignados se deshacen (todo o nada)
+        with DatabaseConfig.transaccion():
+            # 2. Asignar números de cheque (AQUÍ es cuando se asignan).
+            # Solo a los items sin cheque: al regenerar se reusan los que ya
+            # tienen, en vez de crear cheques nuevos.
+            ExcelService._asignar_numeros_pendientes(planilla)
+            
+            # 3. Crear el Excel
+            wb = Workbook()
+            ws = wb.active
+            ws.title = "Planilla de Pagos"
+            
+            # 4. Agregar encabezados (fila 3 según tu plantilla)
+            encabezados = ExcelService.ENCABEZADOS
+            
+            for col, header in enumerate(encabezados, start=2):
+                cell = ws.cell(row=3, column=col)
+                cell.value = header
+                cell.font = Font(bold=True)
+                cell.fill = PatternFill("solid", fgColor="4472C4")
+                cell.alignment = Alignment(horizontal="center", wrap_text=True)
+            
+            # 5. Agregar datos (numero_cheque viene del cheque vinculado)
+            fila = 4
+            for item in planilla.iterar_items():
+                ws.cell(fila, 2, item['tipo_documento'])
+                ws.cell(fila, 3, item['numero_documento'])
+                ws.cell(fila, 4, planilla.sucursal)
+                ws.cell(fila, 5, item['identificacion_pago'])
+                ws.cell(fila, 6, item['beneficiario'])
+                ws.cell(fila, 7, item['importe'])
+                ws.cell(fila, 8, planilla.cuenta_debito)
+                
+                # CBU o número de cheque
+                if item['modalidad_pago'] in [6, 8]:
+                    ws.cell(fila, 9, item['numero_cheque'])
+                else:
+                    ws.cell(fila, 9, item['cuenta_pago'])
+                
+                ws.cell(fila, 10, item['modalidad_pago'])
+                ws.cell(fila, 11, item['marca_registracion'])
+                ws.cell(fila, 12, item['fecha_emision'])
+                ws.cell(fila, 13, item['fecha_pago_diferido'])
+                
+                fila += 1
+            
+            # 6. Ajustar anchos de columna
+            for col in range(2, 14):
+                ws.column_dimensions[chr(64 + col)].width = 20
+            
+            # 7. Guardar archivo
+            filepath = ExcelService._ruta_archivo(planilla)
+            
+            wb.save(filepath)
+            
+            # 8. Actualizar estado de la planilla
+            planilla.marcar_como_generada(filepath)
+        
+        return filepath
+    
+    @staticmethod
+    def _ruta_archivo(planilla):
+        """
+        Arma la ruta del archivo a generar (y crea la carpeta si no existe).
+        
+        Returns:
+            str: Ruta completa del archivo .xlsx
+        """
+        referencia = planilla.obtener_referencia()
+        codigo = referencia.codigo if referencia else planilla.referencia_id
         
-        # 2. Asignar números de cheque (AQUÍ es cuando se asignan)
-        items_cheques = [i for i in items if i['modalidad_pago'] in [6, 8]]
+        carpeta = Path(ExcelService.CARPETA_SALIDA)
+        carpeta.mkdir(parents=True, exist_ok=True)
+        
+        # El número de planilla evita que dos planillas de la misma
+        # referencia generadas en el mismo segundo se pisen
+        filename = (f"planilla_{codigo}_{planilla.numero_planilla}_"
+                    f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+        return str(carpeta / filename)
+    
+    @staticmethod
+    def _generar_planilla_streaming(planilla):
+        """
+        Genera el Excel en modo streaming (write-only).
+        
+        Diferencias con el modo normal:
+        - No se arma el libro completo en memoria: cada fila se escribe
+          y se descarta
+        - Los items se leen con un cursor (Planilla.iterar_items), no
+          con una lista
+        - Los números de cheque se leen del cheque vinculado a cada item
+          (items_planilla.cheque_id)
+        
+        El layout es el mismo: encabezados en la fila 3, datos desde la 4,
+        columnas B a M.
+        
+        Args:
+            planilla (Planilla): La planilla a generar
+            
+        Returns:
+            str: Ruta del archivo generado
+        """
+        with DatabaseConfig.transaccion():
+            ExcelService._asignar_numeros_pendientes(planilla)
+            filepath = ExcelService._escribir_excel_streaming(planilla)
+            planilla.marcar_como_generada(filepath)
+        
+        return filepath
+    
+    @staticmethod
+    def _asignar_numeros_pendientes(planilla):
+        """
+        Asigna números a los cheques de la planilla que todavía no tienen.
+        
+        Los items que ya tienen cheque_id no se vuelven a numerar.
+        
+        Returns:
+            int: Cantidad de cheques numerados
+        """
+        query = """
+            SELECT * FROM items_planilla
+            WHERE planilla_id = ? AND modalidad_pago IN (6, 8) AND cheque_id IS NULL
+            ORDER BY id
+        """
+        items_cheques = DatabaseConfig.ejecutar_query(
+            query,
+            params=(planilla.id,),
+            fetch_all=True
+        )
         if items_cheques:
             from services.cheque_service import ChequeService
-            asignaciones = ChequeService.asignar_numeros_a_planilla(
-                planilla_id, 
-                items_cheques
+            ChequeService.asignar_numeros_a_planilla(
+                planilla.id,
+                [dict(item) for item in items_cheques]
             )
-            
-            # Actualizar los items con los números asignados
-            for item in items_cheques:
-                item['numero_cheque'] = asignaciones[item['id']]
-        
-        # 3. Crear el Excel
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Planilla de Pagos"
-        
-        # 4. Agregar encabezados (fila 3 según tu plantilla)
-        encabezados = [
-            "Tipo de documento",
-            "Número de documento",
-            "Sucursal",
-            "Identificación del pago",
-            "Denominación del beneficiario",
-            "Importe",
-            "Cuenta de débito",
-            "Cuenta de pago - CBU o Nº Cheque",
-            "Modalidad de Pago",
-            "Marca de registración de cheque",
-            "Fecha de pago - Emisión",
-            "Fecha de pago diferido"
-        ]
-        
-        for col, header in enumerate(encabezados, start=2):
-            cell = ws.cell(row=3, column=col)
-            cell.value = header
+        return len(items_cheques)
+    
+    @staticmethod
+    def _escribir_excel_streaming(planilla):
+        """
+        Escribe el archivo Excel en modo write-only (solo lectura de la DB).
+        
+        No asigna números ni cambia el estado de la planilla: por eso
+        se puede ejecutar en otro proceso (ver generar_planillas_lote).
+        
+        Returns:
+            str: Ruta del archivo generado
+        """
+        # 1. Libro en modo write-only
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Planilla de Pagos")
+        
+        # En write-only los anchos se definen ANTES de escribir filas
+        for col in range(2, 14):
+            ws.column_dimensions[get_column_letter(col)].width = 20
+        
+        # 2. Filas 1 y 2 vacías, encabezados en la fila 3 (desde la B)
+        ws.append([])
+        ws.append([])
+        
+        encabezados = [None]
+        for header in ExcelService.ENCABEZADOS:
+            cell = WriteOnlyCell(ws, value=header)
             cell.font = Font(bold=True)
             cell.fill = PatternFill("solid", fgColor="4472C4")
             cell.alignment = Alignment(horizontal="center", wrap_text=True)
+            encabezados.append(cell)
+        ws.append(encabezados)
         
-        # 5. Agregar datos
-        fila = 4
-        for item in items:
-            ws.cell(fila, 2, item['tipo_documento'])
-            ws.cell(fila, 3, item['numero_documento'])
-            ws.cell(fila, 4, planilla.sucursal)
-            ws.cell(fila, 5, item['identificacion_pago'])
-            ws.cell(fila, 6, item['beneficiario'])
-            ws.cell(fila, 7, item['importe'])
-            ws.cell(fila, 8, planilla.cuenta_debito)
-            
+        # 3. Datos desde la fila 4, directo desde el cursor
+        for item in planilla.iterar_items():
             # CBU o número de cheque
             if item['modalidad_pago'] in [6, 8]:
-                ws.cell(fila, 9, item['numero_cheque'])
+                cuenta_pago = item['numero_cheque']
             else:
-                ws.cell(fila, 9, item['cuenta_pago'])
+                cuenta_pago = item['cuenta_pago']
             
-            ws.cell(fila, 10, item['modalidad_pago'])
-            ws.cell(fila, 11, item.get('marca_registracion', ''))
-            ws.cell(fila, 12, item.get('fecha_emision', ''))
-            ws.cell(fila, 13, item.get('fecha_pago_diferido', ''))
+            ws.append([
+                None,
+                item['tipo_documento'],
+                item['numero_documento'],
+                planilla.sucursal,
+                item['identificacion_pago'],
+                item['beneficiario'],
+                item['importe'],
+                planilla.cuenta_debito,
+                cuenta_pago,
+                item['modalidad_pago'],
+                item['marca_registracion'],
+                item['fecha_emision'],
+                item['fecha_pago_diferido']
+            ])
+        
+        # 4. Guardar archivo
+        filepath = ExcelService._ruta_archivo(planilla)
+        wb.save(filepath)
+        
+        return filepath
+    
+    @staticmethod
+    def generar_planillas_lote(planilla_ids, workers=None):
+        """
+        Genera los Excel de muchas planillas a la vez (cierre de mes).
+        
+        Se hace en tres etapas:
+        1. Numeración de cheques: en ORDEN y en UNA transacción, en este
+           proceso. Los números tienen que salir correlativos, así que esta
+           parte no se paraleliza.
+        2. Escritura de los Excel: en paralelo, en varios procesos
+           (ProcessPoolExecutor). Es la parte lenta y cada archivo es
+           independiente.
+        3. Marcar como generadas las que salieron bien (una transacción).
+        
+        Si una planilla falla (rango agotado, error al escribir, etc.) se
+        informa en su resultado y el lote SIGUE con las demás. Una planilla
+        que falló al escribirse conserva sus números de cheque asignados y
+        queda en borrador: al regenerarla (con este método o con
+        generar_planilla) se reutilizan esos números.
+        
+        Solo se generan planillas en borrador: las ya generadas o
+        descargadas se saltean con un error en su resultado.
+        
+        Los IDs repetidos se generan una sola vez: el resultado trae una
+        entrada por ID distinto, en el orden de su primera aparición.
+        
+        Args:
+            planilla_ids (list): IDs de las planillas a generar
+            workers (int, optional): Cantidad de procesos. Por defecto,
+                uno por núcleo del procesador.
             
-            fila += 1
+        Returns:
+            list: Un diccionario por planilla (sin repetidos), en el mismo orden:
+                {'planilla_id', 'ok', 'archivo', 'error',
+                 'tiempo_numeracion', 'tiempo_escritura'}
+                
+        Ejemplo:
+            resultados = ExcelService.generar_planillas_lote([12, 13, 14], workers=4)
+            for r in resultados:
+                if not r['ok']:
+                    print(f"Planilla {r['planilla_id']}: {r['error']}")
+        """
+        from models.planilla import Planilla
         
-        # 6. Ajustar anchos de columna
-        for col in range(2, 14):
-            ws.column_dimensions[chr(64 + col)].width = 20
+        # Sin repetidos (conservando el orden): generar dos veces la misma
+        # planilla en paralelo escribiría dos archivos
+        planilla_ids = list(dict.fromkeys(planilla_ids))
         
-        # 7. Guardar archivo
-        filename = f"planilla_{planilla.referencia}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        filepath = f"/home/claude/planillas_generadas/{filename}"
+        resultados = {
+            planilla_id: {
+                'planilla_id': planilla_id,
+                'ok': False,
+                'archivo': None,
+                'error': None,
+                'tiempo_numeracion': 0.0,
+                'tiempo_escritura': 0.0
+            }
+            for planilla_id in planilla_ids
+        }
         
-        wb.save(filepath)
+        # 1. Numeración serial, en una sola transacción. Cada planilla va
+        # en su propio SAVEPOINT: si una falla, solo se deshace la suya.
+        planillas = {}
+        with DatabaseConfig.transaccion():
+            for planilla_id in planilla_ids:
+                resultado = resultados[planilla_id]
+                inicio = time.perf_counter()
+                
+                planilla = Planilla.obtener_por_id(planilla_id)
+                if not planilla:
+                    resultado['error'] = f"No existe la planilla con ID {planilla_id}"
+                    continue
+                
+                if not planilla.puede_editar():
+                    resultado['error'] = (f"La planilla está en estado '{planilla.estado}': "
+                                          "solo se generan planillas en borrador")
+                    continue
+                
+                try:
+                    with DatabaseConfig.transaccion():
+                        ExcelService._asignar_numeros_pendientes(planilla)
+                    
+                    planillas[planilla_id] = planilla
+                except Exception as e:
+                    resultado['error'] = f"Error al numerar cheques: {e}"
+                finally:
+                    resultado['tiempo_numeracion'] = time.perf_counter() - inicio
+        
+        # 2. Escritura en paralelo (solo las que se numeraron bien)
+        if planillas:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(ExcelService.METODO_PROCESOS),
+                initializer=_inicializar_proceso_excel,
+                initargs=(str(DatabaseConfig.DB_PATH), ExcelService.CARPETA_SALIDA)
+            ) as executor:
+                futuros = {
+                    executor.submit(_escribir_planilla_en_proceso, planilla_id): planilla_id
+                    for planilla_id in planillas
+                }
+                
+                for futuro in as_completed(futuros):
+                    resultado = resultados[futuros[futuro]]
+                    try:
+                        resultado['archivo'], resultado['tiempo_escritura'] = futuro.result()
+                    except Exception as e:
+                        resultado['error'] = f"Error al escribir el Excel: {e}"
         
-        # 8. Actualizar estado de la planilla
-        planilla.marcar_como_generada(filepath)
+        # 3. Marcar como generadas las que tienen archivo
+        with DatabaseConfig.transaccion():
+            for planilla_id, planilla in planillas.items():
+                resultado = resultados[planilla_id]
+                if resultado['archivo']:
+                    planilla.marcar_como_generada(resultado['archivo'])
+                    resultado['ok'] = True
         
-        return filepath
\ No newline at end of file
+        return [resultados[planilla_id] for planilla_id in planilla_ids]
+
+
+# ============================================================================
+# FUNCIONES PARA LOS PROCESOS DE generar_planillas_lote
+# ============================================================================
+# Tienen que estar a nivel de módulo (no dentro de la clase) para que
+# ProcessPoolExecutor pueda enviarlas a los otros procesos.
+
+def _inicializar_proceso_excel(db_path, carpeta_salida):
+    """Configura cada proceso hijo: misma DB y misma carpeta que el padre"""
+    DatabaseConfig.preparar_proceso_hijo(db_path)
+    ExcelService.CARPETA_SALIDA = carpeta_salida
+
+
+def _escribir_planilla_en_proceso(planilla_id):
+    """
+    Escribe el Excel de una planilla dentro de un proceso hijo.
+    
+    Returns:
+        tuple: (ruta_del_archivo, segundos_que_tardó)
+    """
+    from models.planilla import Planilla
+    
+    inicio = time.perf_counter()
+    planilla = Planilla.obtener_por_id(planilla_id)
+    filepath = ExcelService._escribir_excel_streaming(planilla)
+    return filepath, time.perf_counter() - inicio
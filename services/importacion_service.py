@@ -0,0 +1,471 @@
+"""
+Servicio para importar items de planilla desde Excel (.xlsx) o CSV.
+
+El archivo se lee como un stream (openpyxl en modo read_only, csv.reader):
+nunca se carga entero en memoria. Las filas se procesan de a lotes:
+1. Se normalizan (textos, importes, fechas)
+2. Se completan con la agenda (beneficiario, CBU) con UNA consulta por lote
+3. Se validan CUIT y CBU con los validadores en lote (NumPy)
+4. Se insertan con Planilla.agregar_items_lote
+
+Todo dentro de UNA transacción: si el archivo está roto a la mitad,
+no queda una planilla cargada a medias.
+"""
+import csv
+import time
+import unicodedata
+from datetime import date, datetime
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from config.database import DatabaseConfig
+from services.excel_service import ExcelService
+from utils.validators import formatear_cuit, validar_cuits_lote, validar_cbus_lote
+
+
+def _normalizar_encabezado(texto):
+    """'Número de documento' → 'numero de documento' (sin acentos ni símbolos)"""
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return ' '.join(''.join(c if c.isalnum() else ' ' for c in texto).split())
+
+
+class ImportacionService:
+
+    # Filas por lote (validación + agenda + INSERT)
+    TAMANO_LOTE = 1000
+
+    # Filas en las que se busca la fila de encabezados
+    # (en el layout del banco está en la fila 3)
+    FILAS_BUSQUEDA_ENCABEZADO = 20
+
+    # Campo de items_planilla de cada columna del layout de ExcelService.
+    # None = columna que se ignora (son datos de la planilla, no del item)
+    _CAMPOS_LAYOUT = [
+        'tipo_documento',
+        'numero_documento',
+        None,                   # Sucursal
+        'identificacion_pago',
+        'beneficiario',
+        'importe',
+        None,                   # Cuenta de débito
+        'cuenta_pago',
+        'modalidad_pago',
+        'marca_registracion',
+        'fecha_emision',
+        'fecha_pago_diferido'
+    ]
+
+    # Otros nombres de columna aceptados (ya normalizados)
+    _ALIAS = {
+        'tipo documento': 'tipo_documento',
+        'documento': 'numero_documento',
+        'cuit': 'numero_documento',
+        'cuil': 'numero_documento',
+        'cuit cuil': 'numero_documento',
+        'identificacion': 'identificacion_pago',
+        'concepto': 'identificacion_pago',
+        'nombre': 'beneficiario',
+        'razon social': 'beneficiario',
+        'monto': 'importe',
+        'cbu': 'cuenta_pago',
+        'cuenta de pago': 'cuenta_pago',
+        'modalidad': 'modalidad_pago',
+        'fecha de emision': 'fecha_emision',
+        'fecha emision': 'fecha_emision',
+        'fecha diferido': 'fecha_pago_diferido'
+    }
+
+    COLUMNAS = {
+        **{_normalizar_encabezado(titulo): campo
+           for titulo, campo in zip(ExcelService.ENCABEZADOS, _CAMPOS_LAYOUT)},
+        **_ALIAS
+    }
+
+    @staticmethod
+    def importar(planilla_id, ruta, al_progresar=None, tamano_lote=None, encoding='utf-8-sig'):
+        """
+        Importa los items de un archivo a una planilla en borrador.
+
+        Las filas con errores NO frenan la importación: se informan en el
+        resultado con su número de fila en el archivo.
+
+        Args:
+            planilla_id (int): ID de la planilla (en borrador)
+            ruta (str o Path): Archivo .xlsx o .csv
+            al_progresar (callable, optional): Se llama después de cada lote
+                con al_progresar(procesadas, total, filas_por_segundo).
+                total es None si no se conoce (CSV).
+            tamano_lote (int, optional): Filas por lote. Defaults to TAMANO_LOTE.
+            encoding (str, optional): Codificación del CSV. Defaults to 'utf-8-sig'.
+
+        Returns:
+            ResultadoLote: IDs insertados, errores por fila y velocidad
+
+        Raises:
+            ValueError: Si la planilla no existe o no está en borrador,
+                o si el archivo no tiene una fila de encabezados reconocible
+
+        Ejemplo:
+            resultado = ImportacionService.importar(
+                planilla.id, "sueldos.xlsx",
+                al_progresar=lambda n, total, fps: print(f"{n} filas ({fps:,.0f}/s)")
+            )
+            for fila, error in resultado.errores:
+                print(f"Fila {fila}: {error}")
+        """
+        from models.planilla import Planilla, ResultadoLote
+
+        planilla = Planilla.obtener_por_id(planilla_id)
+        if planilla is None:
+            raise ValueError(f"No existe la planilla {planilla_id}")
+        if not planilla.puede_editar():
+            raise ValueError("Solo se pueden importar items a planillas en borrador")
+
+        tamano_lote = tamano_lote or ImportacionService.TAMANO_LOTE
+        inicio = time.perf_counter()
+        resultado = ResultadoLote()
+
+        lector = ImportacionService._leer_filas(ruta, encoding=encoding)
+        total = next(lector)
+
+        try:
+            with DatabaseConfig.transaccion():
+                lote = []
+                for numero_fila, fila in lector:
+                    lote.append((numero_fila, fila))
+                    if len(lote) >= tamano_lote:
+                        ImportacionService._importar_lote(planilla, lote, resultado)
+                        lote = []
+                        ImportacionService._informar(al_progresar, resultado, total, inicio)
+
+                if lote:
+                    ImportacionService._importar_lote(planilla, lote, resultado)
+                    ImportacionService._informar(al_progresar, resultado, total, inicio)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error al importar items: {e}")
+
+        resultado.errores.sort()
+        resultado.duracion = time.perf_counter() - inicio
+        return resultado
+
+    # ========================================================================
+    # LECTURA (stream)
+    # ========================================================================
+
+    @staticmethod
+    def _leer_filas(ruta, encoding='utf-8-sig'):
+        """
+        Recorre las filas de datos de un .xlsx o .csv (generador).
+
+        Busca la fila de encabezados en las primeras filas y devuelve
+        solo las columnas reconocidas (ver COLUMNAS). Saltea filas vacías.
+
+        Args:
+            ruta (str o Path): Archivo a leer
+            encoding (str, optional): Codificación del CSV
+
+        Yields:
+            Primero: int o None con la cantidad estimada de filas de datos.
+            Después: (numero_fila, {campo: valor}) por cada fila.
+        """
+        ruta = Path(ruta)
+        extension = ruta.suffix.lower()
+
+        if extension in ('.xlsx', '.xlsm'):
+            libro = load_workbook(ruta, read_only=True, data_only=True)
+            try:
+                hoja = libro.active
+                filas = hoja.iter_rows(values_only=True)
+                yield from ImportacionService._filas_de_datos(filas, hoja.max_row)
+            finally:
+                libro.close()
+        elif extension in ('.csv', '.txt'):
+            with open(ruta, newline='', encoding=encoding) as archivo:
+                # Los CSV de Excel en español suelen venir con ';'
+                muestra = archivo.read(4096)
+                archivo.seek(0)
+                try:
+                    dialecto = csv.Sniffer().sniff(muestra, delimiters=';,\t')
+                except csv.Error:
+                    dialecto = csv.excel
+                yield from ImportacionService._filas_de_datos(csv.reader(archivo, dialecto), None)
+        else:
+            raise ValueError(f"Formato no soportado: {extension} (usar .xlsx o .csv)")
+
+    @staticmethod
+    def _filas_de_datos(filas, cantidad_filas):
+        """Encuentra el encabezado y convierte cada fila siguiente en un dict"""
+        columnas = None
+        numero_fila = 0
+
+        for numero_fila, celdas in enumerate(filas, start=1):
+            columnas = ImportacionService._mapear_encabezados(celdas)
+            if columnas:
+                break
+            if numero_fila >= ImportacionService.FILAS_BUSQUEDA_ENCABEZADO:
+                break
+
+        if not columnas:
+            raise ValueError(
+                "No se encontró la fila de encabezados (se necesitan al menos "
+                "Número de documento, Importe y Modalidad de Pago)"
+            )
+
+        yield (cantidad_filas - numero_fila) if cantidad_filas else None
+
+        for numero_fila, celdas in enumerate(filas, start=numero_fila + 1):
+            fila = {campo: celdas[indice] for indice, campo in columnas.items()
+                    if indice < len(celdas)}
+            if any(valor not in (None, '') for valor in fila.values()):
+                yield numero_fila, fila
+
+    @staticmethod
+    def _mapear_encabezados(celdas):
+        """
+        Si la fila es de encabezados, devuelve {indice_columna: campo}.
+
+        Returns:
+            dict o None: None si no tiene las columnas mínimas
+        """
+        columnas = {}
+        for indice, celda in enumerate(celdas):
+            if celda is None:
+                continue
+            campo = ImportacionService.COLUMNAS.get(_normalizar_encabezado(celda))
+            if campo and campo not in columnas.values():
+                columnas[indice] = campo
+
+        requeridos = {'numero_documento', 'importe', 'modalidad_pago'}
+        return columnas if requeridos <= set(columnas.values()) else None
+
+    # ========================================================================
+    # PROCESAMIENTO POR LOTE
+    # ========================================================================
+
+    @staticmethod
+    def _importar_lote(planilla, lote, resultado):
+        """Normaliza, completa, valida e inserta un lote de filas"""
+        resultado.total += len(lote)
+
+        items, numeros, errores = ImportacionService._preparar_lote(lote)
+        resultado.errores.extend(errores)
+
+        if items:
+            parcial = planilla.agregar_items_lote(items)
+            resultado.ids.extend(parcial.ids)
+            # Las posiciones de agregar_items_lote son dentro del lote
+            resultado.errores.extend((numeros[posicion - 1], mensaje)
+                                     for posicion, mensaje in parcial.errores)
+
+    @staticmethod
+    def _preparar_lote(lote):
+        """
+        Convierte las filas del archivo en items listos para insertar.
+
+        Returns:
+            tuple: (items, numeros_de_fila, errores)
+        """
+        # 1. Normalizar
+        filas = []
+        errores = []
+        for numero_fila, fila in lote:
+            try:
+                filas.append((numero_fila, ImportacionService._normalizar(fila)))
+            except ValueError as e:
+                errores.append((numero_fila, str(e)))
+
+        # 2. Completar con la agenda (una consulta por tabla para todo el lote)
+        cuits = {item['numero_documento'] for _, item in filas}
+        cheques, transferencias = ImportacionService._buscar_en_agenda(cuits)
+
+        completas = []
+        for numero_fila, item in filas:
+            try:
+                ImportacionService._completar_con_agenda(item, cheques, transferencias)
+                completas.append((numero_fila, item))
+            except ValueError as e:
+                errores.append((numero_fila, str(e)))
+        filas = completas
+
+        # 3. Validar CUIT y CBU en lote
+        if filas:
+            cuits_validos, _ = validar_cuits_lote([item['numero_documento'] for _, item in filas])
+
+            es_transferencia = [item['modalidad_pago'] in (2, 4) for _, item in filas]
+            cbus_validos, _ = validar_cbus_lote([item['cuenta_pago'] or '' for _, item in filas])
+        else:
+            cuits_validos = cbus_validos = es_transferencia = []
+
+        items = []
+        numeros = []
+        for (numero_fila, item), cuit_ok, cbu_ok, transferencia in zip(
+                filas, cuits_validos, cbus_validos, es_transferencia):
+            if not cuit_ok:
+                errores.append((numero_fila, f"CUIT/CUIL inválido: {item['numero_documento']}"))
+            elif transferencia and not cbu_ok:
+                errores.append((numero_fila, f"CBU inválido: {item['cuenta_pago']}"))
+            else:
+                items.append(item)
+                numeros.append(numero_fila)
+
+        errores.sort()
+        return items, numeros, errores
+
+    @staticmethod
+    def _normalizar(fila):
+        """
+        Pasa una fila del archivo al formato de agregar_items_lote.
+
+        Raises:
+            ValueError: Si falta un dato obligatorio o tiene formato inválido
+        """
+        texto = ImportacionService._texto
+
+        numero_documento = texto(fila.get('numero_documento')).replace('-', '').replace(' ', '')
+        if not numero_documento:
+            raise ValueError("Falta el número de documento")
+
+        try:
+            # '6' y 6.0 valen; 6.7 no (int() lo truncaría a 6 sin avisar)
+            modalidad = float(texto(fila.get('modalidad_pago')))
+            if not modalidad.is_integer():
+                raise ValueError
+            modalidad_pago = int(modalidad)
+        except ValueError:
+            raise ValueError(f"Modalidad de pago inválida: {fila.get('modalidad_pago')!r}")
+        if modalidad_pago not in (2, 4, 6, 8):
+            raise ValueError("Modalidad de pago debe ser 2, 4, 6 u 8")
+
+        return {
+            'tipo_documento': texto(fila.get('tipo_documento')).upper() or 'CUIT',
+            'numero_documento': numero_documento,
+            'identificacion_pago': texto(fila.get('identificacion_pago')),
+            'beneficiario': texto(fila.get('beneficiario')),
+            'importe': ImportacionService._importe(fila.get('importe')),
+            'modalidad_pago': modalidad_pago,
+            'cuenta_pago': texto(fila.get('cuenta_pago')).replace(' ', '').replace('-', '') or None,
+            'marca_registracion': texto(fila.get('marca_registracion')) or None,
+            'fecha_emision': ImportacionService._fecha(fila.get('fecha_emision')),
+            'fecha_pago_diferido': ImportacionService._fecha(fila.get('fecha_pago_diferido'))
+        }
+
+    @staticmethod
+    def _buscar_en_agenda(cuits):
+        """
+        Busca en las agendas todos los CUIT de un lote.
+
+        Returns:
+            tuple: (cheques, transferencias)
+                cheques: {cuit: nombre}
+                transferencias: {cuit: [(cbu, nombre), ...]}
+        """
+        cheques = {}
+        transferencias = {}
+        if not cuits:
+            return cheques, transferencias
+
+        # En la agenda el CUIT puede estar guardado con o sin guiones.
+        # Se buscan las dos formas de cada uno: la columna queda sola en
+        # el WHERE (sin REPLACE) y así SQLite usa el índice por cuit.
+        params = tuple(cuits) + tuple(formatear_cuit(cuit) for cuit in cuits)
+        marcas = ', '.join('?' * len(params))
+
+        filas = DatabaseConfig.ejecutar_query(
+            f"""SELECT cuit, nombre FROM agenda_cheques
+                WHERE activo = 1 AND cuit IN ({marcas})""",
+            params=params, fetch_all=True
+        )
+        for fila in filas:
+            cheques[fila['cuit'].replace('-', '')] = fila['nombre']
+
+        filas = DatabaseConfig.ejecutar_query(
+            f"""SELECT cuit, cbu, nombre FROM agenda_transferencias
+                WHERE activo = 1 AND cuit IN ({marcas})""",
+            params=params, fetch_all=True
+        )
+        for fila in filas:
+            transferencias.setdefault(fila['cuit'].replace('-', ''), []).append(
+                (fila['cbu'], fila['nombre'])
+            )
+
+        return cheques, transferencias
+
+    @staticmethod
+    def _completar_con_agenda(item, cheques, transferencias):
+        """
+        Completa beneficiario (y CBU en transferencias) desde la agenda.
+
+        Raises:
+            ValueError: Si falta un dato que la agenda no puede completar
+        """
+        cuit = item['numero_documento']
+
+        if item['modalidad_pago'] in (6, 8):
+            if not item['beneficiario']:
+                item['beneficiario'] = cheques.get(cuit, '')
+        else:
+            contactos = transferencias.get(cuit, [])
+            if not item['cuenta_pago']:
+                if len(contactos) == 1:
+                    item['cuenta_pago'] = contactos[0][0]
+                elif len(contactos) > 1:
+                    raise ValueError(f"El CUIT {cuit} tiene varios CBU en la agenda: indicar la cuenta")
+                else:
+                    raise ValueError("Falta el CBU (y el CUIT no está en la agenda)")
+            if not item['beneficiario']:
+                nombres = [nombre for cbu, nombre in contactos if cbu == item['cuenta_pago']]
+                item['beneficiario'] = nombres[0] if nombres else ''
+
+        if not item['beneficiario']:
+            raise ValueError("Falta el beneficiario (y el CUIT no está en la agenda)")
+
+    # ========================================================================
+    # CONVERSIÓN DE CELDAS
+    # ========================================================================
+
+    @staticmethod
+    def _texto(valor):
+        """Celda → texto. Los números enteros de Excel (20123456786.0) sin decimales"""
+        if valor is None:
+            return ''
+        if isinstance(valor, float) and valor.is_integer():
+            return str(int(valor))
+        return str(valor).strip()
+
+    @staticmethod
+    def _importe(valor):
+        """
+        Celda → float. Acepta números de Excel y textos '1234.56',
+        '1234,56' o '1.234,56'.
+        """
+        if isinstance(valor, (int, float)):
+            return float(valor)
+
+        texto = ImportacionService._texto(valor).replace('$', '').replace(' ', '')
+        if ',' in texto:
+            # Formato argentino: el punto separa miles y la coma decimales
+            texto = texto.replace('.', '').replace(',', '.')
+        try:
+            return float(texto)
+        except ValueError:
+            raise ValueError(f"Importe inválido: {valor!r}")
+
+    @staticmethod
+    def _fecha(valor):
+        """Celda → 'DD/MM/AAAA' (o None si está vacía)"""
+        if isinstance(valor, (datetime, date)):
+            return valor.strftime('%d/%m/%Y')
+        return ImportacionService._texto(valor) or None
+
+    @staticmethod
+    def _informar(al_progresar, resultado, total, inicio):
+        """Llama al callback de progreso con las filas procesadas y filas/s"""
+        if al_progresar is None:
+            return
+        duracion = time.perf_counter() - inicio
+        velocidad = resultado.total / duracion if duracion > 0 else 0.0
+        al_progresar(resultado.total, total, velocidad)
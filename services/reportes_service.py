@@ -0,0 +1,343 @@
+"""
+Servicio de reportes: análisis de cheques, items y planillas con pandas.
+
+Los reportes NO pasan por los modelos (Cheque, ItemPlanilla...): armar un
+objeto Python por fila para después sumar un campo es lento y ocupa
+mucha memoria. Acá cada tabla se lee con UN read_sql a un DataFrame
+(columnas tipadas, en bloques contiguos de memoria) y los totales se
+calculan con operaciones vectorizadas (groupby, cut...) sobre columnas
+enteras, sin un for por fila.
+
+Uso:
+    datos = ReportesService.cargar_snapshot()
+    print(ReportesService.totales_por_beneficiario(datos['items']).head(10))
+    print(ReportesService.antiguedad_pendientes(datos['cheques']))
+"""
+from datetime import date
+
+import pandas as pd
+
+from config.database import DatabaseConfig
+
+
+class ReportesService:
+
+    MODALIDADES = {
+        2: 'Transferencia Macro',
+        4: 'Transferencia otros bancos',
+        6: 'Echeq común',
+        8: 'Echeq diferido'
+    }
+
+    # Tramos de antigüedad (en días) para los cheques pendientes:
+    # 0-30, 31-60, 61-90 y más de 90
+    TRAMOS_ANTIGUEDAD = (30, 60, 90)
+
+    # Tipos de las columnas de cada tabla. Las de texto con pocos valores
+    # distintos van como 'category' (un código chico por fila en vez de
+    # un string); los ids que pueden ser NULL como 'Int64' (entero con NA).
+    _TIPOS_CHEQUES = {
+        'id': 'int64',
+        'numero_cheque': 'int64',
+        'tipo': 'category',
+        'estado': 'category',
+        'referencia_id': 'Int64',
+        'planilla_id': 'Int64',
+        'beneficiario': 'string',
+        'importe': 'float64'
+    }
+
+    _TIPOS_ITEMS = {
+        'id': 'int64',
+        'planilla_id': 'int64',
+        'tipo_documento': 'category',
+        'numero_documento': 'string',
+        'beneficiario': 'string',
+        'importe': 'float64',
+        'modalidad_pago': 'Int64',
+        'cheque_id': 'Int64'
+    }
+
+    _TIPOS_PLANILLAS = {
+        'id': 'int64',
+        'referencia_id': 'int64',
+        'numero_planilla': 'Int64',
+        'estado': 'category',
+        'referencia': 'category',
+        'cantidad_items': 'int64',
+        'total_importe': 'float64',
+        'total_cheques': 'float64',
+        'total_transferencias': 'float64'
+    }
+
+    # ========================================================================
+    # CARGA (un read_sql por tabla)
+    # ========================================================================
+
+    @classmethod
+    def cargar_cheques(cls):
+        """
+        Lee cheques_emitidos completa a un DataFrame.
+
+        Returns:
+            pd.DataFrame: Una fila por cheque. fecha_emision, fecha_pago y
+                fecha_creacion vienen como datetime64 (NaT si faltan).
+        """
+        query = """
+            SELECT id, numero_cheque, tipo, estado, referencia_id, planilla_id,
+                   beneficiario, importe, fecha_emision, fecha_pago, fecha_creacion
+            FROM cheques_emitidos
+        """
+        df = cls._leer(query, cls._TIPOS_CHEQUES)
+
+        for columna in ('fecha_emision', 'fecha_pago', 'fecha_creacion'):
+            df[columna] = cls._convertir_fechas(df[columna])
+
+        return df
+
+    @classmethod
+    def cargar_items(cls):
+        """
+        Lee items_planilla completa a un DataFrame.
+
+        Returns:
+            pd.DataFrame: Una fila por item, con la columna extra 'modalidad'
+                (nombre de la modalidad de pago, categórica).
+        """
+        query = """
+            SELECT id, planilla_id, tipo_documento, numero_documento,
+                   identificacion_pago, beneficiario, importe, cuenta_pago,
+                   modalidad_pago, fecha_emision, fecha_pago_diferido, cheque_id
+            FROM items_planilla
+        """
+        df = cls._leer(query, cls._TIPOS_ITEMS)
+
+        for columna in ('fecha_emision', 'fecha_pago_diferido'):
+            df[columna] = cls._convertir_fechas(df[columna])
+
+        # Categorías fijas: los totales por modalidad incluyen las que no tienen items
+        df['modalidad'] = pd.Categorical(df['modalidad_pago'].map(cls.MODALIDADES),
+                                         categories=list(cls.MODALIDADES.values()))
+
+        return df
+
+    @classmethod
+    def cargar_planillas(cls):
+        """
+        Lee planillas (con el código de su referencia) a un DataFrame.
+
+        Los totales por planilla ya son columnas de la tabla (los mantienen
+        los triggers de items_planilla), no hace falta agregarlos.
+
+        Returns:
+            pd.DataFrame: Una fila por planilla
+        """
+        query = """
+            SELECT p.id, p.referencia_id, r.codigo as referencia,
+                   p.numero_planilla, p.sucursal, p.cuenta_debito, p.estado,
+                   p.fecha_creacion, p.cantidad_items, p.total_importe,
+                   p.total_cheques, p.total_transferencias
+            FROM planillas p
+            LEFT JOIN referencias r ON r.id = p.referencia_id
+        """
+        df = cls._leer(query, cls._TIPOS_PLANILLAS)
+        df['fecha_creacion'] = cls._convertir_fechas(df['fecha_creacion'])
+        return df
+
+    @classmethod
+    def cargar_snapshot(cls):
+        """
+        Carga las tres tablas viendo la MISMA versión de la base.
+
+        Las tres lecturas van dentro de una transacción de lectura: si otro
+        hilo (o la generación masiva) escribe mientras tanto, los
+        DataFrames no quedan desparejos (ej: un item cuya planilla no
+        aparece). Con WAL esto no bloquea a los que escriben.
+
+        Returns:
+            dict: {'cheques': DataFrame, 'items': DataFrame, 'planillas': DataFrame}
+        """
+        conn = DatabaseConfig.obtener_pool().obtener()
+
+        # Dentro de una transacción ya abierta, esa transacción es el snapshot
+        propia = not conn.in_transaction
+        if propia:
+            conn.execute("BEGIN")
+
+        try:
+            return {
+                'cheques': cls.cargar_cheques(),
+                'items': cls.cargar_items(),
+                'planillas': cls.cargar_planillas()
+            }
+        finally:
+            if propia:
+                conn.commit()
+
+    # ========================================================================
+    # AGREGADOS (vectorizados)
+    # ========================================================================
+
+    @staticmethod
+    def totales_por_beneficiario(items):
+        """
+        Cantidad e importe pagado a cada beneficiario.
+
+        Args:
+            items (pd.DataFrame): Resultado de cargar_items()
+
+        Returns:
+            pd.DataFrame: Índice (numero_documento, beneficiario), columnas
+                'cantidad' e 'importe', de mayor a menor importe.
+        """
+        totales = items.groupby(['numero_documento', 'beneficiario'], observed=True).agg(
+            cantidad=('id', 'size'),
+            importe=('importe', 'sum')
+        )
+        totales['importe'] = totales['importe'].round(2)
+        return totales.sort_values('importe', ascending=False)
+
+    @staticmethod
+    def totales_por_mes(items, planillas):
+        """
+        Cantidad e importe de items por mes de creación de su planilla.
+
+        Args:
+            items (pd.DataFrame): Resultado de cargar_items()
+            planillas (pd.DataFrame): Resultado de cargar_planillas()
+
+        Returns:
+            pd.DataFrame: Índice 'mes' (período mensual, ej: 2024-05),
+                columnas 'cantidad' e 'importe'.
+        """
+        meses = planillas.set_index('id')['fecha_creacion'].dt.to_period('M')
+        mes = items['planilla_id'].map(meses).rename('mes')
+
+        totales = items.groupby(mes).agg(
+            cantidad=('id', 'size'),
+            importe=('importe', 'sum')
+        )
+        totales['importe'] = totales['importe'].round(2)
+        return totales.sort_index()
+
+    @staticmethod
+    def totales_por_modalidad(items):
+        """
+        Cantidad e importe por modalidad de pago (incluye las que no tienen items).
+
+        Args:
+            items (pd.DataFrame): Resultado de cargar_items()
+
+        Returns:
+            pd.DataFrame: Índice 'modalidad', columnas 'cantidad' e 'importe'
+        """
+        totales = items.groupby('modalidad', observed=False).agg(
+            cantidad=('id', 'size'),
+            importe=('importe', 'sum')
+        )
+        totales['importe'] = totales['importe'].fillna(0).round(2)
+        return totales
+
+    @classmethod
+    def antiguedad_pendientes(cls, cheques, hoy=None, tramos=None):
+        """
+        Antigüedad de los cheques en estado 'emitido_pendiente'.
+
+        La antigüedad se cuenta desde la fecha de emisión (o desde la
+        fecha de creación si el cheque no tiene fecha de emisión).
+
+        Args:
+            cheques (pd.DataFrame): Resultado de cargar_cheques()
+            hoy (date, optional): Fecha de referencia. Defaults to hoy.
+            tramos (tuple, optional): Límites en días de cada tramo.
+                Defaults to TRAMOS_ANTIGUEDAD (30, 60, 90).
+
+        Returns:
+            pd.DataFrame: Índice 'tramo' ('0-30', '31-60', '61-90', '+90'),
+                columnas 'cantidad', 'importe' y 'dias_max' (el más viejo).
+
+        Ejemplo:
+            cheques = ReportesService.cargar_cheques()
+            print(ReportesService.antiguedad_pendientes(cheques))
+        """
+        from models.cheque import Cheque
+
+        tramos = tuple(tramos or cls.TRAMOS_ANTIGUEDAD)
+        hoy = pd.Timestamp(hoy or date.today())
+
+        pendientes = cheques[cheques['estado'] == Cheque.ESTADO_PENDIENTE]
+        desde = pendientes['fecha_emision'].fillna(pendientes['fecha_creacion'])
+        dias = (hoy - desde.dt.normalize()).dt.days.clip(lower=0)
+
+        limites = [-1, *tramos, float('inf')]
+        etiquetas = [f"0-{tramos[0]}"]
+        etiquetas += [f"{a + 1}-{b}" for a, b in zip(tramos, tramos[1:])]
+        etiquetas += [f"+{tramos[-1]}"]
+        tramo = pd.cut(dias, bins=limites, labels=etiquetas).rename('tramo')
+
+        totales = pendientes.groupby(tramo, observed=False).agg(
+            cantidad=('id', 'size'),
+            importe=('importe', 'sum')
+        )
+        totales['importe'] = totales['importe'].fillna(0).round(2)
+        totales['dias_max'] = dias.groupby(tramo, observed=False).max().astype('Int64')
+        return totales
+
+    @classmethod
+    def generar(cls, hoy=None):
+        """
+        Arma todos los reportes a partir de un snapshot de la base.
+
+        Args:
+            hoy (date, optional): Fecha de referencia para la antigüedad.
+
+        Returns:
+            dict: {
+                'por_beneficiario': DataFrame,
+                'por_mes': DataFrame,
+                'por_modalidad': DataFrame,
+                'antiguedad_pendientes': DataFrame
+            }
+        """
+        try:
+            datos = cls.cargar_snapshot()
+        except Exception as e:
+            raise Exception(f"Error al cargar datos para reportes: {e}")
+
+        return {
+            'por_beneficiario': cls.totales_por_beneficiario(datos['items']),
+            'por_mes': cls.totales_por_mes(datos['items'], datos['planillas']),
+            'por_modalidad': cls.totales_por_modalidad(datos['items']),
+            'antiguedad_pendientes': cls.antiguedad_pendientes(datos['cheques'], hoy=hoy)
+        }
+
+    # ========================================================================
+    # AUXILIARES
+    # ========================================================================
+
+    @staticmethod
+    def _leer(query, tipos):
+        """Un read_sql con la conexión del pool, convirtiendo los tipos de columna"""
+        conn = DatabaseConfig.obtener_pool().obtener()
+        df = pd.read_sql_query(query, conn)
+
+        # astype después de leer: read_sql_query(dtype=...) falla con
+        # tablas vacías o columnas enteras con NULL
+        return df.astype({columna: tipo for columna, tipo in tipos.items()
+                          if columna in df.columns})
+
+    @staticmethod
+    def _convertir_fechas(serie):
+        """
+        Convierte una columna de fechas de texto a datetime64.
+
+        En la base hay dos formatos: 'DD/MM/AAAA' (lo que carga el usuario
+        en los items) y 'AAAA-MM-DD[ HH:MM:SS]' (CURRENT_TIMESTAMP).
+        Lo que no se puede interpretar queda NaT.
+        """
+        texto = serie.astype('string')
+        fechas = pd.to_datetime(texto, format='%d/%m/%Y', errors='coerce')
+        faltan = fechas.isna() & texto.notna()
+        if faltan.any():
+            fechas[faltan] = pd.to_datetime(texto[faltan], format='ISO8601', errors='coerce')
+        return fechas
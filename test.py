@@ -11,6 +11,9 @@ Ejecutar desde la raiz del proyecto:
 
 import sys
 import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
 
 # Agregar el directorio actual al path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -173,6 +176,992 @@ def test_interfaz():
         return False
 
 
+def test_validadores_lote(cantidad=20000, semilla=1234):
+    """
+    Prueba de propiedad: validar_cuits_lote/validar_cbus_lote dan lo mismo
+    que validar_cuit/validar_cbu para miles de entradas al azar
+    (válidas, con guiones y espacios, con un dígito cambiado, cortas,
+    largas, con letras...).
+    """
+    print("\n" + "=" * 70)
+    print("TEST 5: VALIDACION EN LOTE (contra los validadores de a uno)")
+    print("=" * 70)
+    
+    try:
+        import random
+        import re
+        import time
+        from utils.validators import (validar_cuit, validar_cbu,
+                                      validar_cuits_lote, validar_cbus_lote)
+        
+        azar = random.Random(semilla)
+        
+        def digitos(n):
+            return ''.join(azar.choice('0123456789') for _ in range(n))
+        
+        def deformar(texto):
+            """Aplica al azar alguna de las cosas que llegan en un Excel"""
+            opcion = azar.randrange(8)
+            if opcion == 0 and texto:
+                # Cambiar un dígito
+                i = azar.randrange(len(texto))
+                return texto[:i] + azar.choice('0123456789') + texto[i + 1:]
+            if opcion == 1:
+                # Un carácter de más o de menos
+                return texto + azar.choice('0123456789') if azar.random() < 0.5 else texto[:-1]
+            if opcion == 2 and texto:
+                # Una letra o símbolo en el medio
+                i = azar.randrange(len(texto))
+                return texto[:i] + azar.choice('Ox.,/_') + texto[i + 1:]
+            if opcion == 3:
+                # Espacios, tabs y saltos alrededor
+                return azar.choice([' ', '\t', '\n', '']) + texto + azar.choice([' ', '\t', ''])
+            if opcion == 4:
+                return ''
+            return texto
+        
+        def cuit_valido():
+            base = azar.choice(['20', '23', '24', '27', '30', '33', '34']) + digitos(8)
+            suma = sum(int(d) * p for d, p in zip(base, [5, 4, 3, 2, 7, 6, 5, 4, 3, 2]))
+            verificador = {11: 0, 10: 9}.get(11 - suma % 11, 11 - suma % 11)
+            cuit = base + str(verificador)
+            if azar.random() < 0.3:
+                cuit = f"{cuit[:2]}-{cuit[2:10]}-{cuit[10]}"
+            return cuit
+        
+        def cbu_valido():
+            bloque1 = digitos(7)
+            suma1 = sum(int(d) * p for d, p in zip(bloque1, [7, 1, 3, 9, 7, 1, 3]))
+            bloque2 = digitos(13)
+            suma2 = sum(int(d) * p for d, p in zip(bloque2, [3, 9, 7, 1] * 4))
+            cbu = bloque1 + str((10 - suma1 % 10) % 10) + bloque2 + str((10 - suma2 % 10) % 10)
+            if azar.random() < 0.3:
+                cbu = f"{cbu[:3]} {cbu[3:7]} {cbu[7]} {cbu[8:21]} {cbu[21]}"
+            return cbu
+        
+        def debe_ser(mensaje):
+            """Dígito de 'Debería ser N' en el mensaje, o None"""
+            encontrado = re.search(r'Debería ser (\d)', mensaje)
+            return int(encontrado.group(1)) if encontrado else None
+        
+        errores = []
+        
+        # Importar NumPy antes de medir (la primera llamada lo carga)
+        validar_cuits_lote([])
+        
+        # CUIT
+        cuits = [deformar(cuit_valido()) if azar.random() < 0.7 else digitos(11)
+                 for _ in range(cantidad)]
+        
+        inicio = time.perf_counter()
+        escalares = [validar_cuit(c) for c in cuits]
+        duracion_escalar = time.perf_counter() - inicio
+        
+        inicio = time.perf_counter()
+        validos, esperados = validar_cuits_lote(cuits)
+        duracion_lote = time.perf_counter() - inicio
+        
+        for i, (valido, mensaje) in enumerate(escalares):
+            digito = debe_ser(mensaje)
+            if bool(validos[i]) != valido:
+                errores.append(f"CUIT {cuits[i]!r}: lote={validos[i]} escalar={valido}")
+            elif digito is not None and esperados[i] != digito:
+                errores.append(f"CUIT {cuits[i]!r}: lote esperaba {esperados[i]}, escalar {digito}")
+        
+        print(f"\n1. {cantidad} CUIT ({sum(v for v, _ in escalares)} válidos)")
+        print(f"   De a uno: {duracion_escalar:.3f}s | En lote: {duracion_lote:.3f}s")
+        
+        # CBU
+        cbus = [deformar(cbu_valido()) if azar.random() < 0.7 else digitos(22)
+                for _ in range(cantidad)]
+        
+        inicio = time.perf_counter()
+        escalares = [validar_cbu(c) for c in cbus]
+        duracion_escalar = time.perf_counter() - inicio
+        
+        inicio = time.perf_counter()
+        validos, esperados = validar_cbus_lote(cbus)
+        duracion_lote = time.perf_counter() - inicio
+        
+        for i, (valido, mensaje) in enumerate(escalares):
+            digito = debe_ser(mensaje)
+            bloque = 0 if 'primer bloque' in mensaje else 1
+            if bool(validos[i]) != valido:
+                errores.append(f"CBU {cbus[i]!r}: lote={validos[i]} escalar={valido}")
+            elif digito is not None and esperados[i, bloque] != digito:
+                errores.append(f"CBU {cbus[i]!r}: lote esperaba {esperados[i, bloque]}, escalar {digito}")
+        
+        print(f"\n2. {cantidad} CBU ({sum(v for v, _ in escalares)} válidos)")
+        print(f"   De a uno: {duracion_escalar:.3f}s | En lote: {duracion_lote:.3f}s")
+        
+        if errores:
+            print(f"\n✗ {len(errores)} diferencias, por ejemplo:")
+            for error in errores[:10]:
+                print(f"   {error}")
+            return False
+        
+        print("\n✓ Los validadores en lote coinciden con los de a uno")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error en test de validación en lote: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+@contextmanager
+def base_temporal():
+    """
+    Cambia la base (y la carpeta de los Excel) por unas temporales.
+    
+    Para los tests que crean rangos, cheques o planillas: no tocan los
+    datos reales. Al salir se vuelve a la base de siempre.
+    
+    Ejemplo:
+        with base_temporal():
+            ref = Referencia.crear_con_prefijo("TESTR")
+    """
+    from config.database import DatabaseConfig
+    from config.mapa_identidad import invalidar_todos
+    from services.excel_service import ExcelService
+    
+    db_path, db_dir = DatabaseConfig.DB_PATH, DatabaseConfig.DB_DIR
+    carpeta_salida = ExcelService.CARPETA_SALIDA
+    
+    with tempfile.TemporaryDirectory() as carpeta:
+        try:
+            DatabaseConfig.cerrar_conexiones()
+            invalidar_todos()
+            DatabaseConfig.DB_DIR = Path(carpeta)
+            DatabaseConfig.DB_PATH = Path(carpeta) / 'pagos.db'
+            ExcelService.CARPETA_SALIDA = carpeta
+            DatabaseConfig.inicializar_db()
+            yield Path(carpeta)
+        finally:
+            DatabaseConfig.cerrar_conexiones()
+            invalidar_todos()
+            DatabaseConfig.DB_PATH, DatabaseConfig.DB_DIR = db_path, db_dir
+            ExcelService.CARPETA_SALIDA = carpeta_salida
+
+
+def crear_planilla_de_prueba(prefijo="TESTR", cheques=2, transferencias=1):
+    """
+    Crea una referencia y una planilla con items (para los tests).
+    
+    Los cheques alternan común (modalidad 6) y diferido (modalidad 8).
+    
+    Returns:
+        Planilla: La planilla creada, en borrador
+    """
+    from models.referencia import Referencia
+    from models.planilla import Planilla
+    
+    ref = Referencia.crear_con_prefijo(prefijo, "Prueba")
+    planilla = Planilla.crear(ref.id, "001", "123")
+    for i in range(cheques):
+        if i % 2 == 0:
+            planilla.agregar_item('CUIT', '20123456786', f'C{i}', 'Juan', 100.0, 6,
+                                  fecha_emision='2026-01-01')
+        else:
+            planilla.agregar_item('CUIT', '20123456786', f'C{i}', 'Juan', 200.0, 8,
+                                  fecha_emision='2026-01-01',
+                                  fecha_pago_diferido='2026-02-01')
+    for i in range(transferencias):
+        planilla.agregar_item('CUIT', '20123456786', f'T{i}', 'Juan', 300.0, 2,
+                              cuenta_pago='0000003100000000000001')
+    return planilla
+
+
+def test_regenerar_planilla():
+    """
+    Regenerar el Excel de una planilla reusa sus cheques (no crea otros).
+    
+    Usa una base temporal para no consumir números de los rangos reales.
+    """
+    print("\n" + "=" * 70)
+    print("TEST 6: REGENERAR PLANILLA")
+    print("=" * 70)
+    
+    from config.database import DatabaseConfig
+    from services.excel_service import ExcelService
+    
+    try:
+        with base_temporal():
+            from models.rango_cheque import RangoCheque
+            
+            RangoCheque.crear('comun', 1, 1000, 1999)
+            RangoCheque.crear('diferido', 1, 5000, 5999)
+            planilla = crear_planilla_de_prueba()
+            
+            def cheques():
+                return DatabaseConfig.ejecutar_query(
+                    "SELECT COUNT(*) AS total FROM cheques_emitidos WHERE planilla_id = ?",
+                    params=(planilla.id,), fetch_one=True
+                )['total']
+            
+            def numeros():
+                return [item['numero_cheque'] for item in planilla.iterar_items()]
+            
+            # 1. Primera generación: un cheque por item de cheque
+            print("\n1. Generando la planilla...")
+            ExcelService.generar_planilla(planilla.id)
+            primeros = numeros()
+            print(f"   ✓ Cheques: {cheques()} - números: {primeros}")
+            assert cheques() == 2, "La primera generación debe crear 2 cheques"
+            
+            # 2. Regenerar, en los dos modos: mismos cheques y números
+            for streaming in (False, True):
+                print(f"\n2. Regenerando (streaming={streaming})...")
+                ExcelService.generar_planilla(planilla.id, streaming=streaming)
+                print(f"   ✓ Cheques: {cheques()} - números: {numeros()}")
+                assert cheques() == 2, "Regenerar no debe crear cheques nuevos"
+                assert numeros() == primeros, "Regenerar no debe cambiar los números"
+        
+        print("\n✓ Regenerar una planilla reusa sus cheques")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error en test de regeneración: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_estadisticas_por_referencia():
+    """Los cheques de una planilla se cuentan en la referencia de la planilla"""
+    print("\n" + "=" * 70)
+    print("TEST 7: ESTADÍSTICAS POR REFERENCIA")
+    print("=" * 70)
+    
+    from services.excel_service import ExcelService
+    from services.estadisticas_service import EstadisticasService
+    
+    try:
+        with base_temporal():
+            from models.rango_cheque import RangoCheque
+            from models.referencia import Referencia
+            
+            RangoCheque.crear('comun', 1, 1000, 1999)
+            RangoCheque.crear('diferido', 1, 5000, 5999)
+            
+            # Dos referencias: 3 cheques en una, 1 en la otra
+            planilla_a = crear_planilla_de_prueba("TESTA", cheques=3)
+            planilla_b = crear_planilla_de_prueba("TESTB", cheques=1)
+            for planilla in (planilla_a, planilla_b):
+                ExcelService.generar_planilla(planilla.id)
+            
+            codigo_a = Referencia.obtener_por_id(planilla_a.referencia_id).codigo
+            codigo_b = Referencia.obtener_por_id(planilla_b.referencia_id).codigo
+            
+            por_referencia = EstadisticasService.obtener(forzar=True)['cheques']['por_referencia']
+            print(f"\n   ✓ Cheques por referencia: {por_referencia}")
+            
+            assert None not in por_referencia, "Hay cheques sin referencia"
+            assert por_referencia[codigo_a] == {'cantidad': 3, 'importe': 400.0}
+            assert por_referencia[codigo_b] == {'cantidad': 1, 'importe': 100.0}
+        
+        print("\n✓ Los cheques se agrupan por la referencia de su planilla")
+        
+        # 2. El cache sobrevive a que lo pidan hilos distintos
+        print("\n2. Pidiendo las estadísticas desde dos hilos, alternados...")
+        from concurrent.futures import ThreadPoolExecutor
+        with base_temporal():
+            with ThreadPoolExecutor(max_workers=1) as hilo:
+                EstadisticasService.obtener()
+                primera = hilo.submit(EstadisticasService.obtener).result()
+                for _ in range(3):
+                    assert EstadisticasService.obtener() is primera, "El hilo principal recalculó"
+                    assert hilo.submit(EstadisticasService.obtener).result() is primera, \
+                        "El otro hilo recalculó"
+                
+                # Una escritura desde el otro hilo se ve en este
+                hilo.submit(crear_planilla_de_prueba, "TESTC").result()
+                assert EstadisticasService.obtener()['planillas']['total'] == 1
+        print("   ✓ Sin escrituras no se recalcula; con una escritura, sí")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error en test de estadísticas: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_items_lote_invalidos():
+    """agregar_items_lote rechaza por fila los valores que traen Excel y pandas"""
+    print("\n" + "=" * 70)
+    print("TEST 8: CARGA EN LOTE CON VALORES INVÁLIDOS")
+    print("=" * 70)
+    
+    try:
+        with base_temporal():
+            planilla = crear_planilla_de_prueba(cheques=0, transferencias=0)
+            
+            def item(importe=100.0, modalidad=2):
+                return {'tipo_documento': 'CUIT', 'numero_documento': '20123456786',
+                        'identificacion_pago': 'P', 'beneficiario': 'Juan',
+                        'importe': importe, 'modalidad_pago': modalidad,
+                        'cuenta_pago': '0000003100000000000001'}
+            
+            items = [
+                item(),                          # 1: válido
+                item(importe=float('nan')),      # 2: NaN
+                item(importe=float('inf')),      # 3: infinito
+                item(importe=float('-inf')),     # 4: -infinito
+                item(modalidad=6.7),             # 5: modalidad no entera
+                item(modalidad=6.0),             # 6: válido (float entero)
+                item(modalidad=float('nan')),    # 7: modalidad NaN
+                item(importe=0),                 # 8: cero
+            ]
+            resultado = planilla.agregar_items_lote(items)
+            print(f"\n   ✓ {resultado}")
+            for fila, error in resultado.errores:
+                print(f"      Fila {fila}: {error}")
+            
+            assert [fila for fila, _ in resultado.errores] == [2, 3, 4, 5, 7, 8]
+            assert resultado.insertados == 2
+            
+            guardados = [(fila['importe'], fila['modalidad_pago'])
+                         for fila in planilla.iterar_items()]
+            assert guardados == [(100.0, 2), (100.0, 6)], guardados
+        
+        print("\n✓ Solo se guardan las filas con importe y modalidad válidos")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error en test de carga en lote: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_configuracion_service():
+    """Valores por defecto: cache, escrituras y transacciones deshechas"""
+    print("\n" + "=" * 70)
+    print("TEST 9: CONFIGURACIÓN (VALORES POR DEFECTO)")
+    print("=" * 70)
+    
+    from config.database import DatabaseConfig
+    from services.configuracion_service import ConfiguracionService
+    
+    try:
+        with base_temporal():
+            ConfiguracionService.invalidar()
+            
+            # 1. Lo que se guarda con el servicio se lee al instante
+            ConfiguracionService.guardar_varias({'sucursal_default': '001',
+                                                 'cuenta_debito_default': '123'})
+            assert ConfiguracionService.obtener('sucursal_default') == '001'
+            print("\n   ✓ Guardar y leer: OK")
+            
+            # 2. Lo leído dentro de una transacción deshecha no queda en el cache
+            try:
+                with DatabaseConfig.transaccion():
+                    DatabaseConfig.ejecutar_query(
+                        "UPDATE configuracion SET valor = '999' WHERE clave = 'sucursal_default'"
+                    )
+                    assert ConfiguracionService.obtener('sucursal_default') == '999'
+                    raise RuntimeError("deshacer")
+            except RuntimeError:
+                pass
+            assert ConfiguracionService.obtener('sucursal_default') == '001', \
+                "El cache guardó un valor que no se confirmó"
+            print("   ✓ Transacción deshecha: el cache no la ve")
+            
+            # 3. guardar() dentro de una transacción deshecha tampoco
+            try:
+                with DatabaseConfig.transaccion():
+                    ConfiguracionService.guardar('cuenta_debito_default', '456')
+                    raise RuntimeError("deshacer")
+            except RuntimeError:
+                pass
+            assert ConfiguracionService.obtener('cuenta_debito_default') == '123'
+            print("   ✓ guardar() deshecho: el cache no lo ve")
+        
+        ConfiguracionService.invalidar()
+        print("\n✓ ConfiguracionService solo cachea valores confirmados")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error en test de configuración: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_transacciones():
+    """transaccion(): rollback, SAVEPOINT anidado y al_terminar_transaccion"""
+    print("\n" + "=" * 70)
+    print("TEST 10: TRANSACCIONES")
+    print("=" * 70)
+    
+    from config.database import DatabaseConfig
+    
+    def valor(clave):
+        fila = DatabaseConfig.ejecutar_query(
+            "SELECT valor FROM configuracion WHERE clave = ?",
+            params=(clave,), fetch_one=True
+        )
+        return fila[0] if fila else None
+    
+    def escribir(clave, dato):
+        DatabaseConfig.ejecutar_query(
+            "INSERT OR REPLACE INTO configuracion (clave, valor) VALUES (?, ?)",
+            params=(clave, dato)
+        )
+    
+    try:
+        with base_temporal():
+            # 1. Una excepción deshace todo el bloque
+            try:
+                with DatabaseConfig.transaccion():
+                    escribir('tx_a', '1')
+                    escribir('tx_b', '2')
+                    raise RuntimeError("falla a la mitad")
+            except RuntimeError:
+                pass
+            assert valor('tx_a') is None and valor('tx_b') is None, \
+                "El rollback dejó filas escritas"
+            assert not DatabaseConfig.en_transaccion()
+            print("\n   ✓ Excepción: rollback de todo el bloque")
+            
+            # 2. Si falla el bloque anidado, solo se deshace lo suyo
+            with DatabaseConfig.transaccion():
+                escribir('tx_externa', 'si')
+                try:
+                    with DatabaseConfig.transaccion():
+                        escribir('tx_interna', 'no')
+                        raise RuntimeError("falla el SAVEPOINT")
+                except RuntimeError:
+                    pass
+                assert DatabaseConfig.en_transaccion()
+                escribir('tx_despues', 'si')
+            assert valor('tx_externa') == 'si' and valor('tx_despues') == 'si', \
+                "Se perdió el trabajo de la transacción de afuera"
+            assert valor('tx_interna') is None, "El SAVEPOINT no se deshizo"
+            print("   ✓ SAVEPOINT: se deshace lo interno, lo externo se confirma")
+            
+            # 3. al_terminar_transaccion: después del commit, del rollback
+            #    y en el acto si no hay transacción
+            llamadas = []
+            with DatabaseConfig.transaccion():
+                escribir('tx_hook', '1')
+                with DatabaseConfig.transaccion():
+                    DatabaseConfig.al_terminar_transaccion(
+                        lambda: llamadas.append(('commit', valor('tx_hook')))
+                    )
+                assert llamadas == [], "Se llamó antes de terminar la transacción"
+            assert llamadas == [('commit', '1')], llamadas
+            
+            llamadas.clear()
+            try:
+                with DatabaseConfig.transaccion():
+                    escribir('tx_hook', '2')
+                    DatabaseConfig.al_terminar_transaccion(
+                        lambda: llamadas.append(('rollback', valor('tx_hook')))
+                    )
+                    raise RuntimeError("deshacer")
+            except RuntimeError:
+                pass
+            assert llamadas == [('rollback', '1')], llamadas
+            
+            llamadas.clear()
+            DatabaseConfig.al_terminar_transaccion(lambda: llamadas.append('ya'))
+            assert llamadas == ['ya']
+            print("   ✓ al_terminar_transaccion: al final de la principal (commit o rollback)")
+        
+        print("\n✓ transaccion() es todo o nada")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error en test de transacciones: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_reservar_bloque():
+    """ChequeService.reservar_bloque: salto entre rangos y rangos agotados"""
+    print("\n" + "=" * 70)
+    print("TEST 11: RESERVA DE NÚMEROS DE CHEQUE EN BLOQUE")
+    print("=" * 70)
+    
+    from config.database import DatabaseConfig
+    from services.cheque_service import ChequeService
+    
+    def proximos(tipo):
+        filas = DatabaseConfig.ejecutar_query(
+            "SELECT numero_orden, proximo_numero FROM rangos_cheques "
+            "WHERE tipo = ? ORDER BY numero_orden",
+            params=(tipo,), fetch_all=True
+        )
+        return [(f['numero_orden'], f['proximo_numero']) for f in filas]
+    
+    try:
+        with base_temporal():
+            from models.rango_cheque import RangoCheque
+            
+            RangoCheque.crear('diferido', 1, 100, 104)
+            RangoCheque.crear('diferido', 2, 200, 299)
+            
+            # 1. Al rango 1 le quedan 2 números: el tercero sale del rango 2
+            assert ChequeService.reservar_bloque('diferido', 3) == [100, 101, 102]
+            numeros = ChequeService.reservar_bloque('diferido', 3)
+            print(f"\n   Rango 1 con 2 libres, pido 3: {numeros}")
+            assert numeros == [103, 104, 200], numeros
+            assert proximos('diferido') == [(1, 105), (2, 201)], proximos('diferido')
+            print("   ✓ Sigue con el rango 2 cuando se termina el 1")
+            
+            # 2. No alcanzan: error y ningún proximo_numero cambia
+            antes = proximos('diferido')
+            try:
+                ChequeService.reservar_bloque('diferido', 100)
+                raise AssertionError("Debería fallar: quedan 99 números")
+            except ValueError as e:
+                print(f"   ✓ Rechazado: {e}")
+            assert proximos('diferido') == antes, \
+                f"Se consumieron números: {antes} -> {proximos('diferido')}"
+            
+            # 3. Todos agotados: error y tampoco cambia nada
+            RangoCheque.crear('comun', 1, 10, 11)
+            assert ChequeService.reservar_bloque('comun', 2) == [10, 11]
+            antes = proximos('comun')
+            try:
+                ChequeService.reservar_bloque('comun', 1)
+                raise AssertionError("Debería fallar: el rango está agotado")
+            except ValueError as e:
+                print(f"   ✓ Rechazado: {e}")
+            assert proximos('comun') == antes
+            print("   ✓ Si no alcanza, no se consume ningún número")
+        
+        print("\n✓ reservar_bloque es todo o nada")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error en test de reserva en bloque: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_crear_cheques_en_lote():
+    """Cheque.crear_lote vincula cada item con SU cheque (items_planilla.cheque_id)"""
+    print("\n" + "=" * 70)
+    print("TEST 12: CREACIÓN DE CHEQUES EN LOTE")
+    print("=" * 70)
+    
+    from config.database import DatabaseConfig
+    from services.cheque_service import ChequeService
+    
+    try:
+        with base_temporal():
+            from models.cheque import Cheque
+            from models.rango_cheque import RangoCheque
+            
+            RangoCheque.crear('comun', 1, 1000, 1999)
+            RangoCheque.crear('diferido', 1, 5000, 5999)
+            
+            # Cheques que ya existían: los IDs nuevos no empiezan en 1
+            Cheque.crear_lote([
+                {'numero_cheque': n, 'tipo': 'comun', 'beneficiario': 'Previo',
+                 'importe': 1.0}
+                for n in (1, 2, 3)
+            ])
+            
+            planilla = crear_planilla_de_prueba(cheques=5, transferencias=2)
+            items = planilla.obtener_items()
+            items_cheques = [i for i in items if i['modalidad_pago'] in (6, 8)]
+            
+            asignaciones = ChequeService.asignar_numeros_a_planilla(planilla.id, items_cheques)
+            print(f"\n   Asignados: {asignaciones}")
+            
+            filas = DatabaseConfig.ejecutar_query(
+                """
+                SELECT i.id, i.modalidad_pago, i.importe, i.cheque_id,
+                       c.numero_cheque, c.tipo, c.importe AS importe_cheque,
+                       c.planilla_id
+                FROM items_planilla i
+                LEFT JOIN cheques_emitidos c ON c.id = i.cheque_id
+                WHERE i.planilla_id = ?
+                """,
+                params=(planilla.id,), fetch_all=True
+            )
+            
+            for fila in filas:
+                if fila['modalidad_pago'] == 2:
+                    assert fila['cheque_id'] is None, "Una transferencia quedó con cheque"
+                    continue
+                tipo = 'diferido' if fila['modalidad_pago'] == 8 else 'comun'
+                assert fila['cheque_id'] is not None, f"Item {fila['id']} sin cheque"
+                assert fila['numero_cheque'] == asignaciones[fila['id']], \
+                    f"Item {fila['id']}: vinculado al cheque {fila['numero_cheque']}, " \
+                    f"se le asignó {asignaciones[fila['id']]}"
+                assert fila['tipo'] == tipo and fila['importe_cheque'] == fila['importe']
+                assert fila['planilla_id'] == planilla.id
+            
+            ids_cheques = [f['cheque_id'] for f in filas if f['cheque_id'] is not None]
+            assert len(set(ids_cheques)) == len(items_cheques) == 5, \
+                "Cada item de cheque debe tener un cheque propio"
+            print("   ✓ Cada item apunta al cheque con su número, tipo e importe")
+        
+        print("\n✓ crear_lote vincula los items correctamente")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error en test de cheques en lote: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_busqueda_agenda():
+    """Búsqueda FTS5 de la agenda: acentos, prefijos, bm25 y triggers"""
+    print("\n" + "=" * 70)
+    print("TEST 13: BÚSQUEDA EN LA AGENDA (FTS5)")
+    print("=" * 70)
+    
+    try:
+        with base_temporal():
+            from models.agenda import (ContactoCheque, ContactoTransferencia,
+                                       buscar_contactos_cheque,
+                                       buscar_contactos_transferencia)
+            
+            def nombres(resultados):
+                return [c.nombre for c in resultados]
+            
+            # El mejor resultado se crea PRIMERO: el desempate por fecha
+            # (más nuevo primero) daría el orden contrario
+            ContactoCheque.crear("José González", "20-12345678-6")
+            ContactoCheque.crear("Josefina Gonzalo Pérez Rodríguez de la Fuente",
+                                 "27-11111111-7")
+            ContactoCheque.crear("Ana Martínez", "23-22222222-2")
+            
+            # 1. Sin distinguir acentos ni mayúsculas
+            assert nombres(buscar_contactos_cheque("gonzalez")) == ["José González"]
+            assert nombres(buscar_contactos_cheque("MARTINEZ")) == ["Ana Martínez"]
+            assert nombres(buscar_contactos_cheque("martínez")) == ["Ana Martínez"]
+            print("\n   ✓ Sin acentos ni mayúsculas")
+            
+            # 2. Por prefijo de palabra (y CUIT con o sin guiones)
+            assert len(buscar_contactos_cheque("jos gonz")) == 2
+            assert nombres(buscar_contactos_cheque("20-1234")) == ["José González"]
+            assert nombres(buscar_contactos_cheque("2012345678")) == ["José González"]
+            assert buscar_contactos_cheque("osé") == [], "Solo debe buscar por prefijo"
+            print("   ✓ Por prefijo (nombre y CUIT)")
+            
+            # 3. bm25: el nombre corto, donde pesa más la palabra, va primero
+            resultado = nombres(buscar_contactos_cheque("gonz"))
+            assert resultado == ["José González",
+                                 "Josefina Gonzalo Pérez Rodríguez de la Fuente"], resultado
+            print("   ✓ Ordenado por relevancia (bm25)")
+            
+            # 4. Triggers: actualizar y desactivar mantienen el índice al día
+            ana = ContactoCheque.obtener_por_cuit("23-22222222-2")
+            ana.nombre = "Ana Ñáñez"
+            ana.actualizar()
+            assert buscar_contactos_cheque("martinez") == [], "Quedó el nombre viejo"
+            assert nombres(buscar_contactos_cheque("nanez")) == ["Ana Ñáñez"]
+            
+            ana.desactivar()
+            encontrados = buscar_contactos_cheque("nanez")
+            assert [(c.nombre, c.activo) for c in encontrados] == [("Ana Ñáñez", False)]
+            print("   ✓ Triggers: el índice sigue a actualizar() y desactivar()")
+            
+            # 5. Transferencias: también por CBU
+            contacto = ContactoTransferencia.crear("María Núñez", "27-98765432-0",
+                                                   "0170099220000003912346")
+            assert nombres(buscar_contactos_transferencia("0170 0992")) == ["María Núñez"]
+            contacto.cbu = "2850590940090418135201"
+            contacto.actualizar()
+            assert buscar_contactos_transferencia("01700992") == []
+            assert nombres(buscar_contactos_transferencia("nunez 2850")) == ["María Núñez"]
+            print("   ✓ Transferencias: por CBU, y el trigger sigue al cambio de CBU")
+        
+        print("\n✓ La búsqueda de la agenda usa el índice FTS5")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error en test de búsqueda: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_codigos_referencia():
+    """Códigos de referencia: migración, máximo y reservas concurrentes"""
+    print("\n" + "=" * 70)
+    print("TEST 14: CÓDIGOS DE REFERENCIA (CONTADOR POR PREFIJO)")
+    print("=" * 70)
+    
+    import sqlite3
+    import threading
+    from config.database import DatabaseConfig
+    
+    try:
+        with base_temporal():
+            from models.referencia import Referencia
+            
+            def contador(prefijo):
+                return DatabaseConfig.valor_secuencia(
+                    prefijo, tabla='secuencias_referencia', columna='prefijo'
+                )
+            
+            # 1. Base "vieja": referencias cargadas antes de existir el contador
+            DatabaseConfig.cerrar_conexiones()
+            conn = sqlite3.connect(DatabaseConfig.DB_PATH)
+            conn.executescript("""
+                DROP TRIGGER trg_referencias_secuencia;
+                DROP TABLE secuencias_referencia;
+                INSERT INTO referencias (codigo) VALUES
+                    ('LABSE0000118'), ('LABSE0000005'), ('OTROS0000042');
+            """)
+            conn.close()
+            
+            DatabaseConfig.inicializar_db()
+            assert Referencia.crear_con_prefijo("LABSE").codigo == "LABSE0000119"
+            assert Referencia.crear_con_prefijo("OTROS").codigo == "OTROS0000043"
+            assert Referencia.crear_con_prefijo("NUEVO").codigo == "NUEVO0000001"
+            print("\n   ✓ Migración: los códigos siguen desde los existentes")
+            
+            # Correr la migración de nuevo no cambia nada
+            DatabaseConfig.inicializar_db()
+            assert contador("LABSE") == 119
+            
+            # Un código cargado a mano también mueve el contador
+            Referencia.crear("LABSE0000500")
+            assert Referencia.generar_siguiente_codigo("LABSE") == "LABSE0000501"
+            print("   ✓ Un alta manual no se vuelve a entregar")
+            
+            # 2. Pasarse de 7 dígitos: error y no se consume nada
+            DatabaseConfig.ejecutar_query(
+                "UPDATE secuencias_referencia SET ultimo = 9999998 WHERE prefijo = 'OTROS'"
+            )
+            try:
+                Referencia.reservar_codigos("OTROS", 2)
+                raise AssertionError("Debería fallar: solo queda 1 número")
+            except ValueError as e:
+                print(f"   ✓ Rechazado: {e}")
+            assert contador("OTROS") == 9999998, "La reserva fallida consumió números"
+            assert Referencia.reservar_codigos("OTROS") == ["OTROS9999999"]
+            print("   ✓ Superar el máximo no consume números")
+            
+            # 3. Dos hilos (dos conexiones) a la vez: ningún código repetido
+            codigos = []
+            errores = []
+            largada = threading.Barrier(2)
+            
+            def crear_varias():
+                try:
+                    largada.wait()
+                    for _ in range(25):
+                        codigos.append(Referencia.crear_con_prefijo("CONCU").codigo)
+                except Exception as e:
+                    errores.append(e)
+            
+            hilos = [threading.Thread(target=crear_varias) for _ in range(2)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            
+            assert not errores, errores
+            esperados = [f"CONCU{n:07d}" for n in range(1, 51)]
+            assert sorted(codigos) == esperados, "Hay códigos repetidos o salteados"
+            print("   ✓ 2 hilos x 25 altas: 50 códigos distintos y consecutivos")
+        
+        print("\n✓ Los códigos de referencia no se repiten")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error en test de códigos de referencia: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_numeros_planilla():
+    """Números de planilla: migración, máximo y reservas concurrentes"""
+    print("\n" + "=" * 70)
+    print("TEST 15: NÚMEROS DE PLANILLA (SECUENCIAS)")
+    print("=" * 70)
+    
+    import sqlite3
+    import threading
+    from config.database import DatabaseConfig
+    
+    def base_vieja(proximo, numero_existente):
+        """Vuelve la base al esquema anterior a la tabla secuencias"""
+        DatabaseConfig.cerrar_conexiones()
+        conn = sqlite3.connect(DatabaseConfig.DB_PATH)
+        conn.executescript(f"""
+            DROP TABLE secuencias;
+            INSERT OR REPLACE INTO configuracion (clave, valor)
+                VALUES ('proximo_numero_planilla', '{proximo}');
+            INSERT INTO planillas (referencia_id, numero_planilla)
+                VALUES (1, {numero_existente});
+        """)
+        conn.close()
+        DatabaseConfig.inicializar_db()
+    
+    try:
+        with base_temporal():
+            from models.planilla import Planilla
+            from models.referencia import Referencia
+            
+            ref = Referencia.crear_con_prefijo("TESTP")
+            
+            # 1. Migración: sigue desde proximo_numero_planilla...
+            base_vieja(proximo=42, numero_existente=10)
+            assert Planilla.crear(ref.id, "001", "123").numero_planilla == 42
+            clave = DatabaseConfig.ejecutar_query(
+                "SELECT 1 FROM configuracion WHERE clave = 'proximo_numero_planilla'",
+                fetch_one=True
+            )
+            assert clave is None, "La migración debe borrar la clave vieja"
+            
+            # ... o desde el mayor número usado, si es más alto
+            base_vieja(proximo=42, numero_existente=100)
+            assert Planilla.crear(ref.id, "001", "123").numero_planilla == 101
+            print("\n   ✓ Migración: los números siguen desde los existentes")
+            
+            # 2. Superar el máximo: error y no se consume nada
+            try:
+                DatabaseConfig.reservar_valores('prueba', 5, maximo=3)
+                raise AssertionError("Debería fallar: el máximo es 3")
+            except ValueError as e:
+                print(f"   ✓ Rechazado: {e}")
+            assert DatabaseConfig.valor_secuencia('prueba') == 0
+            assert list(DatabaseConfig.reservar_valores('prueba', 3, maximo=3)) == [1, 2, 3]
+            print("   ✓ Superar el máximo no consume números")
+            
+            # 3. Dos hilos (dos conexiones) a la vez: ningún número repetido
+            numeros = []
+            errores = []
+            largada = threading.Barrier(2)
+            
+            def crear_varias():
+                try:
+                    largada.wait()
+                    for _ in range(25):
+                        planilla = Planilla.crear(ref.id, "001", "123")
+                        numeros.append(planilla.numero_planilla)
+                except Exception as e:
+                    errores.append(e)
+            
+            hilos = [threading.Thread(target=crear_varias) for _ in range(2)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            
+            assert not errores, errores
+            assert sorted(numeros) == list(range(102, 152)), \
+                "Hay números repetidos o salteados"
+            print("   ✓ 2 hilos x 25 planillas: 50 números distintos y consecutivos")
+        
+        print("\n✓ Los números de planilla no se repiten")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error en test de números de planilla: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_mapa_identidad():
+    """MapaIdentidad: invalidación por data_version, transacciones y rangos"""
+    print("\n" + "=" * 70)
+    print("TEST 16: MAPA DE IDENTIDAD (CACHE POR ID)")
+    print("=" * 70)
+    
+    import sqlite3
+    from config.database import DatabaseConfig
+    from config.mapa_identidad import MapaIdentidad
+    
+    intervalo = MapaIdentidad.INTERVALO_VERIFICACION
+    try:
+        with base_temporal():
+            from models.referencia import Referencia
+            from models.rango_cheque import RangoCheque
+            
+            # Mirar data_version en cada lectura (sin esperar el intervalo)
+            MapaIdentidad.INTERVALO_VERIFICACION = 0
+            
+            ref = Referencia.crear_con_prefijo("TESTM", "original")
+            assert Referencia.obtener_por_id(ref.id) is Referencia.obtener_por_id(ref.id)
+            print("\n   ✓ Mismo id, misma instancia")
+            
+            # 1. Escritura de OTRA conexión: data_version cambia y se descarta
+            conn = sqlite3.connect(DatabaseConfig.DB_PATH)
+            conn.execute("UPDATE referencias SET descripcion = 'externa' WHERE id = ?",
+                         (ref.id,))
+            conn.commit()
+            conn.close()
+            assert Referencia.obtener_por_id(ref.id).descripcion == 'externa', \
+                "El cache no vio la escritura de otra conexión"
+            print("   ✓ Escritura de otra conexión: el cache se invalida")
+            
+            # 2. Lo leído dentro de una transacción no se guarda
+            Referencia.cache.invalidar()
+            try:
+                with DatabaseConfig.transaccion():
+                    DatabaseConfig.ejecutar_query(
+                        "UPDATE referencias SET descripcion = 'sin confirmar' WHERE id = ?",
+                        params=(ref.id,)
+                    )
+                    assert Referencia.obtener_por_id(ref.id).descripcion == 'sin confirmar'
+                    assert len(Referencia.cache) == 0, "Se cacheó dentro de la transacción"
+                    raise RuntimeError("deshacer")
+            except RuntimeError:
+                pass
+            assert Referencia.obtener_por_id(ref.id).descripcion == 'externa'
+            print("   ✓ Dentro de una transacción no se cachea")
+            
+            # 3. Rangos: obtener_rango_activo no toca el objeto del cache...
+            rango = RangoCheque.crear('comun', 1, 1000, 1999)
+            DatabaseConfig.ejecutar_query(
+                "UPDATE rangos_cheques SET proximo_numero = NULL WHERE id = ?",
+                params=(rango.id,)
+            )
+            cacheado = RangoCheque.obtener_por_id(rango.id)
+            activo = RangoCheque.obtener_rango_activo('comun')
+            assert activo is not cacheado and activo.proximo_numero == 1000
+            assert cacheado.proximo_numero is None, "Se modificó el objeto del cache"
+            print("   ✓ obtener_rango_activo no modifica el objeto cacheado")
+            
+            # ... y dos objetos del mismo rango no entregan el mismo número
+            viejo = RangoCheque.obtener_todos(tipo='comun')[0]
+            numeros = [cacheado.obtener_siguiente_numero(),
+                       viejo.obtener_siguiente_numero(),
+                       RangoCheque.obtener_por_id(rango.id).obtener_siguiente_numero()]
+            assert numeros == [1000, 1001, 1002], numeros
+            assert RangoCheque.obtener_por_id(rango.id).proximo_numero == 1003
+            print(f"   ✓ obtener_siguiente_numero desde objetos distintos: {numeros}")
+            
+            # Agotado: error y proximo_numero no cambia
+            chico = RangoCheque.crear('diferido', 1, 10, 11)
+            assert [chico.obtener_siguiente_numero() for _ in range(2)] == [10, 11]
+            try:
+                chico.obtener_siguiente_numero()
+                raise AssertionError("Debería fallar: el rango está agotado")
+            except ValueError as e:
+                print(f"   ✓ Rechazado: {e}")
+            assert RangoCheque.obtener_por_id(chico.id).proximo_numero == 12
+        
+        print("\n✓ El mapa de identidad no devuelve datos viejos")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error en test de mapa de identidad: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        MapaIdentidad.INTERVALO_VERIFICACION = intervalo
+
+
 def main():
     """Ejecuta todos los tests"""
     print("\n")
@@ -188,6 +1177,18 @@ def main():
     resultados.append(("Base de Datos", test_base_datos()))
     resultados.append(("Modelo Referencia", test_modelo_referencia()))
     resultados.append(("Interfaz Grafica", test_interfaz()))
+    resultados.append(("Validacion en Lote", test_validadores_lote()))
+    resultados.append(("Regenerar Planilla", test_regenerar_planilla()))
+    resultados.append(("Estadisticas por Referencia", test_estadisticas_por_referencia()))
+    resultados.append(("Items en Lote Invalidos", test_items_lote_invalidos()))
+    resultados.append(("Configuracion", test_configuracion_service()))
+    resultados.append(("Transacciones", test_transacciones()))
+    resultados.append(("Reserva de Cheques en Bloque", test_reservar_bloque()))
+    resultados.append(("Cheques en Lote", test_crear_cheques_en_lote()))
+    resultados.append(("Busqueda en la Agenda", test_busqueda_agenda()))
+    resultados.append(("Codigos de Referencia", test_codigos_referencia()))
+    resultados.append(("Numeros de Planilla", test_numeros_planilla()))
+    resultados.append(("Mapa de Identidad", test_mapa_identidad()))
     
     # Resumen
     print("\n" + "=" * 70)
@@ -0,0 +1,227 @@
+"""
+============================================================================
+UI - BÚSQUEDA MIENTRAS SE ESCRIBE
+============================================================================
+Conecta un campo de búsqueda con una ListaVirtual: los resultados se
+actualizan solos a medida que el usuario escribe.
+
+Consultar la base en CADA tecla no escala (20.000 contactos, una consulta
+por letra, y las respuestas pueden llegar desordenadas). Acá:
+
+1. Demora (debounce): la consulta sale recién cuando el usuario deja de
+   escribir DEMORA_MS milisegundos. "gonzalez" rápido = 1 consulta, no 8.
+
+2. Consultas viejas: cada consulta va al EjecutorTareas con la misma
+   clave y reemplazar=True. Si sale una nueva, la anterior se cancela
+   (y si estaba ejecutando el SQL, se interrumpe con conn.interrupt()).
+   Un resultado viejo nunca pisa a uno nuevo.
+
+3. Refinar en memoria: si la última consulta trajo TODOS sus resultados
+   (hasta LIMITE_EN_MEMORIA filas) y el término nuevo solo puede achicar
+   ese conjunto ("juan" → "juan g"), se filtra la lista que ya está en
+   memoria, en el acto y sin consultar. Las filas filtradas mantienen el
+   orden de la consulta original.
+
+Uso:
+    self.busqueda = BusquedaEnVivo(
+        self.entry_busqueda, self.lista_contactos, self.ejecutor,
+        buscar=buscar_contactos_cheque,          # buscar(termino, limite, desplazamiento)
+        filtro=filtro_busqueda,                  # filtro(termino) → coincide(indice)
+        refina=refina_busqueda,                  # refina(anterior, nuevo) → bool
+        indexar=palabras_contacto,               # lo que recibe coincide() por fila
+        al_vaciar=self.cargar_contactos,
+        clave='lista_contactos'
+    )
+============================================================================
+"""
+
+from tkinter import messagebox
+
+from config.database import DatabaseConfig
+from ui.lista_virtual import FuentePaginada
+from ui.tareas import al_cancelar
+
+
+class BusquedaEnVivo:
+    """Búsqueda con demora, cancelación de consultas viejas y refinado en memoria"""
+
+    DEMORA_MS = 250
+
+    # Hasta cuántos resultados se guardan para refinar en memoria.
+    # Si una consulta trae más, se muestra paginada como siempre.
+    LIMITE_EN_MEMORIA = 5000
+
+    def __init__(self, entry, lista, ejecutor, buscar, filtro, refina, al_vaciar,
+                 clave, indexar=None, demora_ms=None,
+                 texto_vacio="No se encontraron resultados para '{termino}'"):
+        """
+        Args:
+            entry (CTkEntry): Campo de búsqueda (se le conecta <KeyRelease>)
+            lista (ListaVirtual): Donde se muestran los resultados
+            ejecutor (EjecutorTareas): Para consultar en segundo plano
+            buscar (callable): buscar(termino, limite, desplazamiento) → list
+            filtro (callable): filtro(termino) → coincide(indice) → bool,
+                la versión en memoria de buscar()
+            refina (callable): refina(anterior, nuevo) → bool, True si los
+                resultados de nuevo están dentro de los de anterior
+            al_vaciar (callable): Qué mostrar con el campo vacío
+            clave (hashable): Clave de las tareas. Usar la misma que la
+                carga de la lista, así una reemplaza a la otra.
+            indexar (callable, optional): indexar(fila) → lo que recibe
+                coincide(). Se calcula una vez por fila, en segundo plano.
+                Defaults to la fila misma.
+            demora_ms (int, optional): Defaults to DEMORA_MS.
+            texto_vacio (str, optional): Mensaje sin resultados ({termino})
+        """
+        self.entry = entry
+        self.lista = lista
+        self.ejecutor = ejecutor
+        self._buscar = buscar
+        self._filtro = filtro
+        self._refina = refina
+        self._al_vaciar = al_vaciar
+        self._indexar = indexar
+        self.clave = clave
+        self.demora_ms = demora_ms if demora_ms is not None else self.DEMORA_MS
+        self.texto_vacio = texto_vacio
+
+        self._termino = ''
+        self._demora = None
+
+        # Último resultado COMPLETO de la base: (termino, filas, indices)
+        self._base = None
+
+        entry.bind('<KeyRelease>', self._al_escribir, add="+")
+
+    # ========================================================================
+    # API PÚBLICA
+    # ========================================================================
+
+    def buscar(self, termino=None):
+        """
+        Consulta la base ya (sin demora ni refinado en memoria).
+
+        Para el botón "Buscar": siempre trae datos frescos.
+
+        Args:
+            termino (str, optional): Defaults to el texto del campo.
+        """
+        self._cancelar_demora()
+        termino = (self.entry.get() if termino is None else termino).strip()
+        self._termino = termino
+
+        if not termino:
+            self._al_vaciar()
+            return
+
+        self.ejecutor.enviar(
+            self._consultar, termino,
+            al_terminar=self._al_llegar,
+            al_fallar=lambda e: messagebox.showerror("Error", f"Error al buscar: {e}"),
+            clave=self.clave,
+            reemplazar=True
+        )
+
+    def invalidar(self):
+        """Olvida los resultados en memoria (después de crear o editar filas)"""
+        self._base = None
+
+    # ========================================================================
+    # INTERNOS
+    # ========================================================================
+
+    def _al_escribir(self, event=None):
+        """<KeyRelease> del campo: filtra en memoria o agenda la consulta"""
+        termino = self.entry.get().strip()
+        if termino == self._termino:
+            # Flechas, Shift, etc.: el texto no cambió
+            return
+        self._termino = termino
+        self._cancelar_demora()
+
+        if not termino:
+            self._al_vaciar()
+            return
+
+        if self._refinar(termino):
+            return
+
+        self._demora = self.entry.after(self.demora_ms, self.buscar)
+
+    def _cancelar_demora(self):
+        """Cancela la consulta agendada (si hay)"""
+        if self._demora is not None:
+            self.entry.after_cancel(self._demora)
+            self._demora = None
+
+    def _refinar(self, termino):
+        """
+        Filtra en memoria el último resultado completo, si alcanza.
+
+        Returns:
+            bool: True si se pudo (y ya se mostró), False si hay que consultar
+        """
+        if self._base is None:
+            return False
+
+        termino_base, filas, indices = self._base
+        if not self._refina(termino_base, termino):
+            return False
+
+        coincide = self._filtro(termino)
+        encontradas = [fila for fila, indice in zip(filas, indices) if coincide(indice)]
+
+        # Lo que estuviera en vuelo ya no corresponde al texto actual
+        self.ejecutor.cancelar(self.clave)
+        self._mostrar(termino, encontradas)
+        return True
+
+    def _consultar(self, termino):
+        """
+        Corre en segundo plano: consulta y prepara los datos para refinar.
+
+        Returns:
+            tuple: (termino, filas, indices). indices es None si la consulta
+                tenía más de LIMITE_EN_MEMORIA filas (filas = las primeras).
+        """
+        # Si esta búsqueda queda vieja mientras corre el SQL, se corta ahí
+        al_cancelar(DatabaseConfig.obtener_pool().obtener().interrupt)
+
+        filas = self._buscar(termino, self.LIMITE_EN_MEMORIA + 1, 0)
+        if len(filas) > self.LIMITE_EN_MEMORIA:
+            return termino, filas, None
+
+        indexar = self._indexar
+        indices = filas if indexar is None else [indexar(fila) for fila in filas]
+        return termino, filas, indices
+
+    def _al_llegar(self, resultado):
+        """Callback de _consultar(), en el hilo de Tk"""
+        termino, filas, indices = resultado
+
+        if indices is not None:
+            self._base = (termino, filas, indices)
+
+        if termino == self._termino:
+            self._mostrar(termino, filas, completa=indices is not None)
+        elif self._base is not None and self._refinar(self._termino):
+            # El usuario siguió escribiendo y lo nuevo sale de este resultado
+            self._cancelar_demora()
+
+    def _mostrar(self, termino, filas, completa=True):
+        """Muestra filas en la lista (paginando en la base si no están todas)"""
+        if completa:
+            fuente = FuentePaginada(
+                cargar_pagina=lambda desde, cantidad: filas[desde:desde + cantidad],
+                contar=lambda: len(filas)
+            )
+        else:
+            # Las primeras LIMITE_EN_MEMORIA filas ya están; el resto, de la base
+            fuente = FuentePaginada(
+                cargar_pagina=lambda desde, cantidad: (
+                    filas[desde:desde + cantidad] if desde + cantidad <= self.LIMITE_EN_MEMORIA
+                    else self._buscar(termino, cantidad, desde)
+                )
+            )
+
+        self.lista.set_fuente(fuente, texto_vacio=self.texto_vacio.format(termino=termino))
@@ -0,0 +1,384 @@
+"""
+============================================================================
+UI - LISTA VIRTUAL
+============================================================================
+Lista con scroll que solo crea los widgets de las filas VISIBLES.
+
+El problema de CTkScrollableFrame con miles de filas:
+- Se crea un CTkFrame (con varios labels y botones) POR CADA fila
+- Con 5.000 contactos son ~25.000 widgets → la pestaña se congela
+
+La lista virtual:
+- Crea solo las filas que entran en pantalla + unas pocas de margen (overscan)
+- Al hacer scroll REUTILIZA esos mismos frames: solo cambia sus textos
+- Pide los datos a la base de a páginas (FuentePaginada), a medida que
+  se necesitan, en vez de traer toda la tabla
+
+Uso:
+    fuente = FuentePaginada(
+        cargar_pagina=lambda desde, cantidad: Modelo.obtener_todos(
+            limite=cantidad, desplazamiento=desde),
+        contar=Modelo.contar_todos
+    )
+
+    lista = ListaVirtual(
+        padre,
+        alto_fila=70,
+        crear_fila=self.crear_fila,      # crear_fila(padre, alto) → widget vacío
+        mostrar_fila=self.mostrar_fila   # mostrar_fila(widget, dato, indice)
+    )
+    lista.grid(...)
+    lista.set_fuente(fuente)
+
+    # O cargando la primera página en segundo plano (ver ui/tareas.py)
+    ejecutor.enviar(fuente.precargar, al_terminar=lista.set_fuente)
+============================================================================
+"""
+
+import sys
+from collections import OrderedDict
+
+import customtkinter as ctk
+
+
+# ============================================================================
+# FUENTE DE DATOS PAGINADA
+# ============================================================================
+
+class FuentePaginada:
+    """
+    Acceso por índice a una consulta, cargando de a páginas.
+
+    Guarda en memoria las últimas páginas usadas (LRU): hacer scroll
+    de ida y vuelta no vuelve a consultar la base.
+
+    Si no se pasa la función contar, el total se va descubriendo:
+    mientras las páginas vengan llenas se asume que hay al menos una fila
+    más; cuando llega una página incompleta, el total queda exacto.
+    """
+
+    def __init__(self, cargar_pagina, contar=None, tamano_pagina=100, max_paginas=20):
+        """
+        Args:
+            cargar_pagina (callable): cargar_pagina(desplazamiento, limite) → list
+            contar (callable, optional): contar() → int con el total de filas
+            tamano_pagina (int, optional): Filas por consulta. Defaults to 100.
+            max_paginas (int, optional): Páginas guardadas en memoria. Defaults to 20.
+        """
+        self._cargar_pagina = cargar_pagina
+        self._contar = contar
+        self.tamano_pagina = tamano_pagina
+        self.max_paginas = max_paginas
+
+        self._paginas = OrderedDict()
+        self._total = None
+        self._total_exacto = False
+
+    def total(self):
+        """
+        Cantidad de filas (exacta o estimada, ver docstring de la clase).
+
+        Returns:
+            int: Total de filas
+        """
+        if self._total is None:
+            if self._contar is not None:
+                self._total = self._contar()
+                self._total_exacto = True
+            else:
+                self._pagina(0)
+
+        return self._total
+
+    def obtener(self, indice):
+        """
+        Devuelve la fila en la posición indice.
+
+        Args:
+            indice (int): Posición (0 = primera fila)
+
+        Returns:
+            object or None: La fila, o None si no existe
+        """
+        numero, posicion = divmod(indice, self.tamano_pagina)
+        filas = self._pagina(numero)
+        return filas[posicion] if posicion < len(filas) else None
+
+    def precargar(self):
+        """
+        Consulta el total y la primera página.
+
+        Pensado para llamarse en segundo plano (ui/tareas.py) antes de
+        set_fuente(): así el primer dibujo de la lista no consulta la
+        base desde el hilo de Tk.
+
+        Returns:
+            FuentePaginada: La misma fuente (para encadenar)
+        """
+        self.total()
+        self._pagina(0)
+        return self
+
+    def invalidar(self):
+        """Olvida las páginas y el total (después de crear/editar filas)"""
+        self._paginas.clear()
+        self._total = None
+        self._total_exacto = False
+
+    def _pagina(self, numero):
+        """Devuelve una página, desde memoria o consultando la base"""
+        if numero in self._paginas:
+            self._paginas.move_to_end(numero)
+            return self._paginas[numero]
+
+        filas = self._cargar_pagina(numero * self.tamano_pagina, self.tamano_pagina)
+
+        self._paginas[numero] = filas
+        if len(self._paginas) > self.max_paginas:
+            self._paginas.popitem(last=False)
+
+        if not self._total_exacto:
+            if len(filas) < self.tamano_pagina:
+                # Página incompleta: es la última
+                self._total = numero * self.tamano_pagina + len(filas)
+                self._total_exacto = True
+            else:
+                # Página llena: puede haber más
+                self._total = max(self._total or 0,
+                                  (numero + 1) * self.tamano_pagina + 1)
+
+        return filas
+
+
+# ============================================================================
+# WIDGET
+# ============================================================================
+
+class ListaVirtual(ctk.CTkFrame):
+    """
+    Lista con scroll vertical que recicla las filas.
+
+    Todas las filas tienen el mismo alto (alto_fila): así la posición
+    de cada fila se calcula con una multiplicación, sin medir widgets.
+    """
+
+    def __init__(self, parent, alto_fila, crear_fila, mostrar_fila,
+                 overscan=3, separacion=4, texto_vacio="No hay datos.", **kwargs):
+        """
+        Args:
+            parent: Widget padre
+            alto_fila (int): Alto de cada fila en píxeles (incluye la separación)
+            crear_fila (callable): crear_fila(padre, alto) → widget de la fila.
+                Debe crear el widget con height=alto (ya descuenta la separación).
+            mostrar_fila (callable): mostrar_fila(widget, dato, indice).
+                Carga los datos de una fila en un widget ya creado.
+            overscan (int, optional): Filas extra arriba y abajo. Defaults to 3.
+            separacion (int, optional): Espacio entre filas. Defaults to 4.
+            texto_vacio (str, optional): Mensaje cuando no hay filas.
+        """
+        super().__init__(parent, **kwargs)
+
+        self.alto_fila = alto_fila
+        self.overscan = overscan
+        self.separacion = separacion
+        self._crear_fila = crear_fila
+        self._mostrar_fila = mostrar_fila
+
+        self._fuente = None
+        self._desplazamiento = 0    # Píxel de contenido en el borde superior
+        self._filas = []            # Widgets creados (se reciclan)
+        self._indice_de_fila = {}   # Widget → índice que está mostrando
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        # Contenedor donde se "pegan" (place) las filas visibles
+        self._contenedor = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self._contenedor.grid(row=0, column=0, sticky="nsew", padx=(5, 0), pady=5)
+
+        self._scrollbar = ctk.CTkScrollbar(self, command=self._al_mover_scrollbar)
+        self._scrollbar.grid(row=0, column=1, sticky="ns", pady=5)
+
+        self._label_vacio = ctk.CTkLabel(
+            self._contenedor,
+            text=texto_vacio,
+            font=("Arial", 14),
+            text_color="gray"
+        )
+
+        # Redibujar al cambiar de tamaño
+        self._contenedor.bind("<Configure>", lambda e: self._renderizar())
+
+        # Rueda del mouse: se escucha en toda la app y se filtra por widget
+        # (igual que CTkScrollableFrame), porque el evento llega al label
+        # o botón que está debajo del puntero, no a la lista
+        if sys.platform.startswith("linux"):
+            self.bind_all("<Button-4>", self._al_mover_rueda, add="+")
+            self.bind_all("<Button-5>", self._al_mover_rueda, add="+")
+        else:
+            self.bind_all("<MouseWheel>", self._al_mover_rueda, add="+")
+
+    # ========================================================================
+    # API PÚBLICA
+    # ========================================================================
+
+    def set_fuente(self, fuente, texto_vacio=None):
+        """
+        Cambia los datos de la lista y vuelve al principio.
+
+        Args:
+            fuente (FuentePaginada): Datos a mostrar
+            texto_vacio (str, optional): Nuevo mensaje para cuando no hay filas
+        """
+        if texto_vacio is not None:
+            self._label_vacio.configure(text=texto_vacio)
+
+        self._fuente = fuente
+        self._desplazamiento = 0
+        self._indice_de_fila.clear()
+        self._renderizar()
+
+    def refrescar(self):
+        """
+        Vuelve a consultar los datos SIN perder la posición del scroll.
+
+        Usar después de activar/desactivar o editar una fila.
+        """
+        if self._fuente is not None:
+            self._fuente.invalidar()
+        self._indice_de_fila.clear()
+        self._renderizar()
+
+    # ========================================================================
+    # SCROLL
+    # ========================================================================
+
+    def _al_mover_scrollbar(self, accion, cantidad, unidad=None):
+        """Callback de la scrollbar: ('moveto', fraccion) o ('scroll', n, unidad)"""
+        if accion == "moveto":
+            self._desplazamiento = float(cantidad) * self._alto_total()
+        elif unidad == "pages":
+            self._desplazamiento += int(cantidad) * self._alto_vista()
+        else:
+            self._desplazamiento += int(cantidad) * self.alto_fila
+
+        self._renderizar()
+
+    def _al_mover_rueda(self, event):
+        """Mueve la lista con la rueda si el puntero está sobre ella"""
+        if not self._es_propio(event.widget):
+            return
+
+        if event.num == 4:
+            pasos = -1
+        elif event.num == 5:
+            pasos = 1
+        elif sys.platform == "darwin":
+            pasos = -event.delta
+        else:
+            pasos = -int(event.delta / 120)
+
+        self._desplazamiento += pasos * self.alto_fila
+        self._renderizar()
+
+    def _es_propio(self, widget):
+        """True si el widget es esta lista o está dentro de ella"""
+        # Algunos eventos traen el nombre del widget (str) en vez del objeto
+        while widget is not None and not isinstance(widget, str):
+            if widget is self._scrollbar:
+                # La scrollbar ya maneja su propia rueda
+                return False
+            if widget is self:
+                return True
+            widget = widget.master
+        return False
+
+    # ========================================================================
+    # DIBUJO
+    # ========================================================================
+
+    def _alto_vista(self):
+        """Alto visible del contenedor, en las mismas unidades que alto_fila"""
+        return max(self._contenedor.winfo_height() / self._get_widget_scaling(), 1)
+
+    def _alto_total(self):
+        """Alto que ocuparían TODAS las filas"""
+        if self._fuente is None:
+            return 0
+        return self._fuente.total() * self.alto_fila
+
+    def _renderizar(self):
+        """
+        Ubica las filas visibles según el desplazamiento actual.
+
+        Pasos:
+        1. Calcular el rango de índices visibles (+ overscan)
+        2. Crear filas nuevas solo si faltan (la primera vez o al agrandar)
+        3. Asignar cada índice a una fila: indice % cantidad_de_filas.
+           Al scrollear, las filas que siguen visibles conservan su widget
+           y no se vuelven a cargar; las que salieron se reciclan
+        4. Esconder las filas sobrantes y actualizar la scrollbar
+        """
+        total = self._fuente.total() if self._fuente is not None else 0
+        alto_vista = self._alto_vista()
+        alto_total = total * self.alto_fila
+
+        # No pasarse del principio ni del final
+        maximo = max(alto_total - alto_vista, 0)
+        self._desplazamiento = min(max(self._desplazamiento, 0), maximo)
+
+        # 1. Rango visible
+        primero = max(int(self._desplazamiento // self.alto_fila) - self.overscan, 0)
+        ultimo = min(int((self._desplazamiento + alto_vista) // self.alto_fila)
+                     + 1 + self.overscan, total)
+        necesarias = max(ultimo - primero, 0)
+
+        # 2. Crear las filas que falten
+        if len(self._filas) < necesarias:
+            while len(self._filas) < necesarias:
+                fila = self._crear_fila(self._contenedor,
+                                        self.alto_fila - self.separacion)
+                # Alto fijo: que el contenido no agrande ni achique la fila
+                fila.grid_propagate(False)
+                fila.pack_propagate(False)
+                self._filas.append(fila)
+            # Cambió el módulo: hay que reasignar todas
+            self._indice_de_fila.clear()
+
+        # 3. Asignar índices a filas
+        usadas = set()
+        for indice in range(primero, ultimo):
+            fila = self._filas[indice % len(self._filas)]
+
+            if self._indice_de_fila.get(fila) != indice:
+                dato = self._fuente.obtener(indice)
+                if dato is None:
+                    # Fin real de una fuente sin contar(): total se ajustó
+                    continue
+                self._mostrar_fila(fila, dato, indice)
+                self._indice_de_fila[fila] = indice
+
+            fila.place(x=0, y=indice * self.alto_fila - self._desplazamiento,
+                       relwidth=1.0)
+            usadas.add(fila)
+
+        # 4. Esconder las que sobran
+        for fila in self._filas:
+            if fila not in usadas:
+                fila.place_forget()
+                self._indice_de_fila.pop(fila, None)
+
+        # El total pudo ajustarse al cargar la última página
+        total = self._fuente.total() if self._fuente is not None else 0
+        alto_total = total * self.alto_fila
+
+        if total == 0:
+            self._label_vacio.place(relx=0.5, y=50, anchor="n")
+        else:
+            self._label_vacio.place_forget()
+
+        if alto_total <= alto_vista:
+            self._scrollbar.set(0.0, 1.0)
+        else:
+            self._scrollbar.set(self._desplazamiento / alto_total,
+                                (self._desplazamiento + alto_vista) / alto_total)
@@ -6,16 +6,23 @@ UI - PESTAÑA AGENDA CHEQUES (CORREGIDA)
 
 import customtkinter as ctk
 from tkinter import messagebox
-from models.agenda import ContactoCheque, buscar_contactos_cheque
+from models.agenda import (ContactoCheque, buscar_contactos_cheque, filtro_busqueda,
+                           refina_busqueda, palabras_contacto)
 from utils.validators import validar_cuit, formatear_cuit
+from ui.lista_virtual import ListaVirtual, FuentePaginada
+from ui.tareas import EjecutorTareas
+from ui.busqueda import BusquedaEnVivo
 
 
 class TabAgendaCheques(ctk.CTkFrame):
     """Pestaña de gestión de agenda de cheques"""
     
-    def __init__(self, parent):
+    def __init__(self, parent, ejecutor=None):
         super().__init__(parent)
         
+        # Consultas y altas en segundo plano (ver ui/tareas.py)
+        self.ejecutor = ejecutor or EjecutorTareas(self)
+        
         # Configurar grid para responsive
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
@@ -145,7 +152,6 @@ class TabAgendaCheques(ctk.CTkFrame):
             placeholder_text="Buscar por nombre, CUIT o notas..."
         )
         self.entry_busqueda.pack(side="left", padx=5)
-        self.entry_busqueda.bind('<KeyRelease>', lambda e: self.buscar_contactos())
         
         btn_buscar = ctk.CTkButton(
             frame_busqueda,
@@ -163,15 +169,26 @@ class TabAgendaCheques(ctk.CTkFrame):
         )
         btn_limpiar.pack(side="left", padx=5)
 
-        # ScrollableFrame
-        frame_scroll = ctk.CTkScrollableFrame(
+        # Lista virtual: solo crea los widgets de las filas visibles
+        self.lista_contactos = ListaVirtual(
             frame_lista,
-            label_text=""
+            alto_fila=92,
+            crear_fila=self.crear_fila_contacto,
+            mostrar_fila=self.mostrar_contacto
         )
-        frame_scroll.grid(row=1, column=0, sticky="nsew", padx=20, pady=10)
-        frame_scroll.grid_columnconfigure(0, weight=1)
+        self.lista_contactos.grid(row=1, column=0, sticky="nsew", padx=20, pady=10)
         
-        self.frame_items = frame_scroll
+        # Búsqueda mientras se escribe (con demora y refinado en memoria)
+        self.busqueda = BusquedaEnVivo(
+            self.entry_busqueda, self.lista_contactos, self.ejecutor,
+            # ✅ CORRECCIÓN: buscar_contactos_cheque() del modelo (no self.buscar_contactos)
+            buscar=buscar_contactos_cheque,
+            filtro=filtro_busqueda,
+            refina=refina_busqueda,
+            indexar=palabras_contacto,
+            al_vaciar=self.cargar_contactos,
+            clave='lista_contactos'
+        )
     
     def validar_cuit(self):
         """Valida el CUIT ingresado y muestra el resultado"""
@@ -231,10 +248,43 @@ class TabAgendaCheques(ctk.CTkFrame):
             self.entry_cuit.focus()
             return
         
+        # Crear contacto en segundo plano (un doble click no lo crea dos veces)
+        self.ejecutor.enviar(
+            self._crear_en_segundo_plano, nombre, cuit, notas,
+            al_terminar=lambda resultado: self._contacto_creado(resultado, nombre, cuit, notas),
+            al_fallar=self._error_al_crear,
+            clave='agregar_contacto'
+        )
+
+    @staticmethod
+    def _crear_en_segundo_plano(nombre, cuit, notas):
+        """
+        Crea el contacto (corre fuera del hilo de Tk).
+
+        Returns:
+            tuple: ('creado', contacto) o ('inactivo', contacto_existente)
+                si ya hay un contacto INACTIVO con ese CUIT
+        """
         try:
-            # Crear contacto
-            contacto = ContactoCheque.crear(nombre, cuit, notas)
+            return 'creado', ContactoCheque.crear(nombre, cuit, notas)
+
+        except ValueError as e:
+            # ✅ MEJORA: Detectar si el contacto existe pero está inactivo
+            error_msg = str(e)
+
+            if "Ya existe un contacto" in error_msg and "CUIT" in error_msg:
+                # ✅ CORRECCIÓN: obtener_por_cuit retorna UN objeto o None, NO una lista
+                contacto_existente = ContactoCheque.obtener_por_cuit(cuit)
+
+                if contacto_existente and not contacto_existente.activo:
+                    return 'inactivo', contacto_existente
+            raise
+
+    def _contacto_creado(self, resultado, nombre, cuit, notas):
+        """Callback de agregar_contacto() cuando la tarea terminó bien"""
+        estado, contacto = resultado
 
+        if estado == 'creado':
             # Mensaje de éxito
             messagebox.showinfo(
                 "✅ Contacto Creado",
@@ -243,50 +293,53 @@ class TabAgendaCheques(ctk.CTkFrame):
 
             # Limpiar formulario
             self.limpiar_formulario()
-            
-            # Recargar la lista
+
+            # Recargar la lista (los resultados en memoria ya no incluyen al nuevo)
+            self.busqueda.invalidar()
             self.cargar_contactos()
+            return
 
-        except ValueError as e:
-            # ✅ MEJORA: Detectar si el contacto existe pero está inactivo
-            error_msg = str(e)
-            
-            if "Ya existe un contacto" in error_msg and "CUIT" in error_msg:
-                # ✅ CORRECCIÓN: obtener_por_cuit retorna UN objeto o None, NO una lista
-                contacto_existente = ContactoCheque.obtener_por_cuit(cuit)
-                
-                if contacto_existente and not contacto_existente.activo:
-                    # Preguntar si quiere reactivarlo
-                    respuesta = messagebox.askyesno(
-                        "Contacto Inactivo",
-                        f"Ya existe un contacto con el CUIT {formatear_cuit(cuit)}, pero está INACTIVO.\n\n"
-                        f"Nombre: {contacto_existente.nombre}\n"
-                        f"Notas: {contacto_existente.notas or 'Sin notas'}\n\n"
-                        "¿Querés reactivar este contacto?"
-                    )
-                    
-                    if respuesta:
-                        # Reactivar y actualizar datos
-                        contacto_existente.nombre = nombre
-                        contacto_existente.notas = notas
-                        contacto_existente.activo = True
-                        contacto_existente.actualizar()
-                        
-                        messagebox.showinfo(
-                            "✅ Contacto Reactivado",
-                            f"Contacto '{nombre}' reactivado exitosamente!"
-                        )
-                        
-                        self.limpiar_formulario()
-                        self.cargar_contactos()
-                    return
-            
-            # Si no es el caso anterior, mostrar el error normal
+        # Preguntar si quiere reactivarlo
+        respuesta = messagebox.askyesno(
+            "Contacto Inactivo",
+            f"Ya existe un contacto con el CUIT {formatear_cuit(cuit)}, pero está INACTIVO.\n\n"
+            f"Nombre: {contacto.nombre}\n"
+            f"Notas: {contacto.notas or 'Sin notas'}\n\n"
+            "¿Querés reactivar este contacto?"
+        )
+
+        if respuesta:
+            # Reactivar y actualizar datos
+            contacto.nombre = nombre
+            contacto.notas = notas
+            contacto.activo = True
+
+            self.ejecutor.enviar(
+                contacto.actualizar,
+                al_terminar=lambda _: self._contacto_reactivado(nombre),
+                al_fallar=self._error_al_crear,
+                clave='agregar_contacto'
+            )
+
+    def _contacto_reactivado(self, nombre):
+        """Callback de la reactivación pedida en _contacto_creado()"""
+        messagebox.showinfo(
+            "✅ Contacto Reactivado",
+            f"Contacto '{nombre}' reactivado exitosamente!"
+        )
+
+        self.limpiar_formulario()
+        self.busqueda.invalidar()
+        self.cargar_contactos()
+
+    def _error_al_crear(self, e):
+        """Callback de agregar_contacto() cuando la tarea falló"""
+        if isinstance(e, ValueError):
             messagebox.showerror(
                 "Error de Validación",
-                error_msg
+                str(e)
             )
-        except Exception as e:
+        else:
             messagebox.showerror(
                 "Error",
                 f"Error al crear contacto: {e}"
@@ -301,116 +354,128 @@ class TabAgendaCheques(ctk.CTkFrame):
         self.entry_nombre.focus()
     
     def cargar_contactos(self):
-        """Carga todos los contactos de la base de datos"""
-        # Limpiar items existentes
-        for widget in self.frame_items.winfo_children():
-            widget.destroy()
+        """
+        Carga los contactos de la base de datos en la lista.
         
-        try:
-            # ✅ CAMBIO: solo_activos=False para mostrar TODOS
-            contactos = ContactoCheque.obtener_todos(solo_activos=False)
-
-            if not contactos:
-                label_vacio = ctk.CTkLabel(
-                    self.frame_items,
-                    text="No hay contactos creados aún.\nCrea tu primer contacto arriba. 👆",
-                    font=("Arial", 14),
-                    text_color="gray"
-                )
-                label_vacio.pack(pady=50)
-                return
-            
-            # ✅ CORRECCIÓN: self.crear_item_contacto (no self-self)
-            for idx, contacto in enumerate(contactos):
-                self.crear_item_contacto(contacto, idx)
-            
-        except Exception as e:
-            messagebox.showerror(
-                "Error",
-                f"Error al cargar contactos: {e}"
-            )
+        No trae todos los contactos: la lista virtual pide las páginas
+        a medida que se hace scroll. La primera se carga en segundo plano.
+        """
+        # ✅ CAMBIO: solo_activos=False para mostrar TODOS
+        fuente = FuentePaginada(
+            cargar_pagina=lambda desde, cantidad: ContactoCheque.obtener_todos(
+                solo_activos=False, limite=cantidad, desplazamiento=desde
+            ),
+            contar=lambda: ContactoCheque.contar_todos(solo_activos=False)
+        )
+        self._mostrar_fuente(
+            fuente,
+            texto_vacio="No hay contactos creados aún.\nCrea tu primer contacto arriba. 👆",
+            error="Error al cargar contactos"
+        )
+
+    def _mostrar_fuente(self, fuente, texto_vacio, error):
+        """
+        Precarga la fuente en segundo plano y después la muestra en la lista.
+
+        Cargas y búsquedas comparten la clave: solo se muestra la última.
+        """
+        self.ejecutor.enviar(
+            fuente.precargar,
+            al_terminar=lambda f: self.lista_contactos.set_fuente(f, texto_vacio=texto_vacio),
+            al_fallar=lambda e: messagebox.showerror("Error", f"{error}: {e}"),
+            clave='lista_contactos',
+            reemplazar=True
+        )
     
-    def crear_item_contacto(self, contacto, index):
-        """Crea un widget que muestra un contacto individual"""
-        # Color alternado
-        color = ("gray90", "gray20") if index % 2 == 0 else ("gray95", "gray25")
+    def crear_fila_contacto(self, padre, alto):
+        """
+        Crea un widget VACÍO para mostrar contactos.
         
-        item_frame = ctk.CTkFrame(
-            self.frame_items,
-            fg_color=color
-        )
-        item_frame.pack(fill="x", pady=2, padx=5)
+        La lista virtual lo reutiliza: mostrar_contacto() le carga los datos.
+        
+        Args:
+            padre: Contenedor de la lista virtual
+            alto (int): Alto fijo de la fila
+            
+        Returns:
+            CTkFrame: Fila con sus labels y botón guardados como atributos
+        """
+        item_frame = ctk.CTkFrame(padre, height=alto)
         item_frame.grid_columnconfigure(1, weight=1)
 
-        # ✅ CORRECCIÓN: Calcular rowspan ANTES de crear los widgets
-        tiene_notas = bool(contacto.notas)
-        rowspan_value = 3 if tiene_notas else 2
-
         # Indicador de estado (activo/inactivo)
-        estado_symbol = "✅" if contacto.activo else "❌"
-        label_estado = ctk.CTkLabel(
-            item_frame,
-            text=estado_symbol,
-            font=("Arial", 20)
-        )
-        # ✅ Usar el rowspan correcto desde el principio
-        label_estado.grid(row=0, column=0, padx=10, pady=10, rowspan=rowspan_value)
+        item_frame.label_estado = ctk.CTkLabel(item_frame, text="", font=("Arial", 20))
+        item_frame.label_estado.grid(row=0, column=0, padx=10, pady=10, rowspan=3)
 
         # Nombre
-        label_nombre = ctk.CTkLabel(
+        item_frame.label_nombre = ctk.CTkLabel(
             item_frame,
-            text=contacto.nombre,
+            text="",
             font=("Arial", 16, "bold"),
             anchor="w"
         )
-        label_nombre.grid(row=0, column=1, sticky="w", padx=10, pady=(10, 0))
+        item_frame.label_nombre.grid(row=0, column=1, sticky="w", padx=10, pady=(10, 0))
 
         # CUIT formateado
-        cuit_formateado = formatear_cuit(contacto.cuit)
-        label_cuit = ctk.CTkLabel(
+        item_frame.label_cuit = ctk.CTkLabel(
             item_frame,
-            text=f"CUIT: {cuit_formateado}",
+            text="",
             font=("Arial", 11),
             text_color="gray",
             anchor="w"
         )
-        label_cuit.grid(row=1, column=1, sticky="w", padx=10, pady=(0, 5))
-
-        # Notas (si existen)
-        if tiene_notas:
-            label_notas = ctk.CTkLabel(
-                item_frame,
-                text=f"Notas: {contacto.notas}",
-                font=("Arial", 10),
-                text_color="gray60",
-                anchor="w"
-            )
-            label_notas.grid(row=2, column=1, sticky="w", padx=10, pady=(0, 10))
+        item_frame.label_cuit.grid(row=1, column=1, sticky="w", padx=10)
 
-        # Botones de acción
-        btn_frame = ctk.CTkFrame(item_frame, fg_color="transparent")
-        btn_frame.grid(row=0, column=2, rowspan=rowspan_value, padx=10)
+        # Notas (vacío si no tiene: todas las filas miden lo mismo)
+        item_frame.label_notas = ctk.CTkLabel(
+            item_frame,
+            text="",
+            font=("Arial", 10),
+            text_color="gray60",
+            anchor="w"
+        )
+        item_frame.label_notas.grid(row=2, column=1, sticky="w", padx=10, pady=(0, 10))
 
         # Botón activar/desactivar
+        item_frame.btn_toggle = ctk.CTkButton(item_frame, text="", width=100)
+        item_frame.btn_toggle.grid(row=0, column=2, rowspan=3, padx=15)
+
+        return item_frame
+
+    def mostrar_contacto(self, item_frame, contacto, index):
+        """
+        Carga los datos de un contacto en una fila ya creada.
+        
+        Args:
+            item_frame (CTkFrame): Fila creada por crear_fila_contacto()
+            contacto (ContactoCheque): Contacto a mostrar
+            index (int): Posición en la lista (para alternar colores)
+        """
+        # Color alternado
+        color = ("gray90", "gray20") if index % 2 == 0 else ("gray95", "gray25")
+        item_frame.configure(fg_color=color)
+
+        item_frame.label_estado.configure(text="✅" if contacto.activo else "❌")
+        item_frame.label_nombre.configure(text=contacto.nombre)
+        item_frame.label_cuit.configure(text=f"CUIT: {formatear_cuit(contacto.cuit)}")
+        item_frame.label_notas.configure(
+            text=f"Notas: {contacto.notas}" if contacto.notas else ""
+        )
+
         if contacto.activo:
-            btn_toggle = ctk.CTkButton(
-                btn_frame,
+            item_frame.btn_toggle.configure(
                 text="Desactivar",
-                width=100,
                 fg_color="orange",
                 hover_color="darkorange",
                 command=lambda c=contacto: self.desactivar_contacto(c)
             )
         else:
-            btn_toggle = ctk.CTkButton(
-                btn_frame,
+            item_frame.btn_toggle.configure(
                 text="Activar",
-                width=100,
                 fg_color="green",
                 hover_color="darkgreen",
                 command=lambda c=contacto: self.activar_contacto(c)
             )
-        btn_toggle.pack(side="left", padx=5)
 
     def desactivar_contacto(self, contacto):
         """Desactiva un contacto"""
@@ -430,7 +495,7 @@ class TabAgendaCheques(ctk.CTkFrame):
                     "✅ Desactivado",
                     f"Contacto '{contacto.nombre}' desactivado."
                 )
-                self.cargar_contactos()
+                self.lista_contactos.refrescar()
             except Exception as e:
                 messagebox.showerror(
                     "Error",
@@ -448,7 +513,7 @@ class TabAgendaCheques(ctk.CTkFrame):
                 "✅ Activado",
                 f"Contacto '{contacto.nombre}' activado."
             )
-            self.cargar_contactos()
+            self.lista_contactos.refrescar()
         except Exception as e:
             messagebox.showerror(
                 "Error",
@@ -456,42 +521,15 @@ class TabAgendaCheques(ctk.CTkFrame):
             )
     
     def buscar_contactos(self):
-        """Busca contactos por término"""
-        termino = self.entry_busqueda.get().strip()
-        
-        if not termino:
-            self.cargar_contactos()
-            return
+        """
+        Busca contactos por término (botón "Buscar").
         
-        # Limpiar items existentes
-        for widget in self.frame_items.winfo_children():
-            widget.destroy()
-        
-        try:
-            # ✅ CORRECCIÓN: buscar_contactos_cheque() del modelo (no self.buscar_contactos)
-            resultados = buscar_contactos_cheque(termino)
-            
-            if not resultados:
-                label_vacio = ctk.CTkLabel(
-                    self.frame_items,
-                    text=f"No se encontraron resultados para '{termino}'",
-                    font=("Arial", 14),
-                    text_color="gray"
-                )
-                label_vacio.pack(pady=50)
-                return
-            
-            # Mostrar resultados
-            for idx, contacto in enumerate(resultados):
-                self.crear_item_contacto(contacto, idx)
-        
-        except Exception as e:
-            messagebox.showerror(
-                "Error",
-                f"Error al buscar: {e}"
-            )
+        Mientras se escribe la búsqueda es automática (ver ui/busqueda.py);
+        el botón fuerza una consulta nueva a la base.
+        """
+        self.busqueda.buscar()
     
     def limpiar_busqueda(self):
         """Limpia la búsqueda y recarga todos los contactos"""
         self.entry_busqueda.delete(0, "end")
-        self.cargar_contactos()
\ No newline at end of file
+        self.busqueda.buscar()
\ No newline at end of file
@@ -15,16 +15,23 @@ Es casi idéntica a tab_agenda_cheques.py, solo con un campo extra.
 
 import customtkinter as ctk
 from tkinter import messagebox
-from models.agenda import ContactoTransferencia, buscar_contactos_transferencia
+from models.agenda import (ContactoTransferencia, buscar_contactos_transferencia,
+                           filtro_busqueda, refina_busqueda, palabras_contacto)
 from utils.validators import validar_cuit, validar_cbu, formatear_cuit, formatear_cbu
+from ui.lista_virtual import ListaVirtual, FuentePaginada
+from ui.tareas import EjecutorTareas
+from ui.busqueda import BusquedaEnVivo
 
 
 class TabAgendaTransferencias(ctk.CTkFrame):
     """Pestaña de gestión de agenda de transferencias"""
     
-    def __init__(self, parent):
+    def __init__(self, parent, ejecutor=None):
         super().__init__(parent)
         
+        # Igual que en Cheques: consultas en segundo plano
+        self.ejecutor = ejecutor or EjecutorTareas(self)
+        
         # TODO: Configurar grid
         self.grid_columnconfigure(0,weight=1)
         self.grid_rowconfigure(1, weight=1)
@@ -200,7 +207,6 @@ class TabAgendaTransferencias(ctk.CTkFrame):
             placeholder_text="Buscar por nombre, CUIT o notas..."
         )
         self.entry_busqueda.pack(side="left", padx=5)
-        self.entry_busqueda.bind('<KeyRelease>', lambda e: self.buscar_contactos())
         
         btn_buscar = ctk.CTkButton(
             frame_busqueda,
@@ -218,16 +224,25 @@ class TabAgendaTransferencias(ctk.CTkFrame):
         )
         btn_limpiar.pack(side="left", padx=5)
 
-        # TODO: ScrollableFrame para items (self.frame_items)
-        
-        frame_scroll = ctk.CTkScrollableFrame(
+        # Lista virtual para los items (ver ui/lista_virtual.py)
+        self.lista_contactos = ListaVirtual(
             frame_lista,
-            label_text=""
+            alto_fila=92,
+            crear_fila=self.crear_fila_contacto,
+            mostrar_fila=self.mostrar_contacto
+        )
+        self.lista_contactos.grid(row=1, column=0, sticky="nsew", padx=20, pady=10)
+        
+        # Igual que en Cheques: búsqueda mientras se escribe
+        self.busqueda = BusquedaEnVivo(
+            self.entry_busqueda, self.lista_contactos, self.ejecutor,
+            buscar=buscar_contactos_transferencia,
+            filtro=filtro_busqueda,
+            refina=refina_busqueda,
+            indexar=palabras_contacto,
+            al_vaciar=self.cargar_contactos,
+            clave='lista_contactos'
         )
-        frame_scroll.grid(row=1, column=0, sticky="nsew", padx=20, pady=10)
-        frame_scroll.grid_columnconfigure(0, weight=1)
-        
-        self.frame_items = frame_scroll
     
     def validar_cuit(self):
         """
@@ -358,75 +373,175 @@ class TabAgendaTransferencias(ctk.CTkFrame):
     
     def cargar_contactos(self):
         """
-        Carga todos los contactos.
+        Carga los contactos en la lista.
         
-        TODO: Implementar - Casi idéntico a Cheques
+        Igual que en Cheques: la lista virtual pide las páginas
+        a medida que se hace scroll.
         """
-        # TU CÓDIGO AQUÍ
-        # Pista: for widget in self.frame_items.winfo_children():
-        #            widget.destroy()
-        # Pista: contactos = ContactoTransferencia.obtener_todos()
-        # Pista: if not contactos:
-        #            # Mostrar mensaje "No hay contactos"
-        # Pista: for idx, contacto in enumerate(contactos):
-        #            self.crear_item_contacto(contacto, idx)
-        pass
+        fuente = FuentePaginada(
+            cargar_pagina=lambda desde, cantidad: ContactoTransferencia.obtener_todos(
+                solo_activos=False, limite=cantidad, desplazamiento=desde
+            ),
+            contar=lambda: ContactoTransferencia.contar_todos(solo_activos=False)
+        )
+        self._mostrar_fuente(
+            fuente,
+            texto_vacio="No hay contactos creados aún.\nCrea tu primer contacto arriba. 👆",
+            error="Error al cargar contactos"
+        )
     
-    def crear_item_contacto(self, contacto, index):
+    def _mostrar_fuente(self, fuente, texto_vacio, error):
+        """Precarga la fuente en segundo plano y la muestra (igual que en Cheques)"""
+        self.ejecutor.enviar(
+            fuente.precargar,
+            al_terminar=lambda f: self.lista_contactos.set_fuente(f, texto_vacio=texto_vacio),
+            al_fallar=lambda e: messagebox.showerror("Error", f"{error}: {e}"),
+            clave='lista_contactos',
+            reemplazar=True
+        )
+    
+    def crear_fila_contacto(self, padre, alto):
         """
-        Crea un widget para un contacto.
-        
-        TODO: Implementar
+        Crea un widget VACÍO para mostrar contactos.
         
         Diferencia con Cheques: También muestra el CBU
         
-        Layout sugerido:
+        Layout:
         ┌───────────────────────────────────────┐
         │ ✅  Nombre del Contacto    [Botones] │
         │     CUIT: 20-12345678-9              │
         │     CBU: 0170 0995 2 0000003912345 6 │
         └───────────────────────────────────────┘
-        """
-        # TU CÓDIGO AQUÍ
-        # Pista: Similar a tab_agenda_cheques pero con 3 filas
         
-        # item_frame = ctk.CTkFrame(...)
+        Args:
+            padre: Contenedor de la lista virtual
+            alto (int): Alto fijo de la fila
+            
+        Returns:
+            CTkFrame: Fila con sus labels y botón guardados como atributos
+        """
+        item_frame = ctk.CTkFrame(padre, height=alto)
+        item_frame.grid_columnconfigure(1, weight=1)
         
         # Row 0: Estado y Nombre
-        # label_estado.grid(row=0, column=0, rowspan=3, ...)
-        # label_nombre.grid(row=0, column=1, ...)
+        item_frame.label_estado = ctk.CTkLabel(item_frame, text="", font=("Arial", 20))
+        item_frame.label_estado.grid(row=0, column=0, padx=10, pady=10, rowspan=3)
+        
+        item_frame.label_nombre = ctk.CTkLabel(
+            item_frame,
+            text="",
+            font=("Arial", 16, "bold"),
+            anchor="w"
+        )
+        item_frame.label_nombre.grid(row=0, column=1, sticky="w", padx=10, pady=(10, 0))
         
         # Row 1: CUIT
-        # label_cuit.grid(row=1, column=1, ...)
+        item_frame.label_cuit = ctk.CTkLabel(
+            item_frame,
+            text="",
+            font=("Arial", 11),
+            text_color="gray",
+            anchor="w"
+        )
+        item_frame.label_cuit.grid(row=1, column=1, sticky="w", padx=10)
         
         # Row 2: CBU (NUEVO!)
-        # label_cbu.grid(row=2, column=1, ...)
+        item_frame.label_cbu = ctk.CTkLabel(
+            item_frame,
+            text="",
+            font=("Arial", 10),
+            text_color="gray",
+            anchor="w"
+        )
+        item_frame.label_cbu.grid(row=2, column=1, sticky="w", padx=10, pady=(0, 10))
         
-        # Botones en column=2, rowspan=3
-        pass
+        # Botón en column=2, rowspan=3
+        item_frame.btn_toggle = ctk.CTkButton(item_frame, text="", width=100)
+        item_frame.btn_toggle.grid(row=0, column=2, rowspan=3, padx=15)
+        
+        return item_frame
+    
+    def mostrar_contacto(self, item_frame, contacto, index):
+        """
+        Carga los datos de un contacto en una fila ya creada.
+        
+        Args:
+            item_frame (CTkFrame): Fila creada por crear_fila_contacto()
+            contacto (ContactoTransferencia): Contacto a mostrar
+            index (int): Posición en la lista (para alternar colores)
+        """
+        color = ("gray90", "gray20") if index % 2 == 0 else ("gray95", "gray25")
+        item_frame.configure(fg_color=color)
+        
+        item_frame.label_estado.configure(text="✅" if contacto.activo else "❌")
+        item_frame.label_nombre.configure(text=contacto.nombre)
+        item_frame.label_cuit.configure(text=f"CUIT: {formatear_cuit(contacto.cuit)}")
+        item_frame.label_cbu.configure(text=f"CBU: {formatear_cbu(contacto.cbu)}")
+        
+        if contacto.activo:
+            item_frame.btn_toggle.configure(
+                text="Desactivar",
+                fg_color="orange",
+                hover_color="darkorange",
+                command=lambda c=contacto: self.desactivar_contacto(c)
+            )
+        else:
+            item_frame.btn_toggle.configure(
+                text="Activar",
+                fg_color="green",
+                hover_color="darkgreen",
+                command=lambda c=contacto: self.activar_contacto(c)
+            )
     
     def desactivar_contacto(self, contacto):
-        """TODO: Implementar - Idéntico a Cheques"""
-        # TU CÓDIGO AQUÍ
-        pass
+        """Desactiva un contacto"""
+        respuesta = messagebox.askyesno(
+            "Confirmar Desactivación",
+            f"¿Estás seguro de desactivar el contacto '{contacto.nombre}'?\n\n"
+            "Nota: No podrás usar este contacto en nuevas transferencias."
+        )
+        
+        if respuesta:
+            try:
+                contacto.activo = False
+                contacto.actualizar()
+                
+                messagebox.showinfo(
+                    "✅ Desactivado",
+                    f"Contacto '{contacto.nombre}' desactivado."
+                )
+                self.lista_contactos.refrescar()
+            except Exception as e:
+                messagebox.showerror(
+                    "Error",
+                    f"Error al desactivar: {e}"
+                )
     
     def activar_contacto(self, contacto):
-        """TODO: Implementar - Idéntico a Cheques"""
-        # TU CÓDIGO AQUÍ
-        pass
+        """Activa un contacto"""
+        try:
+            contacto.activo = True
+            contacto.actualizar()
+            
+            messagebox.showinfo(
+                "✅ Activado",
+                f"Contacto '{contacto.nombre}' activado."
+            )
+            self.lista_contactos.refrescar()
+        except Exception as e:
+            messagebox.showerror(
+                "Error",
+                f"Error al activar: {e}"
+            )
     
     def buscar_contactos(self):
-        """TODO: Implementar - Casi idéntico a Cheques"""
-        # TU CÓDIGO AQUÍ
-        # Pista: termino = self.entry_busqueda.get().strip()
-        # Pista: resultados = buscar_contactos_transferencia(termino)
-        pass
+        """Busca contactos por nombre, CUIT o CBU (botón "Buscar")"""
+        self.busqueda.buscar()
     
     def limpiar_busqueda(self):
-        """TODO: Implementar"""
-        # TU CÓDIGO AQUÍ
-        pass
-
+        """Limpia la búsqueda y recarga todos los contactos"""
+        self.entry_busqueda.delete(0, "end")
+        self.busqueda.buscar()
 
 # ============================================================================
 # PISTAS ESPECÍFICAS PARA TRANSFERENCIAS
@@ -456,7 +571,7 @@ DIFERENCIAS CLAVE CON AGENDA CHEQUES:
        ContactoTransferencia.crear(nombre, cuit, cbu, notas)
 
 3. MOSTRAR CBU EN LA LISTA:
-   - En crear_item_contacto(), agregar una fila más
+   - En crear_fila_contacto(), agregar una fila más
    - Usar formatear_cbu() para mostrarlo bonito
    
    label_cbu = ctk.CTkLabel(
@@ -481,7 +596,7 @@ TIPS:
 - Copiá tab_agenda_cheques.py completo
 - Agregá el campo CBU en el formulario
 - Agregá validación de CBU
-- En crear_item_contacto(), agregá la tercera fila para CBU
+- En crear_fila_contacto(), agregá la tercera fila para CBU
 - ¡Listo!
 
 El 90% del código es idéntico a Agenda Cheques.
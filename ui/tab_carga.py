@@ -0,0 +1,198 @@
+"""
+============================================================================
+UI - PESTAÑA CARGA DE PLANILLAS
+============================================================================
+Interfaz para crear planillas nuevas.
+
+Esta pestaña permite:
+- Crear una planilla en borrador para una referencia
+- Completar sucursal y cuenta de débito con los valores por defecto
+  (tabla configuracion, leída con ConfiguracionService)
+- Guardar los valores ingresados como nuevos valores por defecto
+============================================================================
+"""
+
+import customtkinter as ctk
+from tkinter import messagebox
+from models.planilla import Planilla
+from models.referencia import Referencia
+from services.configuracion_service import ConfiguracionService
+from ui.tareas import EjecutorTareas
+
+
+class TabCarga(ctk.CTkFrame):
+    """Pestaña de carga de planillas"""
+
+    def __init__(self, parent, ejecutor=None):
+        """
+        Constructor de la pestaña.
+
+        Args:
+            parent: El widget padre (normalmente el tab del TabView)
+            ejecutor (EjecutorTareas, optional): Ejecutor compartido de la
+                ventana. Si no se pasa, la pestaña crea uno propio.
+        """
+        super().__init__(parent)
+
+        self.ejecutor = ejecutor or EjecutorTareas(self)
+
+        self.grid_columnconfigure(0, weight=1)
+
+        self.crear_interfaz()
+        self.limpiar_formulario()
+
+    def crear_interfaz(self):
+        """Crea todos los elementos de la interfaz"""
+
+        # ====================================================================
+        # SECCIÓN 1: NUEVA PLANILLA
+        # ====================================================================
+
+        frame_nueva = ctk.CTkFrame(self)
+        frame_nueva.grid(row=0, column=0, padx=20, pady=20, sticky="ew")
+
+        ctk.CTkLabel(
+            frame_nueva,
+            text="📝 Nueva Planilla",
+            font=("Arial", 18, "bold")
+        ).pack(pady=10)
+
+        form_frame = ctk.CTkFrame(frame_nueva)
+        form_frame.pack(fill="x", padx=20, pady=10)
+
+        # Campo: Referencia (código completo)
+        ctk.CTkLabel(
+            form_frame,
+            text="Referencia:",
+            font=("Arial", 12)
+        ).grid(row=0, column=0, padx=10, pady=10, sticky="w")
+
+        self.entry_referencia = ctk.CTkEntry(
+            form_frame,
+            width=200,
+            placeholder_text="Ej: LABSE0000118"
+        )
+        self.entry_referencia.grid(row=0, column=1, padx=10, pady=10, sticky="w")
+
+        # Campo: Sucursal
+        ctk.CTkLabel(
+            form_frame,
+            text="Sucursal:",
+            font=("Arial", 12)
+        ).grid(row=1, column=0, padx=10, pady=10, sticky="w")
+
+        self.entry_sucursal = ctk.CTkEntry(form_frame, width=200)
+        self.entry_sucursal.grid(row=1, column=1, padx=10, pady=10, sticky="w")
+
+        # Campo: Cuenta de débito
+        ctk.CTkLabel(
+            form_frame,
+            text="Cuenta de débito:",
+            font=("Arial", 12)
+        ).grid(row=2, column=0, padx=10, pady=10, sticky="w")
+
+        self.entry_cuenta = ctk.CTkEntry(form_frame, width=200)
+        self.entry_cuenta.grid(row=2, column=1, padx=10, pady=10, sticky="w")
+
+        # Recordar sucursal y cuenta para las próximas planillas
+        self.check_recordar = ctk.CTkCheckBox(
+            form_frame,
+            text="Usar como valores por defecto"
+        )
+        self.check_recordar.grid(row=3, column=1, padx=10, pady=10, sticky="w")
+
+        self.btn_crear = ctk.CTkButton(
+            frame_nueva,
+            text="✅ Crear Planilla",
+            font=("Arial", 14, "bold"),
+            height=40,
+            command=self.crear_planilla
+        )
+        self.btn_crear.pack(pady=15)
+
+    def cargar_valores_por_defecto(self):
+        """
+        Completa sucursal y cuenta con los valores por defecto.
+
+        Se llama cada vez que se muestra el formulario vacío: los valores
+        salen del cache de ConfiguracionService (no consulta la base).
+        """
+        valores = (
+            (self.entry_sucursal, ConfiguracionService.obtener('sucursal_default', '')),
+            (self.entry_cuenta, ConfiguracionService.obtener('cuenta_debito_default', '')),
+        )
+        for entry, valor in valores:
+            entry.delete(0, "end")
+            if valor:
+                entry.insert(0, valor)
+
+    def crear_planilla(self):
+        """Valida el formulario y crea la planilla en segundo plano"""
+        codigo = self.entry_referencia.get().upper().strip()
+        sucursal = self.entry_sucursal.get().strip()
+        cuenta = self.entry_cuenta.get().strip()
+        recordar = bool(self.check_recordar.get())
+
+        # Validaciones
+        faltantes = [
+            (codigo, "la referencia", self.entry_referencia),
+            (sucursal, "la sucursal", self.entry_sucursal),
+            (cuenta, "la cuenta de débito", self.entry_cuenta),
+        ]
+        for valor, nombre, entry in faltantes:
+            if not valor:
+                messagebox.showwarning(
+                    "Campo Requerido",
+                    f"Por favor ingresa {nombre}."
+                )
+                entry.focus()
+                return
+
+        # Misma clave: un doble click no crea dos planillas
+        self.ejecutor.enviar(
+            self._crear_en_segundo_plano, codigo, sucursal, cuenta, recordar,
+            al_terminar=self._planilla_creada,
+            al_fallar=self._error_al_crear,
+            clave='crear_planilla'
+        )
+
+    @staticmethod
+    def _crear_en_segundo_plano(codigo, sucursal, cuenta, recordar):
+        """Busca la referencia y crea la planilla (corre fuera del hilo de Tk)"""
+        referencia = Referencia.obtener_por_codigo(codigo)
+        if not referencia:
+            raise ValueError(f"No existe la referencia {codigo}")
+        if not referencia.activa:
+            raise ValueError(f"La referencia {codigo} está inactiva")
+
+        planilla = Planilla.crear(referencia.id, sucursal, cuenta)
+
+        if recordar:
+            ConfiguracionService.guardar_varias({
+                'sucursal_default': sucursal,
+                'cuenta_debito_default': cuenta,
+            })
+
+        return planilla
+
+    def _planilla_creada(self, planilla):
+        """Callback de crear_planilla() cuando la tarea terminó bien"""
+        messagebox.showinfo(
+            "✅ Planilla Creada",
+            f"Planilla #{planilla.numero_planilla} creada en borrador."
+        )
+        self.limpiar_formulario()
+
+    def _error_al_crear(self, e):
+        """Callback de crear_planilla() cuando la tarea falló"""
+        if isinstance(e, ValueError):
+            messagebox.showerror("Error de Validación", str(e))
+        else:
+            messagebox.showerror("Error", f"Error al crear planilla: {e}")
+
+    def limpiar_formulario(self):
+        """Vacía el formulario y vuelve a poner los valores por defecto"""
+        self.entry_referencia.delete(0, "end")
+        self.check_recordar.deselect()
+        self.cargar_valores_por_defecto()
+        self.entry_referencia.focus()
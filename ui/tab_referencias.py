@@ -14,7 +14,10 @@ Esta pestaña permite:
 
 import customtkinter as ctk
 from tkinter import messagebox
-from models.referencia import Referencia, buscar_referencias
+from models.referencia import Referencia, buscar_referencias, filtro_busqueda, refina_busqueda
+from ui.lista_virtual import ListaVirtual, FuentePaginada
+from ui.tareas import EjecutorTareas
+from ui.busqueda import BusquedaEnVivo
 
 
 class TabReferencias(ctk.CTkFrame):
@@ -24,15 +27,20 @@ class TabReferencias(ctk.CTkFrame):
     Esta clase hereda de CTkFrame y se inserta en el TabView principal.
     """
     
-    def __init__(self, parent):
+    def __init__(self, parent, ejecutor=None):
         """
         Constructor de la pestaña.
         
         Args:
             parent: El widget padre (normalmente el tab del TabView)
+            ejecutor (EjecutorTareas, optional): Ejecutor compartido de la
+                ventana para las consultas en segundo plano. Si no se pasa,
+                la pestaña crea uno propio.
         """
         super().__init__(parent)
         
+        self.ejecutor = ejecutor or EjecutorTareas(self)
+        
         # Configurar el grid para que sea responsive
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
@@ -163,7 +171,6 @@ class TabReferencias(ctk.CTkFrame):
             placeholder_text="Buscar por código o descripción..."
         )
         self.entry_busqueda.pack(side="left", padx=5)
-        self.entry_busqueda.bind('<KeyRelease>', lambda e: self.buscar_referencias())
         
         btn_buscar = ctk.CTkButton(
             frame_busqueda,
@@ -181,16 +188,26 @@ class TabReferencias(ctk.CTkFrame):
         )
         btn_limpiar.pack(side="left", padx=5)
         
-        # Frame con scrollbar para la tabla
-        frame_scroll = ctk.CTkScrollableFrame(
+        # Lista virtual para la tabla: solo crea las filas visibles
+        # y las reutiliza al hacer scroll
+        self.lista_referencias = ListaVirtual(
             frame_lista,
-            label_text=""
+            alto_fila=76,
+            crear_fila=self.crear_fila_referencia,
+            mostrar_fila=self.mostrar_referencia
+        )
+        self.lista_referencias.grid(row=1, column=0, sticky="nsew", padx=20, pady=10)
+        
+        # Búsqueda mientras se escribe: espera a que el usuario haga una
+        # pausa, y si el término solo se alarga filtra lo que ya trajo
+        self.busqueda = BusquedaEnVivo(
+            self.entry_busqueda, self.lista_referencias, self.ejecutor,
+            buscar=buscar_referencias,
+            filtro=filtro_busqueda,
+            refina=refina_busqueda,
+            al_vaciar=self.cargar_referencias,
+            clave='lista_referencias'
         )
-        frame_scroll.grid(row=1, column=0, sticky="nsew", padx=20, pady=10)
-        frame_scroll.grid_columnconfigure(0, weight=1)
-        
-        # Aquí se agregarán las referencias dinámicamente
-        self.frame_items = frame_scroll
     
     def actualizar_vista_previa(self, event=None):
         """
@@ -208,18 +225,21 @@ class TabReferencias(ctk.CTkFrame):
             prefijo = prefijo[:5]
             self.entry_prefijo.delete(5, "end")
         
-        # Generar el código completo
-        try:
-            codigo_completo = Referencia.generar_siguiente_codigo(prefijo)
-            self.label_vista_previa.configure(
-                text=codigo_completo,
+        # Generar el código completo (consulta la base: en segundo plano,
+        # y si el usuario sigue escribiendo solo importa el último prefijo)
+        self.ejecutor.enviar(
+            Referencia.generar_siguiente_codigo, prefijo,
+            al_terminar=lambda codigo: self.label_vista_previa.configure(
+                text=codigo,
                 text_color="green"
-            )
-        except Exception:
-            self.label_vista_previa.configure(
+            ),
+            al_fallar=lambda e: self.label_vista_previa.configure(
                 text=f"{prefijo}_______",
                 text_color="orange"
-            )
+            ),
+            clave='vista_previa',
+            reemplazar=True
+        )
     
     def generar_codigo_automatico(self):
         """
@@ -297,31 +317,42 @@ class TabReferencias(ctk.CTkFrame):
             self.entry_prefijo.focus()
             return
         
-        try:
-            # Generar código completo
-            codigo_completo = Referencia.generar_siguiente_codigo(prefijo)
-            
-            # Crear la referencia
-            referencia = Referencia.crear(codigo_completo, descripcion)
-            
-            # Mensaje de éxito
-            messagebox.showinfo(
-                "✅ Referencia Creada",
-                f"Referencia '{codigo_completo}' creada exitosamente!"
-            )
-            
-            # Limpiar formulario
-            self.limpiar_formulario()
-            
-            # Recargar la lista
-            self.cargar_referencias()
-            
-        except ValueError as e:
+        # La creación va en segundo plano; un doble click no crea dos
+        # referencias (misma clave → se reutiliza la tarea en curso)
+        self.ejecutor.enviar(
+            self._crear_en_segundo_plano, prefijo, descripcion,
+            al_terminar=self._referencia_creada,
+            al_fallar=self._error_al_crear,
+            clave='crear_referencia'
+        )
+    
+    @staticmethod
+    def _crear_en_segundo_plano(prefijo, descripcion):
+        """Reserva el código y crea la referencia (corre fuera del hilo de Tk)"""
+        return Referencia.crear_con_prefijo(prefijo, descripcion)
+    
+    def _referencia_creada(self, referencia):
+        """Callback de crear_referencia() cuando la tarea terminó bien"""
+        messagebox.showinfo(
+            "✅ Referencia Creada",
+            f"Referencia '{referencia.codigo}' creada exitosamente!"
+        )
+        
+        # Limpiar formulario
+        self.limpiar_formulario()
+        
+        # Recargar la lista (los resultados en memoria ya no incluyen la nueva)
+        self.busqueda.invalidar()
+        self.cargar_referencias()
+    
+    def _error_al_crear(self, e):
+        """Callback de crear_referencia() cuando la tarea falló"""
+        if isinstance(e, ValueError):
             messagebox.showerror(
                 "Error de Validación",
                 str(e)
             )
-        except Exception as e:
+        else:
             messagebox.showerror(
                 "Error",
                 f"Error al crear referencia: {e}"
@@ -336,110 +367,118 @@ class TabReferencias(ctk.CTkFrame):
     
     def cargar_referencias(self):
         """
-        Carga todas las referencias de la base de datos y las muestra.
+        Carga las referencias de la base de datos y las muestra.
         
-        Se llama al iniciar y después de crear/editar una referencia.
+        Se llama al iniciar y después de crear una referencia.
+        Las referencias se consultan de a páginas, a medida que la lista
+        las necesita (ver ui/lista_virtual.py). La primera página se
+        carga en segundo plano.
         """
-        # Limpiar items existentes
-        for widget in self.frame_items.winfo_children():
-            widget.destroy()
-        
-        try:
-            # Obtener referencias
-            referencias = Referencia.obtener_todas(solo_activas=False)
-            
-            if not referencias:
-                # Mostrar mensaje si no hay referencias
-                label_vacio = ctk.CTkLabel(
-                    self.frame_items,
-                    text="No hay referencias creadas aún.\nCrea tu primera referencia arriba. 👆",
-                    font=("Arial", 14),
-                    text_color="gray"
-                )
-                label_vacio.pack(pady=50)
-                return
-            
-            # Crear un item por cada referencia
-            for idx, ref in enumerate(referencias):
-                self.crear_item_referencia(ref, idx)
+        fuente = FuentePaginada(
+            cargar_pagina=lambda desde, cantidad: Referencia.obtener_todas(
+                solo_activas=False, limite=cantidad, desplazamiento=desde
+            ),
+            contar=lambda: Referencia.contar_todas(solo_activas=False)
+        )
+        self._mostrar_fuente(
+            fuente,
+            texto_vacio="No hay referencias creadas aún.\nCrea tu primera referencia arriba. 👆",
+            error="Error al cargar referencias"
+        )
+    
+    def _mostrar_fuente(self, fuente, texto_vacio, error):
+        """
+        Precarga la fuente en segundo plano y después la muestra en la lista.
         
-        except Exception as e:
-            messagebox.showerror(
-                "Error",
-                f"Error al cargar referencias: {e}"
-            )
+        Usa siempre la misma clave: si se pide otra carga o búsqueda
+        antes de que termine la anterior, la anterior se descarta.
+        """
+        self.ejecutor.enviar(
+            fuente.precargar,
+            al_terminar=lambda f: self.lista_referencias.set_fuente(f, texto_vacio=texto_vacio),
+            al_fallar=lambda e: messagebox.showerror("Error", f"{error}: {e}"),
+            clave='lista_referencias',
+            reemplazar=True
+        )
     
-    def crear_item_referencia(self, referencia, index):
+    def crear_fila_referencia(self, padre, alto):
         """
-        Crea un widget que muestra una referencia individual.
+        Crea un widget VACÍO para mostrar referencias.
+        
+        La lista virtual crea solo unas pocas filas y las reutiliza:
+        mostrar_referencia() les carga los datos.
         
         Args:
-            referencia (Referencia): Objeto referencia
-            index (int): Índice en la lista (para alternar colores)
+            padre: Contenedor de la lista virtual
+            alto (int): Alto fijo de la fila
+            
+        Returns:
+            CTkFrame: Fila con sus labels y botón guardados como atributos
         """
-        # Frame para el item
-        color = ("gray90", "gray20") if index % 2 == 0 else ("gray95", "gray25")
-        
-        item_frame = ctk.CTkFrame(
-            self.frame_items,
-            fg_color=color
-        )
-        item_frame.pack(fill="x", pady=2, padx=5)
+        item_frame = ctk.CTkFrame(padre, height=alto)
         item_frame.grid_columnconfigure(1, weight=1)
         
         # Indicador de estado (activa/inactiva)
-        estado_symbol = "✅" if referencia.activa else "❌"
-        label_estado = ctk.CTkLabel(
-            item_frame,
-            text=estado_symbol,
-            font=("Arial", 20)
-        )
-        label_estado.grid(row=0, column=0, padx=10, pady=10, rowspan=2)
+        item_frame.label_estado = ctk.CTkLabel(item_frame, text="", font=("Arial", 20))
+        item_frame.label_estado.grid(row=0, column=0, padx=10, pady=10, rowspan=2)
         
         # Código de la referencia
-        label_codigo = ctk.CTkLabel(
+        item_frame.label_codigo = ctk.CTkLabel(
             item_frame,
-            text=referencia.codigo,
+            text="",
             font=("Arial", 16, "bold"),
             anchor="w"
         )
-        label_codigo.grid(row=0, column=1, sticky="w", padx=10, pady=(10, 0))
+        item_frame.label_codigo.grid(row=0, column=1, sticky="w", padx=10, pady=(10, 0))
         
         # Descripción
-        descripcion_texto = referencia.descripcion if referencia.descripcion else "Sin descripción"
-        label_descripcion = ctk.CTkLabel(
+        item_frame.label_descripcion = ctk.CTkLabel(
             item_frame,
-            text=descripcion_texto,
+            text="",
             font=("Arial", 11),
             text_color="gray",
             anchor="w"
         )
-        label_descripcion.grid(row=1, column=1, sticky="w", padx=10, pady=(0, 10))
-        
-        # Botones de acción
-        btn_frame = ctk.CTkFrame(item_frame, fg_color="transparent")
-        btn_frame.grid(row=0, column=2, rowspan=2, padx=10)
+        item_frame.label_descripcion.grid(row=1, column=1, sticky="w", padx=10, pady=(0, 10))
         
         # Botón activar/desactivar
+        item_frame.btn_toggle = ctk.CTkButton(item_frame, text="", width=100)
+        item_frame.btn_toggle.grid(row=0, column=2, rowspan=2, padx=15)
+        
+        return item_frame
+    
+    def mostrar_referencia(self, item_frame, referencia, index):
+        """
+        Carga los datos de una referencia en una fila ya creada.
+        
+        Args:
+            item_frame (CTkFrame): Fila creada por crear_fila_referencia()
+            referencia (Referencia): Objeto referencia
+            index (int): Índice en la lista (para alternar colores)
+        """
+        color = ("gray90", "gray20") if index % 2 == 0 else ("gray95", "gray25")
+        item_frame.configure(fg_color=color)
+        
+        item_frame.label_estado.configure(text="✅" if referencia.activa else "❌")
+        item_frame.label_codigo.configure(text=referencia.codigo)
+        
+        descripcion_texto = referencia.descripcion if referencia.descripcion else "Sin descripción"
+        item_frame.label_descripcion.configure(text=descripcion_texto)
+        
         if referencia.activa:
-            btn_toggle = ctk.CTkButton(
-                btn_frame,
+            item_frame.btn_toggle.configure(
                 text="Desactivar",
-                width=100,
                 fg_color="orange",
                 hover_color="darkorange",
                 command=lambda r=referencia: self.desactivar_referencia(r)
             )
         else:
-            btn_toggle = ctk.CTkButton(
-                btn_frame,
+            item_frame.btn_toggle.configure(
                 text="Activar",
-                width=100,
                 fg_color="green",
                 hover_color="darkgreen",
                 command=lambda r=referencia: self.activar_referencia(r)
             )
-        btn_toggle.pack(side="left", padx=5)
     
     def desactivar_referencia(self, referencia):
         """
@@ -461,7 +500,7 @@ class TabReferencias(ctk.CTkFrame):
                     "✅ Desactivada",
                     f"Referencia '{referencia.codigo}' desactivada."
                 )
-                self.cargar_referencias()
+                self.lista_referencias.refrescar()
             except Exception as e:
                 messagebox.showerror(
                     "Error",
@@ -481,7 +520,7 @@ class TabReferencias(ctk.CTkFrame):
                 "✅ Activada",
                 f"Referencia '{referencia.codigo}' activada."
             )
-            self.cargar_referencias()
+            self.lista_referencias.refrescar()
         except Exception as e:
             messagebox.showerror(
                 "Error",
@@ -489,41 +528,15 @@ class TabReferencias(ctk.CTkFrame):
             )
     
     def buscar_referencias(self):
-        """Busca referencias por término"""
-        termino = self.entry_busqueda.get().strip()
-        
-        if not termino:
-            self.cargar_referencias()
-            return
-        
-        # Limpiar items existentes
-        for widget in self.frame_items.winfo_children():
-            widget.destroy()
-        
-        try:
-            resultados = buscar_referencias(termino)
-            
-            if not resultados:
-                label_vacio = ctk.CTkLabel(
-                    self.frame_items,
-                    text=f"No se encontraron resultados para '{termino}'",
-                    font=("Arial", 14),
-                    text_color="gray"
-                )
-                label_vacio.pack(pady=50)
-                return
-            
-            # Mostrar resultados
-            for idx, ref in enumerate(resultados):
-                self.crear_item_referencia(ref, idx)
+        """
+        Busca referencias por término (botón "Buscar").
         
-        except Exception as e:
-            messagebox.showerror(
-                "Error",
-                f"Error al buscar: {e}"
-            )
+        Mientras se escribe la búsqueda es automática (ver ui/busqueda.py);
+        el botón fuerza una consulta nueva a la base.
+        """
+        self.busqueda.buscar()
     
     def limpiar_busqueda(self):
         """Limpia la búsqueda y recarga todas las referencias"""
         self.entry_busqueda.delete(0, "end")
-        self.cargar_referencias()
\ No newline at end of file
+        self.busqueda.buscar()
\ No newline at end of file
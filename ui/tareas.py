@@ -0,0 +1,465 @@
+"""
+============================================================================
+UI - TAREAS EN SEGUNDO PLANO
+============================================================================
+Ejecuta el trabajo lento (consultas, crear registros, generar planillas)
+FUERA del hilo de Tk, para que la ventana no se congele.
+
+El problema:
+- Tk dibuja la ventana y atiende los clicks desde UN solo hilo (mainloop)
+- Si un botón ejecuta una consulta de 2 segundos, durante esos 2 segundos
+  la ventana no se redibuja ni responde ("No responde")
+
+La solución:
+- Las tareas se ejecutan en un pool de hilos (ThreadPoolExecutor). Cada
+  hilo usa su propia conexión del pool de la base (PoolConexiones).
+- Los hilos NO tocan widgets (Tk no es thread-safe): dejan el resultado
+  en una cola, y el hilo de Tk la vacía cada pocos milisegundos con
+  after() ("bomba" de resultados). Los callbacks al_terminar, al_fallar
+  y al_informar se ejecutan siempre en el hilo de Tk.
+
+Además:
+- Cancelación: tarea.cancelar(). Si todavía no empezó, no se ejecuta;
+  si ya está corriendo, se corta en el próximo informar_progreso() (o
+  en el acto, si registró cómo con al_cancelar(), ej: interrumpir su
+  consulta SQL). El resultado de una tarea cancelada se descarta.
+- Progreso: la función llama informar_progreso(hecho, total, detalle);
+  si informa más rápido de lo que la UI dibuja, solo llega el último.
+- Tareas repetidas (clave): dos envíos con la misma clave no se
+  ejecutan dos veces. Con reemplazar=False (doble click en "Crear") se
+  devuelve la tarea que ya estaba; con reemplazar=True (búsquedas) la
+  anterior se cancela y su resultado, ya viejo, no se muestra.
+
+Uso:
+    ejecutor = EjecutorTareas(ventana)
+
+    ejecutor.enviar(
+        ImportacionService.importar, planilla_id, ruta,
+        al_progresar=informar_progreso,          # ← va a la función
+        al_informar=self.mostrar_avance,         # ← callbacks de UI
+        al_terminar=self.mostrar_resultado,
+        al_fallar=self.mostrar_error,
+        clave=('importar', planilla_id)
+    )
+
+    # Al cerrar la ventana
+    ejecutor.cerrar()
+============================================================================
+"""
+
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Tarea que está ejecutando el hilo actual (None fuera de un hilo del pool)
+_hilo = threading.local()
+
+
+class TareaCancelada(Exception):
+    """Se lanza dentro de una tarea cuando se pidió cancelarla"""
+    pass
+
+
+def tarea_actual():
+    """
+    Devuelve la tarea que se está ejecutando en este hilo.
+
+    Returns:
+        Tarea or None: None si no se llama desde una tarea
+    """
+    return getattr(_hilo, 'tarea', None)
+
+
+def informar_progreso(hecho, total=None, detalle=None):
+    """
+    Informa el avance de la tarea actual a la UI.
+
+    Se puede llamar desde cualquier función que corra dentro de una tarea
+    (o pasarla como callback a un servicio, ej: al_progresar de
+    ImportacionService.importar). Fuera de una tarea no hace nada.
+
+    Args:
+        hecho (int): Cuánto se procesó
+        total (int, optional): Cuánto hay en total
+        detalle (optional): Dato extra para la UI (ej: filas por segundo)
+
+    Raises:
+        TareaCancelada: Si se pidió cancelar la tarea
+    """
+    tarea = tarea_actual()
+    if tarea is not None:
+        tarea.informar(hecho, total, detalle)
+
+
+def al_cancelar(funcion):
+    """
+    Registra funcion() para cortar la tarea actual si la cancelan.
+
+    Sirve para trabajo que no pasa por informar_progreso(), como una
+    consulta SQL larga: al_cancelar(conn.interrupt) hace que la consulta
+    en curso falle con "interrupted" en cuanto se cancela la tarea.
+    funcion() se llama desde el hilo que cancela y solo mientras la tarea
+    siga corriendo. Fuera de una tarea no hace nada.
+
+    Args:
+        funcion (callable): Se llama sin argumentos
+
+    Raises:
+        TareaCancelada: Si la tarea ya estaba cancelada
+    """
+    tarea = tarea_actual()
+    if tarea is not None:
+        tarea._registrar_interrupcion(funcion)
+
+
+def cancelacion_pedida():
+    """
+    Indica si se pidió cancelar la tarea actual.
+
+    Para funciones que prefieren terminar "prolijo" en vez de recibir
+    TareaCancelada en informar_progreso().
+
+    Returns:
+        bool: True si la tarea actual fue cancelada
+    """
+    tarea = tarea_actual()
+    return tarea is not None and tarea.cancelada
+
+
+# ============================================================================
+# TAREA
+# ============================================================================
+
+class Tarea:
+    """
+    Un trabajo enviado al EjecutorTareas.
+
+    Se obtiene de EjecutorTareas.enviar(); sirve para consultar el estado
+    y para cancelar.
+    """
+
+    PENDIENTE = 'pendiente'
+    EN_CURSO = 'en_curso'
+    TERMINADA = 'terminada'
+    FALLIDA = 'fallida'
+    CANCELADA = 'cancelada'
+
+    def __init__(self, funcion, args, kwargs, clave=None,
+                 al_terminar=None, al_fallar=None, al_informar=None):
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.clave = clave
+        self.estado = self.PENDIENTE
+
+        self.al_terminar = al_terminar
+        self.al_fallar = al_fallar
+        self.al_informar = al_informar
+
+        self._cancelar = threading.Event()
+        self._future = None
+        self._cola = None
+
+        # Funciones de al_cancelar(); el lock evita llamarlas cuando la
+        # tarea ya terminó y el hilo pasó a otra cosa
+        self._interrupciones = []
+        self._interrupciones_lock = threading.Lock()
+
+        # Último progreso todavía no entregado a la UI
+        self._progreso = None
+        self._progreso_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"Tarea({getattr(self.funcion, '__name__', self.funcion)!r}, {self.estado})"
+
+    @property
+    def cancelada(self):
+        """True si se pidió cancelar la tarea"""
+        return self._cancelar.is_set()
+
+    @property
+    def terminada(self):
+        """True si la tarea ya no se está ejecutando (por cualquier motivo)"""
+        return self.estado in (self.TERMINADA, self.FALLIDA, self.CANCELADA)
+
+    def cancelar(self):
+        """
+        Pide cancelar la tarea.
+
+        Si no empezó, no se ejecuta. Si ya está corriendo, se corta en el
+        próximo informar_progreso() o con lo registrado en al_cancelar().
+        En ambos casos sus callbacks ya no se llaman.
+        """
+        self._cancelar.set()
+        if self._future is not None:
+            self._future.cancel()
+
+        with self._interrupciones_lock:
+            for funcion in self._interrupciones:
+                try:
+                    funcion()
+                except Exception:
+                    traceback.print_exc()
+
+    def informar(self, hecho, total=None, detalle=None):
+        """
+        Deja el progreso para la UI (se llama desde el hilo de la tarea).
+
+        Solo se encola un aviso por vez: si la UI todavía no entregó el
+        anterior, el nuevo valor lo pisa.
+
+        Raises:
+            TareaCancelada: Si se pidió cancelar la tarea
+        """
+        if self.cancelada:
+            raise TareaCancelada()
+
+        with self._progreso_lock:
+            ya_avisado = self._progreso is not None
+            self._progreso = (hecho, total, detalle)
+
+        if not ya_avisado:
+            self._cola.put((self, 'progreso'))
+
+    def _ejecutar(self):
+        """Corre la función en el hilo del pool"""
+        if self.cancelada:
+            raise TareaCancelada()
+
+        self.estado = self.EN_CURSO
+        _hilo.tarea = self
+        try:
+            return self.funcion(*self.args, **self.kwargs)
+        finally:
+            _hilo.tarea = None
+            with self._interrupciones_lock:
+                self._interrupciones.clear()
+
+    def _registrar_interrupcion(self, funcion):
+        """Guarda una función de al_cancelar() (desde el hilo de la tarea)"""
+        with self._interrupciones_lock:
+            if self.cancelada:
+                raise TareaCancelada()
+            self._interrupciones.append(funcion)
+
+    def _tomar_progreso(self):
+        """Devuelve (y olvida) el último progreso pendiente"""
+        with self._progreso_lock:
+            progreso, self._progreso = self._progreso, None
+        return progreso
+
+
+# ============================================================================
+# EJECUTOR
+# ============================================================================
+
+class EjecutorTareas:
+    """
+    Pool de hilos + bomba de resultados con after().
+
+    Se crea UNO por ventana y se comparte entre las pestañas.
+    """
+
+    def __init__(self, widget, max_hilos=2, intervalo_ms=30):
+        """
+        Args:
+            widget: Cualquier widget de la ventana (se usa su after())
+            max_hilos (int, optional): Tareas en paralelo. Defaults to 2.
+                Cada hilo ocupa una conexión del pool de la base.
+            intervalo_ms (int, optional): Cada cuánto se vacía la cola
+                de resultados. Defaults to 30.
+        """
+        self._widget = widget
+        self.intervalo_ms = intervalo_ms
+
+        self._pool = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix='tarea')
+        self._cola = queue.Queue()
+
+        self._activas = set()
+        self._por_clave = {}
+        self._bombeo = None
+        self._cerrado = False
+
+    def __len__(self):
+        """Cantidad de tareas sin terminar"""
+        return len(self._activas)
+
+    # ========================================================================
+    # API PÚBLICA (llamar desde el hilo de Tk)
+    # ========================================================================
+
+    def enviar(self, funcion, *args, al_terminar=None, al_fallar=None,
+               al_informar=None, clave=None, reemplazar=False, **kwargs):
+        """
+        Ejecuta funcion(*args, **kwargs) en segundo plano.
+
+        Args:
+            funcion (callable): Trabajo a hacer. NO debe tocar widgets.
+            *args, **kwargs: Argumentos para funcion
+            al_terminar (callable, optional): al_terminar(resultado)
+            al_fallar (callable, optional): al_fallar(error). Sin él,
+                el error se imprime en consola.
+            al_informar (callable, optional): al_informar(hecho, total, detalle)
+            clave (hashable, optional): Identifica tareas repetidas
+            reemplazar (bool, optional): Con clave repetida: True cancela
+                la tarea anterior y ejecuta esta; False (default) no
+                ejecuta nada y devuelve la anterior.
+
+        Returns:
+            Tarea: La tarea enviada (o la que ya estaba, ver reemplazar)
+
+        Raises:
+            Exception: Si el ejecutor ya fue cerrado
+
+        Ejemplo:
+            ejecutor.enviar(
+                buscar_contactos_cheque, termino,
+                al_terminar=self.mostrar_resultados,
+                clave='busqueda', reemplazar=True
+            )
+        """
+        if self._cerrado:
+            raise Exception("El ejecutor de tareas ya fue cerrado")
+
+        if clave is not None:
+            anterior = self._por_clave.get(clave)
+            if anterior is not None and not anterior.cancelada:
+                if not reemplazar:
+                    return anterior
+                anterior.cancelar()
+
+        tarea = Tarea(funcion, args, kwargs, clave=clave, al_terminar=al_terminar,
+                      al_fallar=al_fallar, al_informar=al_informar)
+        tarea._cola = self._cola
+
+        self._activas.add(tarea)
+        if clave is not None:
+            self._por_clave[clave] = tarea
+
+        tarea._future = self._pool.submit(tarea._ejecutar)
+        tarea._future.add_done_callback(lambda _, t=tarea: self._cola.put((t, 'fin')))
+
+        self._programar_bombeo()
+        return tarea
+
+    def cancelar(self, clave):
+        """
+        Cancela la tarea pendiente con esa clave (si hay).
+
+        Args:
+            clave (hashable): Clave usada en enviar()
+
+        Returns:
+            bool: True si había una tarea para cancelar
+        """
+        tarea = self._por_clave.get(clave)
+        if tarea is None or tarea.cancelada:
+            return False
+        tarea.cancelar()
+        return True
+
+    def cerrar(self, esperar=True):
+        """
+        Cancela todas las tareas y apaga el pool.
+
+        Llamar ANTES de cerrar las conexiones a la base: con esperar=True
+        las tareas que ya estaban corriendo terminan (o se cortan en su
+        próximo informar_progreso) antes de volver.
+
+        Args:
+            esperar (bool, optional): Esperar a los hilos. Defaults to True.
+        """
+        self._cerrado = True
+
+        for tarea in list(self._activas):
+            tarea.cancelar()
+
+        if self._bombeo is not None:
+            try:
+                self._widget.after_cancel(self._bombeo)
+            except Exception:
+                pass
+            self._bombeo = None
+
+        self._pool.shutdown(wait=esperar, cancel_futures=True)
+        self._activas.clear()
+        self._por_clave.clear()
+
+    # ========================================================================
+    # BOMBA DE RESULTADOS (hilo de Tk)
+    # ========================================================================
+
+    def _programar_bombeo(self):
+        """Agenda el próximo vaciado de la cola (si no hay uno agendado)"""
+        if self._bombeo is None and not self._cerrado:
+            self._bombeo = self._widget.after(self.intervalo_ms, self._bombear)
+
+    def _bombear(self):
+        """
+        Vacía la cola de resultados y llama a los callbacks.
+
+        Solo sigue agendándose mientras haya tareas activas: sin tareas,
+        la ventana no hace trabajo de más.
+        """
+        self._bombeo = None
+
+        while True:
+            try:
+                tarea, tipo = self._cola.get_nowait()
+            except queue.Empty:
+                break
+
+            if tipo == 'progreso':
+                self._entregar_progreso(tarea)
+            else:
+                self._entregar_fin(tarea)
+
+        if self._activas:
+            self._programar_bombeo()
+
+    def _entregar_progreso(self, tarea):
+        """Llama a al_informar con el último progreso de la tarea"""
+        progreso = tarea._tomar_progreso()
+        if progreso is None or tarea.cancelada or tarea.al_informar is None:
+            return
+        self._llamar(tarea.al_informar, *progreso)
+
+    def _entregar_fin(self, tarea):
+        """Marca la tarea como terminada y llama a al_terminar/al_fallar"""
+        self._activas.discard(tarea)
+        if self._por_clave.get(tarea.clave) is tarea:
+            del self._por_clave[tarea.clave]
+
+        future = tarea._future
+        error = None if future.cancelled() else future.exception()
+
+        if tarea.cancelada or isinstance(error, TareaCancelada):
+            # Resultado viejo o no pedido: se descarta
+            tarea.estado = Tarea.CANCELADA
+            return
+
+        # Un progreso que quedó sin entregar llega antes que el resultado
+        self._entregar_progreso(tarea)
+
+        if error is not None:
+            tarea.estado = Tarea.FALLIDA
+            if tarea.al_fallar is not None:
+                self._llamar(tarea.al_fallar, error)
+            else:
+                print(f"⚠️ Error en tarea en segundo plano {tarea!r}:")
+                traceback.print_exception(type(error), error, error.__traceback__)
+            return
+
+        tarea.estado = Tarea.TERMINADA
+        if tarea.al_terminar is not None:
+            self._llamar(tarea.al_terminar, future.result())
+
+    @staticmethod
+    def _llamar(callback, *args):
+        """Ejecuta un callback de UI sin que un error corte la bomba"""
+        try:
+            callback(*args)
+        except Exception:
+            traceback.print_exc()
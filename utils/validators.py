@@ -294,6 +294,154 @@ def limpiar_numero(numero_str):
     return ''.join(filter(str.isdigit, numero_str))
 
 
+# ============================================================================
+# VALIDACIÓN EN LOTE (NumPy)
+# ============================================================================
+# validar_cuit() y validar_cbu() recorren el texto dígito por dígito con
+# int(): perfecto para un campo de un formulario, lento para 50.000 filas
+# de una importación.
+#
+# Las versiones en lote convierten TODOS los textos en una matriz de
+# dígitos (una fila por CUIT/CBU, una columna por posición) y calculan las
+# sumas ponderadas de todas las filas con un solo producto matricial:
+#
+#     matriz (n x 11)  @  pesos (11)  →  suma de cada CUIT (n)
+#
+# Dan exactamente el mismo resultado que las versiones de a uno
+# (ver test_validadores_lote en test.py).
+
+# Pesos del CUIT por posición (la última, el verificador, no suma)
+PESOS_CUIT = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2, 0)
+
+TIPOS_CUIT_VALIDOS = (20, 23, 24, 27, 30, 33, 34)
+
+# Pesos del CBU: una columna por bloque.
+# Bloque 1: posiciones 0 a 6 (verificador en la 7)
+# Bloque 2: posiciones 8 a 20 (verificador en la 21)
+PESOS_CBU_BLOQUE1 = (7, 1, 3, 9, 7, 1, 3)
+PESOS_CBU_BLOQUE2 = (3, 9, 7, 1, 3, 9, 7, 1, 3, 9, 7, 1, 3)
+
+
+def _matriz_digitos(valores, largo):
+    """
+    Limpia los textos (como las versiones de a uno) y los pasa a una matriz.
+    
+    Args:
+        valores: Lista, array o Series de strings
+        largo (int): Cantidad de dígitos esperada
+        
+    Returns:
+        tuple: (matriz, formato_ok)
+            matriz: array (n x largo) de enteros con los dígitos
+            formato_ok: array de bool, True si la fila tiene `largo`
+                dígitos (las demás filas de la matriz son basura)
+    """
+    import numpy as np
+    
+    # Mismo orden de limpieza que validar_cuit/validar_cbu (métodos de str,
+    # que ya son rápidos; lo lento era el int() por dígito).
+    # None o NaN quedan como 'None'/'nan': no son dígitos → inválidos.
+    # Los caracteres no ASCII se cambian por '?' (quedan fuera de 0-9)
+    limpios = [str(valor).replace('-', '').replace(' ', '').strip().encode('ascii', 'replace')
+               for valor in valores]
+    
+    largo_ok = np.fromiter(map(len, limpios), dtype=np.int64, count=len(limpios)) == largo
+    
+    # Bytes de ancho fijo, "vistos" como una matriz de números:
+    # '0' es el byte 48, así que restando 48 quedan los dígitos.
+    # (Los textos de otro largo quedan cortados o rellenos: se descartan
+    # con largo_ok)
+    bytes_fijos = np.array(limpios, dtype=f'S{largo}')
+    matriz = bytes_fijos.view(np.uint8).reshape(-1, largo).astype(np.int64) - ord('0')
+    
+    son_digitos = ((matriz >= 0) & (matriz <= 9)).all(axis=1)
+    
+    return matriz, largo_ok & son_digitos
+
+
+def validar_cuits_lote(cuits):
+    """
+    Valida muchos CUIT/CUIL a la vez (mismo algoritmo que validar_cuit).
+    
+    Args:
+        cuits: Lista, array de NumPy o Series de pandas con los CUIT
+            (con o sin guiones)
+            
+    Returns:
+        tuple: (validos, esperados)
+            validos: array de bool, True si el CUIT de esa fila es válido
+            esperados: array de int con el dígito verificador que
+                corresponde a cada fila (-1 si no tiene 11 dígitos)
+                
+    Nota:
+        Solo se aceptan dígitos ASCII (0-9), igual que lo que se carga
+        en la app; validar_cuit() acepta además otros dígitos Unicode.
+        
+    Ejemplo:
+        validos, esperados = validar_cuits_lote(df['cuit'])
+        df['cuit_valido'] = validos
+        print(df[~df['cuit_valido']])
+    """
+    import numpy as np
+    
+    matriz, formato_ok = _matriz_digitos(cuits, 11)
+    
+    # Sumas ponderadas de todas las filas en una operación
+    suma = matriz @ np.array(PESOS_CUIT)
+    
+    esperados = 11 - suma % 11
+    esperados[esperados == 11] = 0
+    esperados[esperados == 10] = 9
+    
+    tipo = matriz[:, 0] * 10 + matriz[:, 1]
+    tipo_ok = np.isin(tipo, TIPOS_CUIT_VALIDOS)
+    
+    validos = formato_ok & tipo_ok & (matriz[:, 10] == esperados)
+    esperados = np.where(formato_ok, esperados, -1)
+    
+    return validos, esperados
+
+
+def validar_cbus_lote(cbus):
+    """
+    Valida muchos CBU a la vez (mismo algoritmo que validar_cbu).
+    
+    Args:
+        cbus: Lista, array de NumPy o Series de pandas con los CBU
+        
+    Returns:
+        tuple: (validos, esperados)
+            validos: array de bool, True si el CBU de esa fila es válido
+            esperados: array (n x 2) de int con los dígitos verificadores
+                que corresponden a cada bloque (-1 si no tiene 22 dígitos)
+                
+    Nota:
+        Igual que validar_cuits_lote, solo acepta dígitos ASCII.
+        
+    Ejemplo:
+        validos, esperados = validar_cbus_lote(df['cbu'])
+        malos = df[~validos]
+    """
+    import numpy as np
+    
+    matriz, formato_ok = _matriz_digitos(cbus, 22)
+    
+    # Matriz de pesos (22 x 2): la columna 0 suma el bloque 1 y la
+    # columna 1 el bloque 2. Los verificadores tienen peso 0.
+    pesos = np.zeros((22, 2), dtype=np.int64)
+    pesos[0:7, 0] = PESOS_CBU_BLOQUE1
+    pesos[8:21, 1] = PESOS_CBU_BLOQUE2
+    
+    sumas = matriz @ pesos
+    esperados = (10 - sumas % 10) % 10
+    
+    verificadores = matriz[:, [7, 21]]
+    validos = formato_ok & (verificadores == esperados).all(axis=1)
+    esperados = np.where(formato_ok[:, None], esperados, -1)
+    
+    return validos, esperados
+
+
 # ============================================================================
 # FUNCIONES DE TESTING
 # ============================================================================